@@ -0,0 +1,116 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from commons.instrumentation import profiled
+
+
+def create_executor():
+    global executor
+
+    # threads running the sync work of the async views, each one
+    # keeps its own database connection.
+    executor = ThreadPoolExecutor(
+        max_workers=getattr(settings, 'ASYNC_VIEWS_THREADS', 8),
+        thread_name_prefix='async-views')
+
+
+create_executor()
+
+# the threads are not copied to the forked processes.
+os.register_at_fork(after_in_child=create_executor)
+
+
+def call_in_thread(func, *args, **kwargs):
+    """
+    Returns an awaitable running the function on the views thread pool.
+    """
+    def run():
+        # the request signals close the connections on another thread,
+        # so the pool threads recycle their own ones around every call.
+        close_old_connections()
+
+        try:
+            with profiled():
+                return func(*args, **kwargs)
+
+        finally:
+            close_old_connections()
+
+    context = contextvars.copy_context()
+    return asyncio.get_running_loop().run_in_executor(executor, context.run, run)
+
+
+def authenticate_cached(view, request):
+    """
+    Authenticates the request on the event loop with the view
+    authentication classes that can do it without blocking. Their
+    results, refusals included, are kept for the view authentication.
+    """
+    view_class = getattr(view, 'cls', None)
+
+    for authentication_class in getattr(view_class, 'authentication_classes', ()):
+        authenticate = getattr(authentication_class(), 'authenticate_cached', None)
+        authenticated = authenticate(request) if authenticate is not None else None
+
+        if authenticated is not None:
+            request.cached_authentication = authenticated
+            return
+
+
+def async_view(view):
+    """
+    Turns a sync view into a coroutine, so the ASGI handler does not send it
+    to its single sync thread. The request is authenticated on the event
+    loop when possible, then the view runs and its response is rendered on
+    the views thread pool, with a single handoff.
+    """
+    def run(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+
+        if callable(getattr(response, 'render', None)):
+            response.render()
+
+        return response
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        authenticate_cached(view, request)
+
+        response = await call_in_thread(run, request, *args, **kwargs)
+
+        if callable(getattr(response, 'render', None)):
+            async def render():
+                return response
+
+            # it was rendered on the pool already, the handler
+            # would send it to the sync thread to render it again.
+            response.render = render
+
+        return response
+
+    return wrapper
+
+
+class AsyncViewMixin:
+    """
+    Serves the viewset routes handling any of the `async_actions` through
+    `async_view` when `ASYNC_VIEWS` is enabled, which is the default on ASGI.
+    The sync views are kept otherwise, since WSGI would run coroutines on a
+    new event loop for every request.
+    """
+    async_actions = ('list', 'retrieve')
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+
+        if not getattr(settings, 'ASYNC_VIEWS', False) or not set((actions or {}).values()) & set(cls.async_actions):
+            return view
+
+        return async_view(view)
@@ -1,9 +1,14 @@
+import copy
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 
 from rest_framework import authentication
 from rest_framework.authentication import get_authorization_header
 
+from commons.cache import build_cache
+from commons.hashers import check_password
+from commons.instrumentation import timed
 from commons.jwt import JwtSecretKey
 
 
@@ -51,12 +56,18 @@ class AnonymousUser:
         return self.username
 
 
+# result of `authenticate_cached` for the requests refused on the event loop,
+# so their tokens are not verified, nor counted as failures, once again.
+AUTHENTICATION_FAILED = object()
+
+
 class JwtAuthenticationClient:
     model = get_user_model()
     jwt = JwtSecretKey()
     scheme = b'bearer'
     token_expires_in = getattr(settings, 'JWT_EXPIRES_IN', 3600)
     identity_field = 'email'
+    cache = build_cache(getattr(settings, 'JWT_USER_CACHE', None), key_prefix='auth:user:')
 
     def get_queryset(self):
         """
@@ -79,10 +90,41 @@ class JwtAuthenticationClient:
         else:
             return user
 
-    def authenticate(self, request):
+    def get_cached_object(self, sub):
         """
-        Returns the authenticated user using the `Authorization`
-        header to get the user token through the django request.
+        Returns the user based on identity field, looking
+        at the user cache before hitting the database.
+        """
+        if self.cache is None:
+            return self.get_object(sub)
+
+        user = self.cache.get(sub)
+
+        if user is None:
+            user = self.get_object(sub)
+
+            if user:
+                self.cache.set(sub, user)
+
+            return user
+
+        # avoid sharing the same instance between requests.
+        return copy.copy(user)
+
+    def invalidate(self, *subs):
+        """
+        Removes the provided identities from the user cache.
+        """
+        if self.cache is None:
+            return
+
+        for sub in subs:
+            if sub:
+                self.cache.delete(sub)
+
+    def get_token(self, request):
+        """
+        Returns the bearer token from the `Authorization` header, if any.
         """
         try:
             scheme, token = get_authorization_header(request).split()
@@ -94,12 +136,61 @@ class JwtAuthenticationClient:
         if scheme.lower() != self.scheme:
             return None
 
+        return token
+
+    def authenticate_cached(self, request):
+        """
+        Returns the authenticated user like `authenticate`, but only when
+        both the token claims and the user are kept on in-process caches, so
+        it never blocks. It returns `None` whenever it cannot tell and
+        `AUTHENTICATION_FAILED` when the token is refused.
+        """
+        if self.cache is None or self.cache.blocking or (self.jwt.cache is not None and self.jwt.cache.blocking):
+            return None
+
+        token = self.get_token(request)
+
+        if not token:
+            return None
+
         claims = self.jwt.verify(token)
 
         if not claims:
+            return AUTHENTICATION_FAILED
+
+        user = self.cache.get(claims['sub'])
+
+        if user is None:
+            return None
+
+        # avoid sharing the same instance between requests.
+        return copy.copy(user), token
+
+    def authenticate(self, request):
+        """
+        Returns the authenticated user using the `Authorization`
+        header to get the user token through the django request.
+        """
+        # async views may have authenticated, or refused, the request already.
+        authenticated = getattr(request, 'cached_authentication', None)
+
+        if authenticated is AUTHENTICATION_FAILED:
             return None
 
-        user = self.get_object(claims['sub'])
+        if authenticated is not None:
+            return authenticated
+
+        token = self.get_token(request)
+
+        if not token:
+            return None
+
+        claims = self.jwt.verify(token)
+
+        if not claims:
+            return None
+
+        user = self.get_cached_object(claims['sub'])
 
         if not user:
             # refuse the authentication if the user cannot be found.
@@ -110,7 +201,8 @@ class JwtAuthenticationClient:
 
     def sign_in(self, identity, password):
         """
-        Login with email and password.
+        Login with email and password. The password is verified on
+        the hashing pool, which raises `HashingPoolFull` when it's busy.
 
         Params:
             email (str, required): Email to login.
@@ -121,7 +213,7 @@ class JwtAuthenticationClient:
         if not user:
             return None
 
-        if not user.check_password(password):
+        if not check_password(user, password):
             return None
 
         token, payload = self.generate_token(user)
@@ -141,6 +233,7 @@ authentication_client = JwtAuthenticationClient()
 
 class JwtAuthentication(authentication.BaseAuthentication):
 
+    @timed('auth')
     def authenticate(self, request):
         """
         Uses firebase client to authenticate a
@@ -148,6 +241,13 @@ class JwtAuthentication(authentication.BaseAuthentication):
         """
         return authentication_client.authenticate(request)
 
+    @timed('auth')
+    def authenticate_cached(self, request):
+        """
+        Authenticates the request without blocking, when possible.
+        """
+        return authentication_client.authenticate_cached(request)
+
     def authenticate_header(self, request):
         """
         Return a string to be used as the value of the `WWW-Authenticate`
@@ -0,0 +1,128 @@
+import contextlib
+import statistics
+import timeit
+
+from django.db import connection
+
+
+registry = {}
+
+
+def register(name):
+    """
+    Register a benchmark function to be run by
+    the `benchmark` management command.
+    """
+    def decorator(func):
+        registry[name] = func
+        return func
+
+    return decorator
+
+
+def measure(func, number=1000, repeat=5):
+    """
+    Returns the per call timings of a function, in microseconds.
+    """
+    timings = [
+        total / number * 1e6
+        for total in timeit.repeat(func, number=number, repeat=repeat)
+    ]
+
+    return {
+        'number': number,
+        'repeat': repeat,
+        'best': min(timings),
+        'mean': statistics.mean(timings)
+    }
+
+
+def summarize(latencies, elapsed):
+    """
+    Returns the throughput, in requests per second, and the
+    latency percentiles, in milliseconds, of a load run.
+    """
+    latencies = sorted(latency * 1e3 for latency in latencies)
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+
+    return {
+        'requests': len(latencies),
+        'throughput': len(latencies) / elapsed,
+        'p50': quantiles[49],
+        'p95': quantiles[94],
+        'p99': quantiles[98],
+        'max': latencies[-1]
+    }
+
+
+# result keys compared against a baseline, by whether higher values are better.
+compared_keys = {
+    'throughput': True,
+    'p50': False,
+    'p95': False,
+    'p99': False,
+    'max': False,
+    'best': False,
+    'mean': False,
+    'queries_per_request': False,
+    'errors': False
+}
+
+
+def compare(results, baseline, tolerance=0.1, path=()):
+    """
+    Returns the regressions of the results against the baseline ones, as
+    `(path, baseline, current, change)`, where the change is relative to
+    the baseline. Values worse than the baseline by over the tolerance
+    are regressions, the results missing on either side are skipped.
+    """
+    regressions = []
+
+    for key, value in results.items():
+        if key not in baseline:
+            continue
+
+        previous = baseline[key]
+
+        if isinstance(value, dict) and isinstance(previous, dict):
+            regressions.extend(compare(value, previous, tolerance, path + (key,)))
+            continue
+
+        if key not in compared_keys or not isinstance(value, (int, float)) or not isinstance(previous, (int, float)):
+            continue
+
+        if previous == 0:
+            change = 0.0 if value == 0 else float('inf') * (1 if value > 0 else -1)
+
+        else:
+            change = (value - previous) / abs(previous)
+
+        if (-change if compared_keys[key] else change) > tolerance:
+            regressions.append(('.'.join(path + (key,)), previous, value, change))
+
+    return regressions
+
+
+@contextlib.contextmanager
+def test_database(verbosity=0, name=None):
+    """
+    Runs the block on a throwaway database with all the migrations
+    applied, so benchmarks can seed data without touching the real one.
+    The `name` sets the test database name, like an SQLite file path, which
+    takes concurrent writes that would lock the tables of a memory database.
+    """
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    test_name = test_settings.get('NAME')
+
+    if name is not None:
+        test_settings['NAME'] = name
+
+    database_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+
+    try:
+        yield
+
+    finally:
+        connection.creation.destroy_test_db(database_name, verbosity=verbosity)
+        test_settings['NAME'] = test_name
@@ -0,0 +1,298 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from commons.metrics import cache_requests
+
+
+class BaseCache:
+    """
+    Base class for the caches used across the project, it keeps
+    the hit and miss counters shared between all the backends.
+    """
+    # whether reading the cache may wait on I/O, so it's not safe to be done on an event loop.
+    blocking = True
+    # whether the entries are seen by the other processes.
+    shared = False
+
+    def __init__(self, timeout=300, key_prefix=''):
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+        # label of the cache on the exposed metrics.
+        self.name = key_prefix.strip(':') or type(self).__name__
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def _hit(self):
+        with self._stats_lock:
+            self.hits += 1
+
+        cache_requests.inc(cache=self.name, result='hit')
+
+    def _miss(self):
+        with self._stats_lock:
+            self.misses += 1
+
+        cache_requests.inc(cache=self.name, result='miss')
+
+    def get(self, key, default=None):
+        raise NotImplementedError('Subclasses of BaseCache must provide a get() method.')
+
+    def set(self, key, value, timeout=None):
+        raise NotImplementedError('Subclasses of BaseCache must provide a set() method.')
+
+    def delete(self, key):
+        raise NotImplementedError('Subclasses of BaseCache must provide a delete() method.')
+
+    def clear(self):
+        raise NotImplementedError('Subclasses of BaseCache must provide a clear() method.')
+
+    def stats(self):
+        """
+        Returns the cache usage counters.
+        """
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+
+        total = hits + misses
+
+        return {
+            'hits': hits,
+            'misses': misses,
+            'ratio': hits / total if total else 0.0
+        }
+
+    def reset_stats(self):
+        """
+        Resets the cache usage counters.
+        """
+        with self._stats_lock:
+            self.hits = self.misses = 0
+
+
+class MemoryCache(BaseCache):
+    """
+    In-process cache bounded by size, evicting the least recently
+    used entries first and expiring entries older than the timeout.
+
+    The `key_prefix` only names the cache, since the entries
+    are private to the instance.
+    """
+    blocking = False
+
+    def __init__(self, max_size=1024, timeout=300, key_prefix=''):
+        super().__init__(timeout=timeout, key_prefix=key_prefix)
+        self.max_size = max_size
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is not None and entry[0] > now:
+                self._data.move_to_end(key)
+                value = entry[1]
+
+            else:
+                if entry is not None:
+                    # drop the expired entry right away.
+                    del self._data[key]
+
+                entry = None
+
+        if entry is None:
+            self._miss()
+            return default
+
+        self._hit()
+        return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+
+        if timeout <= 0 or self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + timeout, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            size, evictions = len(self._data), self.evictions
+
+        return {
+            **super().stats(),
+            'size': size,
+            'max_size': self.max_size,
+            'evictions': evictions
+        }
+
+
+class DjangoCache(BaseCache):
+    """
+    Cache stored on one of the django cache framework aliases,
+    it allows sharing the entries between processes.
+
+    The `max_size` is accepted for compatibility only, since the
+    size is bounded by the alias `MAX_ENTRIES` option.
+    """
+
+    def __init__(self, alias='default', key_prefix='', timeout=300, max_size=None):
+        super().__init__(timeout=timeout, key_prefix=key_prefix)
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def shared(self):
+        # the local memory and dummy aliases keep nothing across processes.
+        return not isinstance(self.cache, (LocMemCache, DummyCache))
+
+    def make_key(self, key):
+        return f'{self.key_prefix}{key}'
+
+    def get(self, key, default=None):
+        value = self.cache.get(self.make_key(key), default)
+
+        if value is default:
+            self._miss()
+
+        else:
+            self._hit()
+
+        return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+
+        if timeout <= 0:
+            return
+
+        self.cache.set(self.make_key(key), value, timeout)
+
+    def delete(self, key):
+        self.cache.delete(self.make_key(key))
+
+    def clear(self):
+        # the django alias can be shared with other caches,
+        # so we never flush it entirely from here.
+        pass
+
+
+def build_cache(config, **defaults):
+    """
+    Build a cache instance from a settings dict
+    like `{'BACKEND': 'dotted.path', 'OPTIONS': {}}`.
+    """
+    if not config or not config.get('BACKEND'):
+        return None
+
+    backend = import_string(config['BACKEND'])
+    return backend(**{**defaults, **config.get('OPTIONS', {})})
+
+
+class ResponseCache:
+    """
+    Cache of the responses of each user, built from a cache settings dict.
+    The entries are keyed by a generation of the user, bumped on every change
+    of its data, so the outdated entries are never read again and just expire.
+
+    The generations are random, instead of counters, so an evicted generation
+    is never recreated with the value of an outdated one. The hit ratio is
+    the one of the `responses` cache.
+
+    The cache must be shared between processes, otherwise the generations
+    bumped by one process are not seen by the others, which would keep
+    serving the outdated responses until they expire.
+    """
+
+    def __init__(self, config, key_prefix=''):
+        self.responses = build_cache(config, key_prefix=key_prefix)
+        self.generations = build_cache(config, key_prefix=f'{key_prefix}generation:')
+
+        if self.responses is not None and not self.responses.shared:
+            raise ImproperlyConfigured(
+                'The responses caches must be shared between processes, '
+                'use commons.cache.DjangoCache on a shared cache alias.')
+
+    @property
+    def enabled(self):
+        return self.responses is not None
+
+    def get_generation(self, user_id):
+        generation = self.generations.get(user_id)
+
+        if generation is None:
+            generation = self.bump(user_id)
+
+        return generation
+
+    def make_key(self, user_id, key):
+        """
+        Returns the key of an entry of the user on its current generation, it must be
+        taken before reading the data, so the entry is outdated by any change meanwhile.
+        """
+        return f'{user_id}:{self.get_generation(user_id)}:{key}'
+
+    def get(self, key):
+        return self.responses.get(key)
+
+    def set(self, key, value):
+        self.responses.set(key, value)
+
+    def bump(self, user_id):
+        generation = secrets.token_hex(8)
+        self.generations.set(user_id, generation)
+        return generation
+
+    def invalidate(self, user_id, using=None):
+        """
+        Outdates the entries of the user, right away and again once the current
+        transaction is committed, so the responses built meanwhile from the
+        rows before the commit are not kept on the new generation.
+        """
+        if not self.enabled or user_id is None:
+            return
+
+        self.bump(user_id)
+        transaction.on_commit(lambda: self.bump(user_id), using=using)
+
+    def clear(self):
+        if self.enabled:
+            self.responses.clear()
+            self.generations.clear()
+
+    def stats(self):
+        return self.responses.stats() if self.enabled else {}
+
+    def reset_stats(self):
+        if self.enabled:
+            self.responses.reset_stats()
@@ -0,0 +1,15 @@
+from django.db.backends.postgresql import base, creation
+
+from commons.db.pool import PooledDatabaseWrapperMixin, clear_pools
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # idle pooled connections would prevent dropping the database.
+        clear_pools(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    creation_class = DatabaseCreation
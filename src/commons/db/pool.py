@@ -0,0 +1,355 @@
+import collections
+import os
+import threading
+import time
+
+from commons.metrics import pool_checkout_wait, pool_connections
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    Thread safe pool of DB-API connections. It keeps up to `max_size`
+    idle connections, opens up to `max_overflow` extra ones under load,
+    closed as soon as they are released, and makes the callers wait up
+    to `timeout` seconds for a connection when all of them are in use.
+
+    Idle connections older than `recycle` seconds are replaced and, with
+    `pre_ping`, every idle connection is checked before being reused.
+
+    The connections in use, the idle ones and the checkout wait times are
+    recorded on the `/metrics` endpoint labeled by the pool `name`.
+    """
+
+    def __init__(self, max_size=10, max_overflow=0, timeout=30, recycle=None, pre_ping=True, name='default'):
+        self.name = name
+        self.max_size = max_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self.size = 0
+        self.checkouts = 0
+        self.created = 0
+        self.closed = 0
+        self.timeouts = 0
+        self.ping_failures = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+
+        self._idle = collections.deque()
+        self._active = {}
+        self._condition = threading.Condition()
+
+    def ping(self, conn):
+        """
+        Returns whether the connection is still usable.
+        """
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT 1')
+            cursor.close()
+
+        except Exception:
+            return False
+
+        return True
+
+    def close_connection(self, conn):
+        """
+        Closes a connection dropped from the pool.
+        """
+        try:
+            conn.close()
+
+        except Exception:
+            pass
+
+        with self._condition:
+            self.size -= 1
+            self.closed += 1
+            self._condition.notify()
+
+    def reserve(self):
+        """
+        Returns an idle connection, with its creation time, or `None`
+        when a new connection may be opened, waiting while none of them
+        is possible.
+        """
+        start = time.monotonic()
+
+        with self._condition:
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+
+                if self.size < self.max_size + self.max_overflow:
+                    self.size += 1
+                    entry = None
+                    break
+
+                remaining = self.timeout - (time.monotonic() - start)
+
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f'No database connection available after {self.timeout}s, '
+                        f'the pool has {self.size} connections in use.')
+
+                self._condition.wait(remaining)
+
+            waited = time.monotonic() - start
+            self.checkouts += 1
+            self.wait_time += waited
+            self.max_wait = max(self.max_wait, waited)
+
+        pool_checkout_wait.observe(waited, pool=self.name)
+
+        return entry
+
+    def checkout(self, connect):
+        """
+        Returns a connection from the pool, using `connect()`
+        to open a new one when there is no idle connection.
+        """
+        while True:
+            entry = self.reserve()
+
+            if entry is None:
+                try:
+                    conn, created_at = connect(), time.monotonic()
+
+                except Exception:
+                    with self._condition:
+                        self.size -= 1
+                        self._condition.notify()
+                    raise
+
+                with self._condition:
+                    self.created += 1
+
+                break
+
+            conn, created_at = entry
+
+            if self.recycle is not None and time.monotonic() - created_at > self.recycle:
+                self.close_connection(conn)
+                continue
+
+            if self.pre_ping and not self.ping(conn):
+                with self._condition:
+                    self.ping_failures += 1
+
+                self.close_connection(conn)
+                continue
+
+            break
+
+        with self._condition:
+            self._active[id(conn)] = created_at
+            self.record_connections()
+
+        return conn
+
+    def release(self, conn, discard=False):
+        """
+        Gives a connection back to the pool, the connections discarded,
+        the broken ones and the overflow ones are closed instead.
+        """
+        with self._condition:
+            created_at = self._active.pop(id(conn), None)
+            self.record_connections()
+
+        if created_at is None:
+            # not checked out from this pool.
+            conn.close()
+            return
+
+        if not discard:
+            try:
+                # never hand over a pending transaction.
+                conn.rollback()
+
+            except Exception:
+                discard = True
+
+        with self._condition:
+            # overflow connections are never kept.
+            if not discard and self.size <= self.max_size:
+                self._idle.append((conn, created_at))
+                self.record_connections()
+                self._condition.notify()
+                return
+
+        self.close_connection(conn)
+
+    def clear(self):
+        """
+        Closes the idle connections.
+        """
+        with self._condition:
+            idle, self._idle = self._idle, collections.deque()
+            self.record_connections()
+
+        for conn, _ in idle:
+            self.close_connection(conn)
+
+    def record_connections(self):
+        """
+        Records the connections in use and the idle ones, with the pool lock held.
+        """
+        pool_connections.set(len(self._active), pool=self.name, state='active')
+        pool_connections.set(len(self._idle), pool=self.name, state='idle')
+
+    def stats(self):
+        """
+        Returns the pool usage metrics, the times are in seconds.
+        """
+        with self._condition:
+            return {
+                'size': self.size,
+                'active': len(self._active),
+                'idle': len(self._idle),
+                'max_size': self.max_size,
+                'max_overflow': self.max_overflow,
+                'checkouts': self.checkouts,
+                'created': self.created,
+                'closed': self.closed,
+                'timeouts': self.timeouts,
+                'ping_failures': self.ping_failures,
+                'wait_time': self.wait_time,
+                'max_wait': self.max_wait,
+                'mean_wait': self.wait_time / self.checkouts if self.checkouts else 0.0
+            }
+
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def forget_pools():
+    global pools_lock
+
+    # the connections of the parent process must not be used, nor
+    # closed, by the forked ones, they are shared with the parent.
+    pools.clear()
+    pools_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=forget_pools)
+
+
+def get_pool(key, **options):
+    """
+    Returns the pool registered under key, creating it with options when missing.
+    """
+    with pools_lock:
+        if key not in pools:
+            pools[key] = ConnectionPool(name='%s:%s' % key, **options)
+
+        return pools[key]
+
+
+def get_pool_stats():
+    """
+    Returns the metrics of every pool, by database alias and name.
+    """
+    with pools_lock:
+        items = list(pools.items())
+
+    return {'%s:%s' % key: pool.stats() for key, pool in items}
+
+
+def clear_pools(alias=None):
+    """
+    Closes the idle connections of every pool, or only of the pools of an alias.
+    """
+    with pools_lock:
+        items = list(pools.items())
+
+    for (pool_alias, _), pool in items:
+        if alias is None or pool_alias == alias:
+            pool.clear()
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Database wrapper mixin taking the connections from an in-process pool
+    when the database settings have the `POOL` options, and checking the
+    persistent connections before reusing them with `CONN_HEALTH_CHECKS`.
+
+    Closing the wrapper connection, as django does at the end of every
+    request without `CONN_MAX_AGE`, gives it back to the pool.
+    """
+    pool_options = {
+        'MAX_SIZE': 'max_size',
+        'MAX_OVERFLOW': 'max_overflow',
+        'TIMEOUT': 'timeout',
+        'RECYCLE': 'recycle',
+        'PRE_PING': 'pre_ping'
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+
+    @property
+    def pool(self):
+        options = self.settings_dict.get('POOL')
+
+        if not options:
+            return None
+
+        return get_pool(
+            (self.alias, self.settings_dict['NAME']),
+            **{name: options[key] for key, name in self.pool_options.items() if key in options})
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        try:
+            return pool.checkout(lambda: self.connect_to_database(conn_params))
+
+        except PoolTimeout as e:
+            raise self.Database.OperationalError(str(e)) from e
+
+    def connect_to_database(self, conn_params):
+        """
+        Opens a new connection to the database, bypassing the pool.
+        """
+        return super().get_new_connection(conn_params)
+
+    def _close(self):
+        pool = self.pool
+
+        if pool is None or self.connection is None:
+            return super()._close()
+
+        # connections closed within a transaction are kept by the
+        # wrapper, and broken ones must not be used again.
+        with self.wrap_database_errors:
+            pool.release(self.connection, discard=self.in_atomic_block or self.errors_occurred)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None and not self.health_check_done and
+            self.settings_dict.get('CONN_HEALTH_CHECKS') and not self.in_atomic_block
+        ):
+            self.health_check_done = True
+
+            if not self.is_usable():
+                self.close()
+
+        super().ensure_connection()
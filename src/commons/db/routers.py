@@ -0,0 +1,192 @@
+import contextvars
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import OperationalError
+
+from commons.cache import build_cache
+
+
+class ReplicaSet:
+    """
+    Picks the replicas to read from with a smooth weighted round-robin,
+    leaving out the replicas that failed to connect for `retry_after` seconds.
+    """
+
+    def __init__(self, weights, retry_after=30):
+        self.weights = dict(weights)
+        self.retry_after = retry_after
+        self.current = {alias: 0 for alias in self.weights}
+        self.ejected = {}
+        self._lock = threading.Lock()
+
+    def get_available(self):
+        """
+        Returns the replicas not ejected, giving another chance to the ones ejected long ago.
+        """
+        now = time.monotonic()
+
+        for alias, retry_at in list(self.ejected.items()):
+            if retry_at <= now:
+                del self.ejected[alias]
+
+        return [alias for alias in self.weights if alias not in self.ejected]
+
+    def next(self, exclude=()):
+        """
+        Returns the next replica to read from, or `None` when none is available.
+        """
+        with self._lock:
+            available = [alias for alias in self.get_available() if alias not in exclude]
+
+            if not available:
+                return None
+
+            total = 0
+
+            for alias in available:
+                self.current[alias] += self.weights[alias]
+                total += self.weights[alias]
+
+            alias = max(available, key=lambda name: self.current[name])
+            self.current[alias] -= total
+
+            return alias
+
+    def eject(self, alias):
+        """
+        Leaves a replica out until the retry time.
+        """
+        with self._lock:
+            self.ejected[alias] = time.monotonic() + self.retry_after
+
+    def connect(self):
+        """
+        Returns a replica with a working connection, or `None` to read from the primary.
+        """
+        tried = set()
+
+        while True:
+            alias = self.next(exclude=tried)
+
+            if alias is None:
+                return None
+
+            try:
+                connections[alias].ensure_connection()
+
+            except OperationalError:
+                tried.add(alias)
+                self.eject(alias)
+                continue
+
+            return alias
+
+
+class ReplicaReads:
+    """
+    State of a block of code allowed to read from the replicas,
+    the reads go to the primary once anything is written.
+    """
+
+    def __init__(self):
+        self.alias = None
+        self.pinned = False
+
+
+replicas = ReplicaSet(
+    getattr(settings, 'DATABASE_REPLICAS', {}),
+    retry_after=getattr(settings, 'DATABASE_REPLICA_RETRY_SECONDS', 30))
+
+
+def build_pins(config, replicas):
+    """
+    Returns the cache of the users pinned to the primary database, which must be
+    shared between processes when there are replicas, since the next request of
+    a user may be served by another process.
+    """
+    cache = build_cache(config, key_prefix='db:pin:')
+
+    if replicas and cache is not None and not cache.shared:
+        raise ImproperlyConfigured(
+            'The DATABASE_REPLICA_PINS_CACHE must be shared between processes when there are replicas, '
+            'use commons.cache.DjangoCache on a shared cache alias.')
+
+    return cache
+
+
+# users that wrote recently and must read from the primary.
+pins = build_pins(getattr(settings, 'DATABASE_REPLICA_PINS_CACHE', None), replicas.weights)
+
+replica_reads = contextvars.ContextVar('replica_reads', default=None)
+
+
+def start_replica_reads():
+    """
+    Allows the reads that follow to use the replicas, returns
+    the token to stop it with `stop_replica_reads`.
+    """
+    return replica_reads.set(ReplicaReads())
+
+
+def stop_replica_reads(token):
+    """
+    Stops the reads from the replicas, returns whether anything was written meanwhile.
+    """
+    state = replica_reads.get()
+    replica_reads.reset(token)
+
+    return state is not None and state.pinned
+
+
+def pin_user(user_id):
+    """
+    Makes the user read from the primary for a while, so it reads its own writes.
+    """
+    if pins is not None and user_id is not None:
+        pins.set(user_id, True)
+
+
+def is_user_pinned(user_id):
+    """
+    Returns whether the user must read from the primary.
+    """
+    return pins is not None and user_id is not None and pins.get(user_id) is not None
+
+
+class ReplicaRouter:
+    """
+    Routes the reads to the replicas within the blocks started by
+    `start_replica_reads`, all the writes go to the primary database.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = replica_reads.get()
+
+        if state is None or state.pinned or not replicas.weights:
+            return None
+
+        if state.alias is None:
+            # a single replica is used along the block.
+            state.alias = replicas.connect() or DEFAULT_DB_ALIAS
+
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = replica_reads.get()
+
+        if state is not None:
+            state.pinned = True
+
+        # the instances read from a replica are saved to the primary.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in replicas.weights
@@ -0,0 +1,225 @@
+import glob
+import hashlib
+import os
+import sqlite3
+import sys
+
+import django
+from django.conf import settings
+from django.db.migrations.loader import MigrationLoader
+
+from commons.db.pool import clear_pools
+
+
+def get_migrations_key(connection):
+    """
+    Returns a key of the schema the migrations build, which changes with
+    any migration file, the installed apps, the django version or the engine.
+    """
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    digest = hashlib.sha256()
+
+    digest.update(django.get_version().encode())
+    digest.update(connection.vendor.encode())
+    digest.update(repr(connection.settings_dict['TEST'].get('MIGRATE', True)).encode())
+
+    for key in sorted(loader.disk_migrations):
+        digest.update(repr(key).encode())
+
+        with open(sys.modules[loader.disk_migrations[key].__module__].__file__, 'rb') as file:
+            digest.update(file.read())
+
+    return digest.hexdigest()[:16]
+
+
+class SnapshotDatabaseCreationMixin:
+    """
+    Database creation mixin reusing a snapshot of the migrated test database,
+    saved by the first run of the current migrations, so the next runs copy it
+    instead of running every migration again. The test runner adds it to the
+    creation of the connections, see `commons.runner`.
+
+    The parallel test runs clone the restored database as usual.
+    """
+
+    def get_snapshot_key(self, keepdb):
+        if keepdb:
+            return None
+
+        return get_migrations_key(self.connection)
+
+    def get_snapshot_name(self, key, test_database_name):
+        raise NotImplementedError('Subclasses must provide a get_snapshot_name() method.')
+
+    def has_snapshot(self, snapshot):
+        raise NotImplementedError('Subclasses must provide a has_snapshot() method.')
+
+    def save_snapshot(self, snapshot, verbosity):
+        raise NotImplementedError('Subclasses must provide a save_snapshot() method.')
+
+    def create_from_snapshot(self, snapshot, verbosity, autoclobber):
+        """
+        Creates the test database from the snapshot, in place of `_create_test_db`.
+        """
+        raise NotImplementedError('Subclasses must provide a create_from_snapshot() method.')
+
+    def copy_snapshot(self, snapshot):
+        """
+        Copies the snapshot to the test database once it's connected, when it's not done on creation.
+        """
+
+    def create_test_db(self, verbosity=1, autoclobber=False, serialize=True, keepdb=False):
+        key = self.get_snapshot_key(keepdb)
+
+        if key is None:
+            return super().create_test_db(verbosity, autoclobber, serialize, keepdb)
+
+        test_database_name = self._get_test_db_name()
+        snapshot = self.get_snapshot_name(key, test_database_name)
+
+        if not self.has_snapshot(snapshot):
+            super().create_test_db(verbosity, autoclobber, serialize, keepdb)
+            self.save_snapshot(snapshot, verbosity)
+            return test_database_name
+
+        # the steps of `create_test_db` but the migrations.
+        from django.core.management import call_command
+
+        if verbosity >= 1:
+            self.log('Creating test database for alias %s from snapshot %s...' % (
+                self._get_database_display_str(verbosity, test_database_name), key))
+
+        self.create_from_snapshot(snapshot, verbosity, autoclobber)
+
+        self.connection.close()
+        settings.DATABASES[self.connection.alias]['NAME'] = test_database_name
+        self.connection.settings_dict['NAME'] = test_database_name
+
+        self.copy_snapshot(snapshot)
+
+        if serialize:
+            self.connection._test_serialized_contents = self.serialize_db_to_string()
+
+        call_command('createcachetable', database=self.connection.alias)
+        self.connection.ensure_connection()
+
+        return test_database_name
+
+
+class SQLiteSnapshotCreationMixin(SnapshotDatabaseCreationMixin):
+    """
+    The snapshots are database files on `TEST_DATABASE_SNAPSHOT_DIR`,
+    copied with the sqlite online backup api.
+    """
+
+    def get_snapshot_name(self, key, test_database_name):
+        return os.path.join(settings.TEST_DATABASE_SNAPSHOT_DIR, f'{self.connection.alias}-{key}.sqlite3')
+
+    def has_snapshot(self, snapshot):
+        return os.path.exists(snapshot)
+
+    def save_snapshot(self, snapshot, verbosity):
+        os.makedirs(os.path.dirname(snapshot), exist_ok=True)
+
+        # the snapshots of the previous migrations are useless.
+        for path in glob.glob(os.path.join(os.path.dirname(snapshot), f'{self.connection.alias}-*.sqlite3')):
+            if path != snapshot:
+                os.remove(path)
+
+        # written aside and renamed, so concurrent runs never read a partial file.
+        temporary = f'{snapshot}.{os.getpid()}'
+        target = sqlite3.connect(temporary)
+
+        try:
+            self.connection.ensure_connection()
+            self.connection.connection.backup(target)
+
+        finally:
+            target.close()
+
+        os.replace(temporary, snapshot)
+
+        if verbosity >= 1:
+            self.log(f'Saved test database snapshot {snapshot}.')
+
+    def create_from_snapshot(self, snapshot, verbosity, autoclobber):
+        self._create_test_db(verbosity, autoclobber, keepdb=False)
+
+    def copy_snapshot(self, snapshot):
+        source = sqlite3.connect(snapshot)
+
+        try:
+            self.connection.ensure_connection()
+            source.backup(self.connection.connection)
+
+        finally:
+            source.close()
+
+
+class PostgreSQLSnapshotCreationMixin(SnapshotDatabaseCreationMixin):
+    """
+    The snapshots are template databases, named after the test database
+    and the migrations key, the test database is created from them.
+    """
+
+    def get_snapshot_name(self, key, test_database_name):
+        # postgres truncates the names to 63 bytes.
+        return f'{test_database_name[:63 - len(key) - 10]}_template_{key}'
+
+    def get_template_prefix(self, snapshot):
+        return snapshot[:-len(snapshot.rsplit('_', 1)[1])]
+
+    def has_snapshot(self, snapshot):
+        with self._nodb_cursor() as cursor:
+            return self._database_exists(cursor, snapshot)
+
+    def save_snapshot(self, snapshot, verbosity):
+        # the template database cannot be copied while it's connected.
+        self.connection.close()
+        clear_pools(self.connection.alias)
+
+        with self._nodb_cursor() as cursor:
+            # the templates of the previous migrations are useless.
+            cursor.execute(
+                'SELECT datname FROM pg_catalog.pg_database WHERE datname LIKE %s AND datname <> %s',
+                [self.get_template_prefix(snapshot).replace('_', r'\_') + '%', snapshot])
+
+            for name, in cursor.fetchall():
+                cursor.execute('DROP DATABASE %s' % self._quote_name(name))
+
+            cursor.execute('CREATE DATABASE %s WITH TEMPLATE %s' % (
+                self._quote_name(snapshot), self._quote_name(self.connection.settings_dict['NAME'])))
+
+        if verbosity >= 1:
+            self.log(f'Saved test database template {snapshot}.')
+
+    def create_from_snapshot(self, snapshot, verbosity, autoclobber):
+        test_settings = self.connection.settings_dict['TEST']
+        template = test_settings.get('TEMPLATE')
+        test_settings['TEMPLATE'] = snapshot
+
+        try:
+            self._create_test_db(verbosity, autoclobber, keepdb=False)
+
+        finally:
+            test_settings['TEMPLATE'] = template
+
+
+# snapshot mixins of the database creations by vendor.
+snapshot_creation_mixins = {
+    'sqlite': SQLiteSnapshotCreationMixin,
+    'postgresql': PostgreSQLSnapshotCreationMixin,
+}
+
+
+def get_snapshot_creation(connection):
+    """
+    Returns a creation of the connection using snapshots, `None` when its vendor has no snapshots.
+    """
+    mixin = snapshot_creation_mixins.get(connection.vendor)
+    creation_class = type(connection.creation)
+
+    if mixin is None or issubclass(creation_class, mixin):
+        return None
+
+    return type(f'Snapshot{creation_class.__name__}', (mixin, creation_class), {})(connection)
@@ -0,0 +1,259 @@
+import base64
+import hashlib
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.db import close_old_connections
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_lazy, gettext_noop as _
+from rest_framework import exceptions, status
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    Django PBKDF2 hasher with the iterations taken from `PASSWORD_PBKDF2_ITERATIONS`.
+    """
+    iterations = getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', hashers.PBKDF2PasswordHasher.iterations)
+
+
+class ScryptPasswordHasher(hashers.BasePasswordHasher):
+    """
+    Memory-hard password hashing with scrypt, from the python standard library,
+    tuned by `PASSWORD_SCRYPT_N`, `PASSWORD_SCRYPT_R` and `PASSWORD_SCRYPT_P`.
+    The encoded format is the same one of the django 4.0 scrypt hasher.
+    """
+    algorithm = 'scrypt'
+    block_size = getattr(settings, 'PASSWORD_SCRYPT_R', 8)
+    maxmem = 0
+    parallelism = getattr(settings, 'PASSWORD_SCRYPT_P', 1)
+    work_factor = getattr(settings, 'PASSWORD_SCRYPT_N', 2 ** 14)
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        assert password is not None
+        assert salt and '$' not in salt
+
+        n, r, p = n or self.work_factor, r or self.block_size, p or self.parallelism
+
+        hash = hashlib.scrypt(
+            password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+            maxmem=self.maxmem or 128 * n * r * 2, dklen=64)
+
+        hash = base64.b64encode(hash).decode('ascii').strip()
+        return '%s$%d$%s$%d$%d$%s' % (self.algorithm, n, salt, r, p, hash)
+
+    def decode(self, encoded):
+        algorithm, n, salt, r, p, hash = encoded.split('$', 5)
+        assert algorithm == self.algorithm
+
+        return {'algorithm': algorithm, 'n': int(n), 'salt': salt, 'r': int(r), 'p': int(p), 'hash': hash}
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        encoded_2 = self.encode(password, decoded['salt'], decoded['n'], decoded['r'], decoded['p'])
+        return constant_time_compare(encoded, encoded_2)
+
+    def safe_summary(self, encoded):
+        decoded = self.decode(encoded)
+
+        return {
+            _('algorithm'): decoded['algorithm'],
+            _('work factor'): decoded['n'],
+            _('block size'): decoded['r'],
+            _('parallelism'): decoded['p'],
+            _('salt'): hashers.mask_hash(decoded['salt']),
+            _('hash'): hashers.mask_hash(decoded['hash'])
+        }
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return (decoded['n'], decoded['r'], decoded['p']) != (self.work_factor, self.block_size, self.parallelism)
+
+    def harden_runtime(self, password, encoded):
+        # the parameters cannot be increased on an existing hash.
+        pass
+
+
+class HashingPoolFull(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = gettext_lazy('Too many requests waiting for password hashing, try again later.')
+    default_code = 'hashing_pool_full'
+
+    def __init__(self, wait=None, detail=None, code=None):
+        super().__init__(detail, code)
+        # sent as the `Retry-After` header by the exception handler.
+        self.wait = wait
+
+
+class HashingPool:
+    """
+    Bounded pool of threads for the password hashing, so a burst of sign-ins
+    uses at most `max_workers` cores and waits on a queue of `max_pending`
+    calls. The calls over it, or the ones that would wait longer than the
+    `timeout` given the recent hashing times, are refused right away with
+    an estimate of when the queue will be drained.
+
+    The hashing functions of the standard library and argon2 release the GIL,
+    so the request threads keep serving the other endpoints meanwhile.
+    """
+    # weight of the last call on the mean hashing time.
+    smoothing = 0.2
+
+    def __init__(self, max_workers=2, max_pending=32, timeout=10):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.duration = 0.0
+        self.refused = 0
+        self.reset()
+
+        # the threads are not copied to the forked processes, like the parallel test workers.
+        os.register_at_fork(after_in_child=self.reset)
+
+    def reset(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='password-hashing')
+        self.pending = 0
+        self._lock = threading.Lock()
+
+    def estimate_wait(self, pending=None):
+        """
+        Returns the seconds the calls pending on the pool take to be done.
+        """
+        pending = self.pending if pending is None else pending
+        return pending * self.duration / self.max_workers
+
+    def record(self, duration):
+        """
+        Accounts a call done by the pool.
+        """
+        with self._lock:
+            self.pending -= 1
+            self.duration = duration if not self.duration else \
+                self.smoothing * duration + (1 - self.smoothing) * self.duration
+
+    def refuse(self):
+        self.refused += 1
+        # at least a second, since `Retry-After` has no fractions.
+        return HashingPoolFull(wait=max(1, math.ceil(self.estimate_wait())))
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Schedules a call on the pool, raising `HashingPoolFull` when it's busy.
+        """
+        with self._lock:
+            if self.pending >= self.max_workers + self.max_pending or \
+                    self.estimate_wait(self.pending + 1) > self.timeout:
+                raise self.refuse()
+
+            self.pending += 1
+
+        def run():
+            start = time.perf_counter()
+
+            try:
+                return func(*args, **kwargs)
+
+            finally:
+                self.record(time.perf_counter() - start)
+
+        try:
+            return self.executor.submit(run)
+
+        except BaseException:
+            with self._lock:
+                self.pending -= 1
+            raise
+
+    def run(self, func, *args, **kwargs):
+        """
+        Calls a function on the pool and waits for its result.
+        """
+        future = self.submit(func, *args, **kwargs)
+
+        try:
+            return future.result(self.timeout)
+
+        except FutureTimeoutError:
+            if future.cancel():
+                with self._lock:
+                    self.pending -= 1
+
+            with self._lock:
+                raise self.refuse()
+
+    def stats(self):
+        """
+        Returns the pool usage metrics, the times are in seconds.
+        """
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'pending': self.pending,
+                'refused': self.refused,
+                'mean_duration': self.duration,
+                'estimated_wait': self.estimate_wait()
+            }
+
+
+hashing_pool = HashingPool(
+    max_workers=getattr(settings, 'PASSWORD_HASHING_THREADS', 2),
+    max_pending=getattr(settings, 'PASSWORD_HASHING_QUEUE', 32),
+    timeout=getattr(settings, 'PASSWORD_HASHING_TIMEOUT', 10))
+
+
+def verify_password(password, encoded):
+    """
+    Returns whether the password matches the encoded one and
+    whether it must be hashed again with the preferred hasher.
+    """
+    updates = []
+    valid = hashers.check_password(password, encoded, setter=updates.append)
+
+    return valid, bool(updates)
+
+
+def rehash_password(model, pk, password, encoded):
+    """
+    Hashes a password again with the preferred hasher, unless it
+    was changed since it was verified.
+    """
+    try:
+        model.objects \
+            .filter(pk=pk, password=encoded) \
+            .update(password=hashers.make_password(password))
+
+    finally:
+        # pool threads are not covered by the request signals.
+        close_old_connections()
+
+
+def make_password(password):
+    """
+    Hashes a new password on the hashing pool.
+    """
+    return hashing_pool.run(hashers.make_password, password)
+
+
+def check_password(user, password):
+    """
+    Verifies the user password on the hashing pool, hashing it again with
+    the preferred hasher afterwards, out of the request, when it's outdated.
+    """
+    encoded = user.password
+    valid, must_update = hashing_pool.run(verify_password, password, encoded)
+
+    if valid and must_update:
+        try:
+            hashing_pool.submit(rehash_password, type(user), user.pk, password, encoded)
+
+        except HashingPoolFull:
+            # it will be done on another sign-in.
+            pass
+
+    return valid
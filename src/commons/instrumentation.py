@@ -0,0 +1,276 @@
+import asyncio
+import contextlib
+import contextvars
+import cProfile
+import datetime
+import functools
+import json
+import logging
+import os
+import random
+import re
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.deprecation import MiddlewareMixin
+
+from commons.metrics import record_request
+
+logger = logging.getLogger('commons.instrumentation')
+
+
+class Timings:
+    """
+    Time spent by a request on each kind of work, like the
+    database queries, as `(count, seconds)` by name.
+    """
+
+    def __init__(self, profile=False):
+        self.start = time.perf_counter()
+        self.elapsed = None
+        self.spans = {}
+        self.profiler = cProfile.Profile() if profile else None
+
+    def add(self, name, duration):
+        count, total = self.spans.get(name, (0, 0.0))
+        self.spans[name] = (count + 1, total + duration)
+
+    def get(self, name):
+        return self.spans.get(name, (0, 0.0))
+
+    def stop(self):
+        self.elapsed = time.perf_counter() - self.start
+        return self.elapsed
+
+    def get_server_timing(self):
+        """
+        Returns the `Server-Timing` header value, the durations are in milliseconds.
+        """
+        metrics = [f'total;dur={self.elapsed * 1000:.2f}']
+
+        for name, (count, duration) in self.spans.items():
+            description = f';desc="{count} queries"' if name == 'db' else ''
+            metrics.append(f'{name};dur={duration * 1000:.2f}{description}')
+
+        return ', '.join(metrics)
+
+
+current_timings = contextvars.ContextVar('current_timings', default=None)
+
+
+@contextlib.contextmanager
+def timer(name):
+    """
+    Accounts the time spent by the block to the current request.
+    """
+    timings = current_timings.get()
+
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+
+    try:
+        yield
+
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """
+    Decorator accounting the time spent by the function to the current request.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextlib.contextmanager
+def profiled():
+    """
+    Profiles the block when the current request is profiled, the profiler
+    only covers the thread enabling it, like the views thread pool ones.
+    """
+    timings = current_timings.get()
+
+    if timings is None or timings.profiler is None:
+        yield
+        return
+
+    try:
+        timings.profiler.enable()
+
+    except ValueError:
+        # newer pythons allow a single active profiler per process.
+        yield
+        return
+
+    try:
+        yield
+
+    finally:
+        timings.profiler.disable()
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper accounting the queries to the current request.
+    """
+    with timer('db'):
+        return execute(sql, params, many, context)
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def instrument():
+    """
+    Accounts the queries of every database connection, and the ones
+    of the other threads as they connect, to the current request.
+    """
+    for connection in connections.all():
+        install_query_recorder(connection)
+
+    connection_created.connect(install_query_recorder, dispatch_uid='install_query_recorder')
+
+
+class InstrumentationMiddleware(MiddlewareMixin):
+    """
+    Measures the wall time of every request and the time spent on the
+    database queries, on the authentication and on the serialization of
+    the lists and the details, timed by `RowListMixin` and `ConditionalMixin`.
+
+    The timings are sent on the `Server-Timing` header, with
+    `INSTRUMENTATION_SERVER_TIMING`, and logged as JSON for a sample of
+    `INSTRUMENTATION_LOG_SAMPLE_RATE` of the requests and for every request
+    slower than `INSTRUMENTATION_SLOW_REQUEST_SECONDS`. A sample of
+    `INSTRUMENTATION_PROFILE_SAMPLE_RATE` of the requests run under cProfile
+    and the slow ones are dumped to `INSTRUMENTATION_PROFILE_DIR`. With
+    `METRICS_ENABLED` they are recorded on the `/metrics` endpoint too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    server_timing = getattr(settings, 'INSTRUMENTATION_SERVER_TIMING', False)
+    log_sample_rate = getattr(settings, 'INSTRUMENTATION_LOG_SAMPLE_RATE', 0.0)
+    slow_request_seconds = getattr(settings, 'INSTRUMENTATION_SLOW_REQUEST_SECONDS', 0.0)
+    profile_sample_rate = getattr(settings, 'INSTRUMENTATION_PROFILE_SAMPLE_RATE', 0.0)
+    profile_dir = getattr(settings, 'INSTRUMENTATION_PROFILE_DIR', None)
+    metrics = getattr(settings, 'METRICS_ENABLED', False)
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        instrument()
+
+    def start(self, request):
+        """
+        Starts measuring the request, returns the timings and the token to reset them.
+        """
+        profile = bool(
+            self.slow_request_seconds and self.profile_dir and
+            self.profile_sample_rate and random.random() < self.profile_sample_rate)
+
+        timings = Timings(profile=profile)
+        return timings, current_timings.set(timings)
+
+    def finish(self, request, response, timings):
+        elapsed = timings.elapsed
+
+        if self.server_timing:
+            response['Server-Timing'] = timings.get_server_timing()
+
+        if self.metrics:
+            record_request(request, response, timings)
+
+        slow = bool(self.slow_request_seconds) and elapsed >= self.slow_request_seconds
+
+        if slow or (self.log_sample_rate and random.random() < self.log_sample_rate):
+            self.log(request, response, timings, slow)
+
+        if slow and timings.profiler is not None:
+            self.dump_profile(request, timings)
+
+        return response
+
+    def get_record(self, request, response, timings):
+        """
+        Returns the structured log record of the request.
+        """
+        match = getattr(request, 'resolver_match', None)
+        user = getattr(request, 'user', None)
+        queries, db_time = timings.get('db')
+
+        return {
+            'method': request.method,
+            'path': request.path,
+            'route': match.route if match is not None else None,
+            'status': response.status_code,
+            'user': getattr(user, 'pk', None),
+            'duration_ms': round(timings.elapsed * 1000, 2),
+            'db_queries': queries,
+            'db_ms': round(db_time * 1000, 2),
+            'serialize_ms': round(timings.get('serialize')[1] * 1000, 2),
+            'auth_ms': round(timings.get('auth')[1] * 1000, 2)
+        }
+
+    def log(self, request, response, timings, slow):
+        record = self.get_record(request, response, timings)
+        logger.log(logging.WARNING if slow else logging.INFO, json.dumps(record), extra={'request_timings': record})
+
+    def dump_profile(self, request, timings):
+        """
+        Writes the request profile, which can be read with `pstats` or snakeviz.
+        """
+        slug = re.sub(r'[^a-zA-Z0-9]+', '-', request.path).strip('-') or 'root'
+        name = '%s-%s-%s-%dms.prof' % (
+            datetime.datetime.now().strftime('%Y%m%d%H%M%S%f'), request.method, slug, timings.elapsed * 1000)
+
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            timings.profiler.dump_stats(os.path.join(self.profile_dir, name))
+
+        except OSError:
+            logger.exception('Unable to write the request profile.')
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timings, token = self.start(request)
+
+        try:
+            with profiled():
+                response = self.get_response(request)
+
+        finally:
+            # the timings never leak to the next request of the thread.
+            current_timings.reset(token)
+            timings.stop()
+
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        # the event loop is not profiled, it runs other requests
+        # meanwhile, the views thread pool profiles the view instead.
+        timings, token = self.start(request)
+
+        try:
+            response = await self.get_response(request)
+
+        finally:
+            current_timings.reset(token)
+            timings.stop()
+
+        return self.finish(request, response, timings)
@@ -1,15 +1,22 @@
 import datetime
+import hashlib
+import time
+
 import jwt
 
 from django.conf import settings
 
+from commons.cache import build_cache
+from commons.metrics import jwt_verify_failures
+
 
 JWT_SECRET_KEY = getattr(settings, 'JWT_SECRET_KEY', None)
+JWT_CLAIMS_CACHE = getattr(settings, 'JWT_CLAIMS_CACHE', None)
 
 
 class JwtSecretKey:
 
-    def __init__(self, secret_key=None, algorithm='HS256', issuer=None):
+    def __init__(self, secret_key=None, algorithm='HS256', issuer=None, cache=JWT_CLAIMS_CACHE):
         self.secret_key = secret_key or JWT_SECRET_KEY
 
         assert self.secret_key is not None, (
@@ -18,6 +25,7 @@ class JwtSecretKey:
 
         self.algorithm = algorithm
         self.issuer = issuer
+        self.cache = build_cache(cache, key_prefix='jwt:claims:')
 
     def _build_payload(self, **kwargs):
         """
@@ -49,19 +57,64 @@ class JwtSecretKey:
         token = jwt.encode(payload.copy(), self.secret_key, self.algorithm).decode('utf-8')
         return token, payload
 
-    def verify(self, token):
+    def decode(self, token):
         """
-        Verify if a jwt token is valid.
+        Decode and verify a jwt token signature and claims.
 
         Args:
-            token (str, required): token to be validated.
+            token (str, required): token to be decoded.
         """
         try:
             claims = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
 
-        except (jwt.DecodeError, jwt.ExpiredSignature, jwt.InvalidSignatureError):
+        except jwt.ExpiredSignature:
+            jwt_verify_failures.inc(reason='expired')
+            return None
+
+        except jwt.InvalidSignatureError:
+            jwt_verify_failures.inc(reason='invalid_signature')
+            return None
+
+        except jwt.DecodeError:
+            jwt_verify_failures.inc(reason='malformed')
             return None
 
         else:
             return claims
 
+    def verify(self, token):
+        """
+        Verify if a jwt token is valid.
+
+        Args:
+            token (str, required): token to be validated.
+        """
+        if self.cache is None:
+            return self.decode(token)
+
+        # never keep the raw token as a cache key.
+        key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+        claims = self.cache.get(key)
+
+        if claims is not None:
+            if claims.get('exp', float('inf')) <= time.time():
+                # the token expired while it was cached.
+                self.cache.delete(key)
+                jwt_verify_failures.inc(reason='expired')
+                return None
+
+            return dict(claims)
+
+        claims = self.decode(token)
+
+        if claims:
+            timeout = self.cache.timeout
+
+            if 'exp' in claims:
+                # entries must never outlive the token.
+                timeout = min(timeout, int(claims['exp'] - time.time()))
+
+            self.cache.set(key, dict(claims), timeout)
+
+        return claims
+
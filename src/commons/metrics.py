@@ -0,0 +1,423 @@
+import bisect
+import collections
+import glob
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse
+
+
+class MemoryStore:
+    """
+    Metric values of the current process, for the single process servers.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, key, amount=1.0):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, key, value):
+        with self._lock:
+            self._values[key] = float(value)
+
+    def items(self):
+        with self._lock:
+            return list(self._values.items())
+
+
+class FileStore:
+    """
+    Metric values of the current process on a memory mapped file, so
+    the processes of a multi-process server, like the gunicorn workers,
+    can read the values of each other and aggregate them. The updates
+    are plain memory writes, without any system call.
+
+    The file starts with the bytes used, then every entry has the length of
+    its key, the key padded to 8 bytes and its value as a double. Entries are
+    written before the bytes used are updated, so readers never see partial
+    entries.
+    """
+    initial_size = 64 * 1024
+
+    def __init__(self, path):
+        self.path = path
+        self._positions = {}
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+
+        size = os.fstat(self._file.fileno()).st_size
+
+        if size == 0:
+            size = self.initial_size
+            self._file.truncate(size)
+
+        self._capacity = size
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+        self._used = struct.unpack_from('i', self._mmap, 0)[0] or 8
+
+        for key, _, position in self.read_entries(self._mmap, self._used):
+            self._positions[key] = position
+
+    @staticmethod
+    def read_entries(data, used):
+        """
+        Yields the key, value and value position of the entries.
+        """
+        position = 8
+
+        while position < used:
+            length = struct.unpack_from('i', data, position)[0]
+            key = bytes(data[position + 4:position + 4 + length]).decode('utf-8')
+            position += 4 + length + (-(4 + length) % 8)
+
+            yield key, struct.unpack_from('d', data, position)[0], position
+            position += 8
+
+    @classmethod
+    def read(cls, path):
+        """
+        Returns the values of a store file, like the ones of the other processes.
+        """
+        with open(path, 'rb') as file:
+            data = file.read()
+
+        if len(data) < 8:
+            return []
+
+        return [(key, value) for key, value, _ in cls.read_entries(data, struct.unpack_from('i', data, 0)[0])]
+
+    def add_entry(self, key):
+        encoded = key.encode('utf-8')
+        padding = -(4 + len(encoded)) % 8
+        entry = struct.pack(f'i{len(encoded) + padding}sd', len(encoded), encoded + b' ' * padding, 0.0)
+
+        while self._used + len(entry) > self._capacity:
+            self._capacity *= 2
+            self._file.truncate(self._capacity)
+            self._mmap.close()
+            self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+
+        self._mmap[self._used:self._used + len(entry)] = entry
+        self._used += len(entry)
+        struct.pack_into('i', self._mmap, 0, self._used)
+
+        position = self._positions[key] = self._used - 8
+        return position
+
+    def inc(self, key, amount=1.0):
+        with self._lock:
+            position = self._positions.get(key)
+
+            if position is None:
+                position = self.add_entry(key)
+
+            value = struct.unpack_from('d', self._mmap, position)[0]
+            struct.pack_into('d', self._mmap, position, value + amount)
+
+    def set(self, key, value):
+        with self._lock:
+            position = self._positions.get(key)
+
+            if position is None:
+                position = self.add_entry(key)
+
+            struct.pack_into('d', self._mmap, position, value)
+
+    def items(self):
+        with self._lock:
+            return [(key, value) for key, value, _ in self.read_entries(self._mmap, self._used)]
+
+    def close(self):
+        with self._lock:
+            self._mmap.close()
+            self._file.close()
+
+
+class Registry:
+    """
+    Metrics exposed by the `/metrics` endpoint. The values are kept on a
+    `FileStore` per process on `METRICS_DIR`, when it's set, and aggregated
+    from every file when collected, otherwise on a `MemoryStore`.
+
+    The directory must be emptied before the server starts, like the
+    `prometheus_client` multiprocess one, since the files of the old
+    processes are still aggregated.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.metrics = []
+        self._store = None
+        self._lock = threading.Lock()
+
+        # every process writes to its own store, the forked workers included.
+        os.register_at_fork(after_in_child=self.reset)
+
+    @property
+    def store(self):
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = self.create_store()
+
+        return self._store
+
+    def create_store(self):
+        if not self.directory:
+            return MemoryStore()
+
+        os.makedirs(self.directory, exist_ok=True)
+        return FileStore(os.path.join(self.directory, f'metrics_{os.getpid()}.db'))
+
+    def reset(self):
+        self._store = None
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def collect(self):
+        """
+        Returns the sum of the values of every process by key.
+        """
+        values = collections.defaultdict(float)
+
+        if self.directory:
+            # the current process store must exist to be collected.
+            self.store
+
+            for path in glob.glob(os.path.join(self.directory, 'metrics_*.db')):
+                for key, value in FileStore.read(path):
+                    values[key] += value
+
+        else:
+            for key, value in self.store.items():
+                values[key] += value
+
+        return values
+
+    def generate(self):
+        """
+        Returns the metrics on the prometheus text format.
+        """
+        samples = collections.defaultdict(list)
+
+        for key, value in self.collect().items():
+            name, labels = json.loads(key)
+            samples[name].append((labels, value))
+
+        lines = []
+
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.expose(samples))
+
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"'))
+        for name, value in labels
+    )
+
+    return '{%s}' % ','.join(f'{name}="{value}"' for name, value in escaped)
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+
+    return repr(float(value))
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry or default_registry
+        self._keys = {}
+        self.registry.register(self)
+
+    def make_key(self, name, labels):
+        return json.dumps([name, labels])
+
+    def get_keys(self, labels):
+        """
+        Returns the store keys of the label values, built once per label values.
+        """
+        values = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        keys = self._keys.get(values)
+
+        if keys is None:
+            keys = self._keys[values] = self.build_keys([list(pair) for pair in zip(self.labelnames, values)])
+
+        return keys
+
+    def build_keys(self, labels):
+        raise NotImplementedError('Subclasses of Metric must provide a build_keys() method.')
+
+    def expose(self, samples):
+        raise NotImplementedError('Subclasses of Metric must provide an expose() method.')
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def build_keys(self, labels):
+        return self.make_key(self.name, labels)
+
+    def inc(self, amount=1, **labels):
+        self.registry.store.inc(self.get_keys(labels), amount)
+
+    def expose(self, samples):
+        for labels, value in sorted(samples.get(self.name, ()), key=lambda sample: sample[0]):
+            yield f'{self.name}{format_labels(labels)} {format_value(value)}'
+
+
+class Gauge(Metric):
+    """
+    Value set by each process, like the connections it has in use. The
+    values of every process are summed when collected, including the last
+    ones of the processes that are gone until `METRICS_DIR` is emptied.
+    """
+    type = 'gauge'
+
+    def build_keys(self, labels):
+        return self.make_key(self.name, labels)
+
+    def set(self, value, **labels):
+        self.registry.store.set(self.get_keys(labels), value)
+
+    def expose(self, samples):
+        for labels, value in sorted(samples.get(self.name, ()), key=lambda sample: sample[0]):
+            yield f'{self.name}{format_labels(labels)} {format_value(value)}'
+
+
+class Histogram(Metric):
+    """
+    Histogram of observed values, the store keeps the count of each bucket
+    alone, so an observation updates three values, and the cumulative
+    counts are computed when the metrics are exposed.
+    """
+    type = 'histogram'
+    default_buckets = (.005, .01, .025, .05, .075, .1, .25, .5, .75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+    def __init__(self, name, documentation, labelnames=(), buckets=None, registry=None):
+        self.buckets = tuple(sorted(buckets or self.default_buckets)) + (math.inf,)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def build_keys(self, labels):
+        return (
+            [self.make_key(f'{self.name}_bucket', labels + [['le', format_value(bound)]]) for bound in self.buckets],
+            self.make_key(f'{self.name}_sum', labels),
+            self.make_key(f'{self.name}_count', labels)
+        )
+
+    def observe(self, value, **labels):
+        buckets, sum_key, count_key = self.get_keys(labels)
+        store = self.registry.store
+
+        store.inc(buckets[bisect.bisect_left(self.buckets, value)])
+        store.inc(sum_key, value)
+        store.inc(count_key)
+
+    def expose(self, samples):
+        bucket_counts = collections.defaultdict(dict)
+
+        for labels, value in samples.get(f'{self.name}_bucket', ()):
+            *labels, (_, bound) = labels
+            bucket_counts[tuple(map(tuple, labels))][bound] = value
+
+        totals = {tuple(map(tuple, labels)): value for labels, value in samples.get(f'{self.name}_sum', ())}
+        counts = {tuple(map(tuple, labels)): value for labels, value in samples.get(f'{self.name}_count', ())}
+
+        for labels in sorted(counts):
+            cumulative = 0.0
+
+            for bound in map(format_value, self.buckets):
+                cumulative += bucket_counts[labels].get(bound, 0.0)
+                yield f'{self.name}_bucket{format_labels(labels + (("le", bound),))} {format_value(cumulative)}'
+
+            yield f'{self.name}_sum{format_labels(labels)} {format_value(totals.get(labels, 0.0))}'
+            yield f'{self.name}_count{format_labels(labels)} {format_value(counts[labels])}'
+
+
+default_registry = Registry(getattr(settings, 'METRICS_DIR', None))
+
+request_duration = Histogram(
+    'http_request_duration_seconds', 'Duration of the requests by route.', ['method', 'route'])
+
+responses = Counter(
+    'http_responses_total', 'Responses by route and status code.', ['method', 'route', 'status'])
+
+request_queries = Histogram(
+    'db_queries_per_request', 'Database queries done by the requests by route.', ['route'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89))
+
+request_queries_duration = Histogram(
+    'db_query_duration_seconds_per_request', 'Time spent on database queries by the requests by route.', ['route'],
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0))
+
+cache_requests = Counter(
+    'cache_requests_total', 'Cache lookups by cache and result, hit or miss.', ['cache', 'result'])
+
+jwt_verify_failures = Counter(
+    'jwt_verify_failures_total', 'Tokens refused by reason.', ['reason'])
+
+pool_connections = Gauge(
+    'db_pool_connections', 'Connections of the database pools by state, active or idle.', ['pool', 'state'])
+
+pool_checkout_wait = Histogram(
+    'db_pool_checkout_wait_seconds', 'Time waited for a connection of the database pools.', ['pool'],
+    buckets=(.0001, .0005, .001, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0, 30.0))
+
+
+def get_route(request):
+    """
+    Returns the name of the route that handled the request, the
+    unmatched ones share a single value to keep the label bounded.
+    """
+    match = getattr(request, 'resolver_match', None)
+
+    if match is None:
+        return 'unmatched'
+
+    return match.view_name or match.route
+
+
+def record_request(request, response, timings):
+    """
+    Records the metrics of a request from its timings.
+    """
+    route = get_route(request)
+    queries, queries_duration = timings.get('db')
+
+    request_duration.observe(timings.elapsed, method=request.method, route=route)
+    responses.inc(method=request.method, route=route, status=response.status_code)
+    request_queries.observe(queries, route=route)
+    request_queries_duration.observe(queries_duration, route=route)
+
+
+def metrics_view(request):
+    """
+    Exposes the metrics on the prometheus text format.
+    """
+    return HttpResponse(default_registry.generate(), content_type='text/plain; version=0.0.4; charset=utf-8')
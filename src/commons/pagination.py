@@ -0,0 +1,304 @@
+import base64
+import binascii
+import datetime
+import json
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import F, Q
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(pagination.BasePagination):
+    """
+    Paginates a queryset by seeking after the last seen row instead of
+    using `OFFSET`, so every page costs the same regardless of depth.
+
+    The ordering must be unique, which is why it should always end with a
+    tiebreaker like the primary key. Null values are sorted as the lowest
+    values on every database backend.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    ordering = ('-pk',)
+    invalid_cursor_message = _('Invalid cursor')
+
+    def get_ordering(self, view):
+        """
+        Returns the ordering defined on view or the paginator default one.
+        """
+        return tuple(getattr(view, 'cursor_ordering', None) or self.ordering)
+
+    def decode_cursor(self, request):
+        """
+        Returns the cursor position and direction from request.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+
+        if not encoded:
+            return None, False
+
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            position, reverse = data['p'], bool(data.get('r'))
+
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, reverse
+
+    def encode_cursor(self, position, reverse=False):
+        """
+        Returns the url to the provided cursor position.
+        """
+        data = {'p': position}
+
+        if reverse:
+            data['r'] = 1
+
+        encoded = base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'page')
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_position(self, item):
+        """
+        Returns the ordering values of a model instance or a values row.
+        """
+        position = []
+
+        for field in self.ordering:
+            name = field.lstrip('-')
+
+            if isinstance(item, dict):
+                value = item[name]
+
+            else:
+                value = item
+
+                for attr in name.split('__'):
+                    value = getattr(value, 'pk' if attr == 'pk' else attr, None)
+
+                    if value is None:
+                        break
+
+            if isinstance(value, datetime.datetime):
+                value = value.isoformat()
+
+            position.append(value)
+
+        return position
+
+    def get_ordering_fields(self, model):
+        """
+        Returns the model field of each ordering field, following the
+        relations, and whether any field along the way may be null.
+        """
+        fields = []
+
+        for field in self.ordering:
+            name, opts, null = field.lstrip('-'), getattr(model, '_meta'), False
+
+            for attr in name.split('__'):
+                model_field = opts.pk if attr == 'pk' else opts.get_field(attr)
+                null = null or model_field.null
+
+                if model_field.is_relation:
+                    opts = getattr(model_field.related_model, '_meta')
+
+            fields.append((name, model_field, null))
+
+        return fields
+
+    def get_nullable_fields(self, model):
+        """
+        Returns the ordering fields that may contain null values.
+        """
+        return {name for name, _, null in self.get_ordering_fields(model) if null}
+
+    def clean_position(self, position, model):
+        """
+        Returns the cursor position with each value converted by its
+        ordering field, the tampered cursors are not found.
+        """
+        try:
+            return [
+                None if value is None else model_field.to_python(value)
+                for value, (_, model_field, _) in zip(position, self.get_ordering_fields(model))
+            ]
+
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_order_by(self, reverse):
+        """
+        Returns the order expressions keeping nulls as the lowest values.
+        """
+        order_by = []
+
+        for field in self.ordering:
+            descending = field.startswith('-') != reverse
+            expression = F(field.lstrip('-'))
+
+            order_by.append(
+                expression.desc(nulls_last=True) if descending else
+                expression.asc(nulls_first=True))
+
+        return order_by
+
+    def get_seek_filter(self, position, reverse, nullable):
+        """
+        Returns the filter that matches the rows placed after a position,
+        the `(a, b) > (x, y)` comparison expanded to `a > x OR (a = x AND b > y)`.
+        """
+        conditions, equals = [], Q()
+
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+
+            if value is None:
+                after = None if descending else Q(**{f'{name}__isnull': False})
+                equal = Q(**{f'{name}__isnull': True})
+
+            else:
+                after = Q(**{f'{name}__lt' if descending else f'{name}__gt': value})
+                equal = Q(**{name: value})
+
+                if descending and name in nullable:
+                    after |= Q(**{f'{name}__isnull': True})
+
+            if after is not None:
+                conditions.append(equals & after)
+
+            equals &= equal
+
+        if not conditions:
+            return None
+
+        return reduce(lambda a, b: a | b, conditions)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(view)
+
+        position, reverse = self.decode_cursor(request)
+        queryset = queryset.order_by(*self.get_order_by(reverse))
+
+        if position is not None:
+            position = self.clean_position(position, queryset.model)
+            seek = self.get_seek_filter(position, reverse, self.get_nullable_fields(queryset.model))
+            queryset = queryset.filter(seek) if seek is not None else queryset.none()
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+
+        self.has_next = position is not None if reverse else has_more
+        self.has_previous = has_more if reverse else position is not None
+
+        self.next_position = self.get_position(results[-1]) if results and self.has_next else None
+        self.previous_position = self.get_position(results[0]) if results and self.has_previous else None
+
+        return results
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+
+        return self.encode_cursor(self.next_position)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema
+            },
+        }
+
+
+class CountedPaginator(Paginator):
+    """
+    Django paginator that trusts a count known beforehand
+    instead of running a `COUNT(*)` over the object list.
+    """
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+
+        if count is not None:
+            # `count` is a cached property, so we just fill its cache.
+            self.__dict__['count'] = count
+
+
+class PageNumberOrKeysetPagination(pagination.PageNumberPagination):
+    """
+    Keeps the page number pagination as default and switches to the
+    keyset pagination when the client opts in with `?pagination=cursor`
+    or when a cursor is provided.
+    """
+    mode_query_param = 'pagination'
+    keyset_class = KeysetPagination
+
+    def __init__(self):
+        self.keyset = None
+        self.count = None
+
+    def django_paginator_class(self, object_list, per_page, **kwargs):
+        return CountedPaginator(object_list, per_page, count=self.count, **kwargs)
+
+    def use_keyset(self, request):
+        """
+        Returns whether the request opted in for the keyset pagination.
+        """
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor' or
+            self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+
+        self.keyset = None
+
+        # views may provide the list count from materialized counters.
+        get_count = getattr(view, 'get_list_count', None)
+        self.count = get_count() if get_count is not None else None
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+
+        return super().get_paginated_response(data)
@@ -0,0 +1,172 @@
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework import renderers
+from rest_framework.compat import LONG_SEPARATORS, SHORT_SEPARATORS
+from rest_framework.response import Response
+
+try:
+    import orjson
+
+except ImportError:
+    orjson = None
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """
+    JSON renderer encoding straight to bytes with orjson when it's installed
+    and `JSON_RENDERER_ORJSON` is set, with the standard library otherwise.
+    orjson formats the datetimes, the dicts and the lists in C and only calls
+    the rest framework encoder for the other types, like decimals. Unlike the
+    standard library it encodes the `NaN` and infinite floats as `null`.
+
+    The indented output, requested by the `indent` media type parameter, and
+    the ascii or not compact outputs are always rendered by the standard library.
+    Without orjson the whole responses are rendered by the rest framework renderer.
+
+    The lists of `JSON_STREAM_MIN_ITEMS` items or more, alone or as values
+    of a dict like the paginated ones, can be rendered in chunks of
+    `JSON_STREAM_CHUNK_SIZE` items by `iter_render`, see `stream_response`.
+    """
+    use_orjson = orjson is not None and getattr(settings, 'JSON_RENDERER_ORJSON', True)
+    stream_min_items = getattr(settings, 'JSON_STREAM_MIN_ITEMS', 200)
+    stream_chunk_size = getattr(settings, 'JSON_STREAM_CHUNK_SIZE', 100)
+
+    orjson_options = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z if orjson is not None else None
+
+    def __init__(self):
+        self._default = self.encoder_class().default
+
+    def get_encoder(self, accepted_media_type, renderer_context):
+        """
+        Returns the function encoding values to JSON bytes, `None` when they must be indented.
+        """
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return None
+
+        if self.use_orjson and self.compact and not self.ensure_ascii:
+            return self.encode_orjson
+
+        return self.encode_stdlib
+
+    def escape(self, content):
+        # the line separators are valid JSON but not javascript, see the rest framework renderer.
+        if b'\xe2\x80' in content:
+            content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+        return content
+
+    def encode_orjson(self, data):
+        return self.escape(orjson.dumps(data, default=self._default, option=self.orjson_options))
+
+    def encode_stdlib(self, data):
+        content = json.dumps(
+            data, cls=self.encoder_class, ensure_ascii=self.ensure_ascii, allow_nan=not self.strict,
+            separators=SHORT_SEPARATORS if self.compact else LONG_SEPARATORS)
+
+        return self.escape(content.encode('utf-8'))
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if self.get_encoder(accepted_media_type, renderer_context) == self.encode_orjson:
+            return self.encode_orjson(data)
+
+        # the standard library is used like the rest framework renderer does.
+        return super().render(data, accepted_media_type, renderer_context)
+
+    def get_stream_size(self, data):
+        """
+        Returns the number of items of the largest list rendered in chunks.
+        """
+        if isinstance(data, list):
+            return len(data)
+
+        if isinstance(data, dict):
+            return max((len(value) for value in data.values() if isinstance(value, list)), default=0)
+
+        return 0
+
+    def should_stream(self, data, accepted_media_type=None, renderer_context=None):
+        return bool(self.stream_min_items) and self.get_stream_size(data) >= self.stream_min_items and \
+            self.get_encoder(accepted_media_type, renderer_context) is not None
+
+    def get_separators(self):
+        """
+        Returns the items and the keys separators of the rendered JSON, as bytes.
+        """
+        separators = SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
+        return separators[0].encode('utf-8'), separators[1].encode('utf-8')
+
+    def iter_list(self, items, encode, separator):
+        size = self.stream_chunk_size
+
+        for start in range(0, len(items), size):
+            # the brackets of every chunk are dropped, the list ones are sent around them.
+            yield (separator if start else b'') + encode(items[start:start + size])[1:-1]
+
+    def iter_render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Yields the JSON of the data in chunks, the same as `render`
+        once joined, with the long lists split in chunks of items.
+        """
+        encode = self.get_encoder(accepted_media_type, renderer_context)
+
+        if encode is None or not isinstance(data, (list, dict)):
+            # the indented output is rendered at once.
+            yield self.render(data, accepted_media_type, renderer_context)
+            return
+
+        item_separator, key_separator = self.get_separators()
+
+        if isinstance(data, list):
+            yield b'['
+            yield from self.iter_list(data, encode, item_separator)
+            yield b']'
+            return
+
+        # the small values are sent along the next chunk.
+        pending = [b'{']
+
+        for index, (key, value) in enumerate(data.items()):
+            pending.append((item_separator if index else b'') + encode(str(key)) + key_separator)
+
+            if isinstance(value, list) and len(value) >= self.stream_chunk_size:
+                pending.append(b'[')
+                yield b''.join(pending)
+                pending = []
+
+                yield from self.iter_list(value, encode, item_separator)
+                pending.append(b']')
+
+            else:
+                pending.append(encode(value))
+
+        pending.append(b'}')
+        yield b''.join(pending)
+
+
+def stream_response(response):
+    """
+    Returns a streaming copy of a finalized rest framework response when its
+    renderer supports it and its data is large enough, otherwise the response.
+    The data is rendered chunk by chunk as the server sends it.
+    """
+    renderer = getattr(response, 'accepted_renderer', None)
+
+    if not isinstance(response, Response) or response.exception or not hasattr(renderer, 'iter_render') or \
+            not renderer.should_stream(response.data, response.accepted_media_type, response.renderer_context):
+        return response
+
+    streaming = StreamingHttpResponse(
+        renderer.iter_render(response.data, response.accepted_media_type, response.renderer_context),
+        status=response.status_code,
+        content_type=response.content_type or renderer.media_type)
+
+    for name, value in response.items():
+        if name.lower() != 'content-type':
+            streaming[name] = value
+
+    return streaming
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from commons.db.snapshots import get_snapshot_creation
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Test runner hashing the passwords with the fast `TEST_PASSWORD_HASHERS`.
+    With `TEST_DATABASE_SNAPSHOTS`, the test databases are created from the
+    snapshots of the migrated ones, see `commons.db.snapshots`, and cloned
+    by the workers of `--parallel`.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+
+        self.hashers = override_settings(
+            PASSWORD_HASHERS=getattr(settings, 'TEST_PASSWORD_HASHERS', settings.PASSWORD_HASHERS))
+        self.hashers.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.hashers.disable()
+        super().teardown_test_environment(**kwargs)
+
+    def setup_databases(self, **kwargs):
+        self.creations = {}
+
+        if getattr(settings, 'TEST_DATABASE_SNAPSHOTS', False):
+            # the creations are only replaced along the test run, the engines are untouched.
+            for connection in connections.all():
+                creation = get_snapshot_creation(connection)
+
+                if creation is not None:
+                    self.creations[connection.alias] = connection.creation
+                    connection.creation = creation
+
+        return super().setup_databases(**kwargs)
+
+    def teardown_databases(self, old_config, **kwargs):
+        try:
+            super().teardown_databases(old_config, **kwargs)
+
+        finally:
+            for alias, creation in self.creations.items():
+                connections[alias].creation = creation
@@ -0,0 +1,121 @@
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from commons.instrumentation import timed
+
+
+class RowSerializer:
+    """
+    Read only serializer that builds the representation straight from
+    `.values()` rows (or plain tuples in the `fields` order), skipping the
+    per field introspection made by the model serializers.
+
+    Subclasses must produce exactly the same output as the model
+    serializer they replace.
+    """
+    fields = []
+
+    # shared field instances used to format values like the model serializers do.
+    datetime_field = serializers.DateTimeField()
+
+    def __init__(self, instance=None, many=False, context=None):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+        self.timezone = None
+
+    @classmethod
+    def get_values(cls, queryset):
+        """
+        Returns the queryset rows with the fields used by the serializer.
+        """
+        return queryset.values(*cls.fields)
+
+    def format_datetime(self, value):
+        """
+        Returns the datetime representation, the common case of aware
+        datetimes in ISO 8601 is handled here to avoid looking up the
+        current timezone for every value.
+        """
+        if value is None:
+            return None
+
+        if self.timezone is None or timezone.is_naive(value):
+            return self.datetime_field.to_representation(value)
+
+        value = value.astimezone(self.timezone).isoformat()
+
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+
+        return value
+
+    def get_row(self, row):
+        """
+        Returns the row as a dict of field values.
+        """
+        if isinstance(row, dict):
+            return row
+
+        return dict(zip(self.fields, row))
+
+    def to_representation(self, row):
+        raise NotImplementedError('Subclasses of RowSerializer must provide a to_representation() method.')
+
+    def prepare(self):
+        """
+        Resolves the per call state used by the representation.
+        """
+        if settings.USE_TZ and str(api_settings.DATETIME_FORMAT).lower() == ISO_8601:
+            self.timezone = timezone.get_current_timezone()
+
+    def iterate(self):
+        """
+        Yields the representation of every row, without
+        keeping them in memory like `data` does.
+        """
+        self.prepare()
+
+        for row in self.instance:
+            yield self.to_representation(self.get_row(row))
+
+    @property
+    @timed('serialize')
+    def data(self):
+        self.prepare()
+
+        if self.many:
+            return [self.to_representation(self.get_row(row)) for row in self.instance]
+
+        return self.to_representation(self.get_row(self.instance))
+
+
+class DateTimeField(serializers.DateTimeField):
+    """
+    Date time field formatting the aware datetimes in ISO 8601, like
+    `RowSerializer.format_datetime`, with the current timezone looked up
+    once per field instance, so once per serializer instead of every value.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.representation_timezone = None
+
+    def to_representation(self, value):
+        output_format = getattr(self, 'format', api_settings.DATETIME_FORMAT)
+
+        if not value or isinstance(value, str) or output_format is None or \
+                str(output_format).lower() != ISO_8601 or not settings.USE_TZ or timezone.is_naive(value):
+            return super().to_representation(value)
+
+        if self.representation_timezone is None:
+            self.representation_timezone = getattr(self, 'timezone', None) or timezone.get_current_timezone()
+
+        value = value.astimezone(self.representation_timezone).isoformat()
+
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+
+        return value
@@ -0,0 +1,65 @@
+import csv
+import json
+
+
+class Echo:
+    """
+    File-like object that returns the written value instead of storing it.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_ndjson(items):
+    """
+    Yields every item as a newline delimited JSON line.
+    """
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+    for item in items:
+        yield dumps(item) + '\n'
+
+
+def iter_csv(items, header):
+    """
+    Yields a header and every item as a CSV line, items are flat dicts.
+    """
+    writer = csv.DictWriter(Echo(), fieldnames=header, extrasaction='ignore')
+
+    yield writer.writeheader()
+
+    for item in items:
+        yield writer.writerow(item)
+
+
+def read_ndjson(lines):
+    """
+    Yields the line number and the decoded value of every not blank line,
+    or the decoding error in place of the value.
+    """
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            yield number, None
+            continue
+
+        try:
+            yield number, json.loads(line)
+
+        except ValueError as exc:
+            yield number, exc
+
+
+def read_csv(lines):
+    """
+    Yields the line number and the dict of every csv record.
+    Blank records are yielded as `None`.
+    """
+    reader = csv.DictReader(lines)
+
+    for row in reader:
+        if not any(row.values()):
+            yield reader.line_num, None
+            continue
+
+        yield reader.line_num, row
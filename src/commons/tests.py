@@ -1,17 +1,221 @@
+import contextlib
+import copy
 import json
+import time
+import tracemalloc
 
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import Resolver404
 from faker import Faker
 from mixer.backend.django import mixer
 from rest_framework import test
 
 from commons.auth import authentication_client
+from commons.cache import MemoryCache
 from commons.schema import is_schema_valid
+from commons.throttling import TokenBucketThrottle
+from commons.viewsets import list_cache
+
+# the tests run on a single process, so the lists cache, disabled by
+# default, is kept in memory to cover the cached lists as well.
+if not list_cache.enabled:
+    list_cache.responses = MemoryCache(max_size=10000, key_prefix='lists:')
+    list_cache.generations = MemoryCache(max_size=10000, key_prefix='lists:generation:')
+
+
+class Budget:
+    """
+    Limits of an endpoint call: the number of queries, the time spent on
+    them and the wall time, in seconds, and the peak of memory allocated,
+    in bytes. The `None` limits are not checked.
+    """
+
+    def __init__(self, queries=None, db_time=None, memory=None, wall_time=None):
+        self.queries = queries
+        self.db_time = db_time
+        self.memory = memory
+        self.wall_time = wall_time
+
+
+class BudgetUsage:
+    """
+    Resources used by a block, measured by `measure_budget`.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.queries = []
+        self.db_time = 0.0
+        self.memory = None
+        self.wall_time = None
+        self.allocations = []
+
+    def get_problems(self):
+        """
+        Returns the description of every limit exceeded.
+        """
+        budget, problems = self.budget, []
+
+        if budget.queries is not None and len(self.queries) > budget.queries:
+            problems.append(f'{len(self.queries)} queries, over the budget of {budget.queries}')
+
+        if budget.db_time is not None and self.db_time > budget.db_time:
+            problems.append(f'{self.db_time:.3f}s on queries, over the budget of {budget.db_time}s')
+
+        if budget.memory is not None and self.memory > budget.memory:
+            problems.append(f'{self.memory} bytes of peak memory, over the budget of {budget.memory}')
+
+        if budget.wall_time is not None and self.wall_time > budget.wall_time:
+            problems.append(f'{self.wall_time:.3f}s of wall time, over the budget of {budget.wall_time}s')
+
+        return problems
+
+    def get_report(self, problems):
+        """
+        Returns the failure message with the queries and the top allocation sites.
+        """
+        lines = ['', 'The budget was exceeded:', *[f'  - {problem}' for problem in problems]]
+
+        if self.queries:
+            lines += ['', 'Queries:']
+            lines += [f'  {index}. [{query["time"]}s] {query["sql"]}' for index, query in enumerate(self.queries, 1)]
+
+        if self.allocations:
+            lines += ['', 'Top allocation sites:']
+            lines += [f'  {stat}' for stat in self.allocations]
+
+        return '\n'.join(lines)
+
+
+@contextlib.contextmanager
+def measure_budget(budget, top_allocations=10):
+    """
+    Measures the resources used by the block, yielding their `BudgetUsage`.
+    The memory is only traced, with tracemalloc, when it has a limit.
+    """
+    usage = BudgetUsage(budget)
+    trace = budget.memory is not None
+    started = trace and not tracemalloc.is_tracing()
+
+    if trace and not started and not hasattr(tracemalloc, 'reset_peak'):
+        # the peak cannot be reset before python 3.9, so the tracing
+        # restarts, and it's left on for the enclosing measurements.
+        tracemalloc.stop()
+        tracemalloc.start(10)
+
+    if started:
+        tracemalloc.start(10)
+
+    if trace:
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+
+        snapshot = tracemalloc.take_snapshot()
+
+    try:
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            yield usage
+            usage.wall_time = time.perf_counter() - start
+
+        usage.queries = context.captured_queries
+        usage.db_time = sum(float(query['time']) for query in usage.queries)
+
+        if trace:
+            usage.memory = tracemalloc.get_traced_memory()[1]
+            stats = tracemalloc.take_snapshot().compare_to(snapshot, 'lineno')
+            usage.allocations = [stat for stat in stats if stat.size_diff > 0][:top_allocations]
+
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+class BudgetAPIClient(test.APIClient):
+    """
+    Test client checking every call against the budget of the view that
+    served it, from the `budgets` mapping of the view names, like
+    `'api:notes-list'`, optionally prefixed by the method, like `'POST api:notes-list'`.
+    """
+    budgets = {}
+
+    def request(self, **kwargs):
+        budgets = self.budgets
+
+        if not budgets:
+            return super().request(**kwargs)
+
+        memory = any(budget.memory is not None for budget in budgets.values())
+
+        # the widest budget is measured, then checked against the view one.
+        with measure_budget(Budget(memory=0 if memory else None)) as usage:
+            response = super().request(**kwargs)
+
+            if response.streaming:
+                # the streamed content queries while it's consumed.
+                response.streaming_content = list(response.streaming_content)
+
+        method = response.request['REQUEST_METHOD']
+
+        try:
+            view_name = response.resolver_match.view_name
+
+        except Resolver404:
+            return response
+
+        budget = budgets.get(f'{method} {view_name}') or budgets.get(view_name)
+
+        if budget is not None:
+            usage.budget = budget
+            problems = usage.get_problems()
+
+            if problems:
+                raise AssertionError(f'{method} {response.request["PATH_INFO"]}:{usage.get_report(problems)}')
+
+        return response
 
 
 class APITestCase(test.APITestCase):
     # https://pypi.org/project/Faker/
     faker = Faker()
+    client_class = BudgetAPIClient
+
+    # default budgets of the endpoints, checked on every test client call, they
+    # leave room for the queries of a cold cache, like loading the user.
+    budgets = {
+        'api:auth-sign-up': Budget(queries=8),
+        'api:auth-sign-in': Budget(queries=3),
+        'api:categories-list': Budget(queries=5),
+        'api:categories-detail': Budget(queries=4),
+        # plus the tombstone of the deleted category.
+        'DELETE api:categories-detail': Budget(queries=5),
+        'api:notes-list': Budget(queries=6),
+        'api:notes-detail': Budget(queries=7),
+        'api:notes-archive': Budget(queries=6),
+        # backends without bulk inserts returning the ids save the created notes one by one.
+        'PUT api:notes-bulk': Budget(queries=8),
+        'PATCH api:notes-bulk': Budget(queries=8),
+        'api:notes-bulk-archive': Budget(queries=6),
+        'api:notes-stats': Budget(queries=4),
+        'api:notes-changes': Budget(queries=6),
+        'api:notes-export': Budget(queries=4),
+        # plus an insert and a counter update by each new category.
+        'api:notes-import-notes': Budget(queries=10),
+    }
+
+    def _pre_setup(self):
+        super()._pre_setup()
+        self.client.budgets = self.budgets
+
+    def setUp(self):
+        # every test starts with full throttling buckets.
+        if TokenBucketThrottle.cache is not None:
+            TokenBucketThrottle.cache.clear()
+
+        # the rows of the cached lists are rolled back after every test.
+        list_cache.clear()
 
     def assertSchema(self, schema, data):
         """
@@ -48,19 +252,122 @@ class APITestCase(test.APITestCase):
 
         self.assertSchema(schema, data)
 
+    def assertCursorPaginatedSchema(self, schema, data):
+        """
+        Check that data is valid for schema using the cursor pagination.
+        """
+        schema = {
+            'type': 'object',
+            'properties': {
+                'next': {'type': ['string', 'null'], 'format': 'uri'},
+                'previous': {'type': ['string', 'null'], 'format': 'uri'},
+                'results': {
+                    'type': 'array',
+                    'items': schema
+                }
+            },
+            'required': ['next', 'previous', 'results'],
+            'additionalProperties': False
+        }
+
+        self.assertSchema(schema, data)
+
+    @contextlib.contextmanager
+    def assertBudget(self, queries=None, db_time=None, memory=None, wall_time=None):
+        """
+        Check that the block stays within the budget, the failure lists
+        the queries and, with a memory limit, the top allocation sites.
+        """
+        with measure_budget(Budget(queries, db_time, memory, wall_time)) as usage:
+            yield usage
+
+        problems = usage.get_problems()
+
+        if problems:
+            self.fail(usage.get_report(problems))
+
+    def explain(self, sql):
+        """
+        Returns the query plan lines of a sql query.
+        """
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                return [row[-1] for row in cursor.fetchall()]
+
+            # tests tables are too small to avoid sequential scans on postgres.
+            cursor.execute('SET enable_seqscan = off')
+
+            try:
+                cursor.execute(f'EXPLAIN {sql}')
+                return [row[0] for row in cursor.fetchall()]
+
+            finally:
+                cursor.execute('RESET enable_seqscan')
+
+    @contextlib.contextmanager
+    def assertIndexedQueries(self, allow_sort=False):
+        """
+        Check that the queries executed inside the block are served
+        by indexes, without full table scans or temporary sorts.
+        """
+        if connection.vendor not in {'sqlite', 'postgresql'}:
+            self.skipTest(f'Query plans are not supported on {connection.vendor}.')
+
+        with CaptureQueriesContext(connection) as context:
+            yield context
+
+        forbidden = {'sqlite': ['SCAN '], 'postgresql': ['Seq Scan']}[connection.vendor]
+
+        if not allow_sort:
+            forbidden += {'sqlite': ['USE TEMP B-TREE'], 'postgresql': ['Sort  ']}[connection.vendor]
+
+        for query in context.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+
+            plan = self.explain(query['sql'])
+            problems = [line for line in plan if any(item in line for item in forbidden)]
+
+            self.assertFalse(
+                problems,
+                f'\nThe Query: \n'
+                f'{query["sql"]} \n\n'
+                f'Is not served by indexes: \n'
+                f'{json.dumps(plan, indent=2)}'
+            )
+
 
 class AuthenticatedAPITestCase(APITestCase):
 
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        # define a default user to be used on tests, created once per
+        # class, the changes of each test are rolled back after it.
+        cls.user = mixer.blend(settings.AUTH_USER_MODEL)
+        cls.user_token, _ = authentication_client.generate_token(cls.user)
+
     def setUp(self):
-        # define a default user to be used on tests.
-        self.user = mixer.blend(settings.AUTH_USER_MODEL)
+        super().setUp()
+
+        # avoid leaking cached users between tests.
+        if authentication_client.cache is not None:
+            authentication_client.cache.clear()
+
+        # a copy, so the changes of a test to the instance do not leak either.
+        self.user = copy.deepcopy(type(self).user)
 
         # set this user as the default authenticated user.
-        self.authenticate(self.user)
+        self.set_token(self.user_token)
 
     def authenticate(self, user):
         """ Set user bearer token to authorization header. """
         token, _ = authentication_client.generate_token(user)
+        self.set_token(token)
+
+    def set_token(self, token):
         self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {token}'
 
     def unauthenticated(self):
@@ -0,0 +1,112 @@
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from commons.cache import build_cache
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket throttle, each key has a bucket of `rate` tokens, like
+    `'10/min'`, refilled continuously along the period. Every request takes
+    a token, so clients may burst up to the bucket size and then keep the
+    rate. The buckets are stored on the `THROTTLE_CACHE` backend.
+    """
+    cache = build_cache(getattr(settings, 'THROTTLE_CACHE', None), key_prefix='throttle:')
+    lock = threading.Lock()
+    durations = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    scope = None
+
+    def __init__(self):
+        self.capacity, self.period = self.parse_rate(self.get_rate())
+        self.tokens = None
+
+    def get_rate(self):
+        """
+        Returns the rate of the throttle scope, `None` disables it.
+        """
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def parse_rate(self, rate):
+        """
+        Returns the bucket size and its refill period in seconds from a rate like `'10/min'`.
+        """
+        if rate is None:
+            return None, None
+
+        number, period = rate.split('/')
+        return int(number), self.durations[period[0]]
+
+    def get_cache_key(self, request, view):
+        """
+        Returns the key of the request bucket, `None` skips the throttle.
+        """
+        raise NotImplementedError('.get_cache_key() must be overridden')
+
+    def allow_request(self, request, view):
+        if self.capacity is None or self.cache is None:
+            return True
+
+        key = self.get_cache_key(request, view)
+
+        if key is None:
+            return True
+
+        key, now = f'{self.scope}:{key}', time.time()
+        refill = self.capacity / self.period
+
+        # the lock only covers the in-process backends, the shared
+        # ones may allow a few extra requests on concurrent updates.
+        with self.lock:
+            tokens, updated_at = self.cache.get(key) or (self.capacity, now)
+            tokens = min(self.capacity, tokens + (now - updated_at) * refill)
+
+            allowed = tokens >= 1
+            self.tokens = tokens - 1 if allowed else tokens
+
+            # the bucket is forgotten once it would be full again.
+            self.cache.set(key, (self.tokens, now), timeout=int((self.capacity - self.tokens) / refill) + 1)
+
+        return allowed
+
+    def wait(self):
+        if self.tokens is None or self.tokens >= 1:
+            return None
+
+        return (1 - self.tokens) * self.period / self.capacity
+
+
+class IPThrottle(TokenBucketThrottle):
+    """
+    Throttles the requests by client IP address, the one of the
+    connection or, behind the `NUM_PROXIES` proxies, the one they forwarded.
+    """
+
+    def get_cache_key(self, request, view):
+        return self.get_ident(request)
+
+
+class EmailThrottle(TokenBucketThrottle):
+    """
+    Throttles the requests by the `email` they provide, like the sign-in
+    attempts against an account coming from many addresses.
+    """
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+
+        if not email or not isinstance(email, str):
+            return None
+
+        return email.strip().lower()
+
+
+class AuthIPThrottle(IPThrottle):
+    scope = 'auth_ip'
+
+
+class AuthEmailThrottle(EmailThrottle):
+    scope = 'auth_email'
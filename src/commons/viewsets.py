@@ -0,0 +1,299 @@
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from commons.cache import ResponseCache
+from commons.db.routers import is_user_pinned, pin_user, start_replica_reads, stop_replica_reads
+from commons.instrumentation import timer
+from commons.renderers import stream_response
+from commons.request import cast_param
+
+# list responses of each user, outdated by `list_cache.invalidate(user_id)`
+# whenever anything shown by the cached lists changes.
+list_cache = ResponseCache(getattr(settings, 'LIST_CACHE', None), key_prefix='lists:')
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = _('The resource was modified since the provided version.')
+    default_code = 'precondition_failed'
+
+
+class RowListMixin:
+    """
+    Lists the objects from `.values()` rows using the view `row_serializer_class`,
+    avoiding the model instances and the model serializer introspection.
+
+    The serialization of the lists is timed for `InstrumentationMiddleware`,
+    either from rows or, without `use_row_serializer`, from model instances.
+    """
+    row_serializer_class = None
+    use_row_serializer = getattr(settings, 'FAST_SERIALIZATION', True)
+
+    def list(self, request, *args, **kwargs):
+        rows = self.use_row_serializer and self.row_serializer_class is not None
+        queryset = self.filter_queryset(self.get_queryset())
+
+        if rows:
+            queryset = self.row_serializer_class.get_values(queryset)
+
+        page = self.paginate_queryset(queryset)
+        objects = page if page is not None else queryset
+
+        if rows:
+            # the row serializers time their own data.
+            data = self.row_serializer_class(objects, many=True, context=self.get_serializer_context()).data
+
+        else:
+            serializer = self.get_serializer(objects, many=True)
+
+            with timer('serialize'):
+                data = serializer.data
+
+        if page is not None:
+            return self.get_paginated_response(data)
+
+        return Response(data)
+
+
+class CachedListMixin:
+    """
+    Caches the list responses of each user on `list_cache`, keyed by the
+    view, the host of the pagination links and the `list_cache_params`,
+    normalized by their casts. Requests with any other param are not cached.
+
+    The validators of `ConditionalMixin` are cached along the data, so the
+    cached lists are validated without querying the database at all.
+    """
+    list_cache = list_cache
+    list_cache_params = {'page': int}
+    list_cache_headers = ('ETag', 'Last-Modified')
+
+    def get_list_cache_key(self):
+        """
+        Returns the cache key of the list request, `None` when it's not cached.
+        """
+        params = self.request.GET
+
+        if not self.list_cache.enabled or set(params) - set(self.list_cache_params):
+            return None
+
+        values = (
+            '%s=%s' % (name, cast_param(self.request, name, cast=cast, default='invalid'))
+            for name, cast in sorted(self.list_cache_params.items()) if name in params
+        )
+
+        return '%s:%s:%s' % (self.basename, self.request.get_host(), '&'.join(values))
+
+    def get_cached_response(self, data, headers):
+        """
+        Returns the response of a cached list, a `304 Not Modified` when it's fresh.
+        """
+        etag, last_modified = headers.get('ETag'), headers.get('Last-Modified')
+        response = None
+
+        if etag or last_modified:
+            response = get_conditional_response(
+                self.request, etag=etag, last_modified=last_modified and parse_http_date_safe(last_modified))
+
+        if response is None:
+            response = Response(data)
+
+        for name, value in headers.items():
+            response[name] = value
+
+        return response
+
+    def list(self, request, *args, **kwargs):
+        key = self.get_list_cache_key()
+
+        if key is None:
+            return super().list(request, *args, **kwargs)
+
+        # taken before reading anything, see `ResponseCache.make_key`.
+        key = self.list_cache.make_key(request.user.pk, key)
+        cached = self.list_cache.get(key)
+
+        if cached is not None:
+            return self.get_cached_response(*cached)
+
+        response = super().list(request, *args, **kwargs)
+
+        if response.status_code == status.HTTP_200_OK:
+            headers = {name: response[name] for name in self.list_cache_headers if response.has_header(name)}
+            self.list_cache.set(key, (response.data, headers))
+
+        return response
+
+
+class ConditionalMixin:
+    """
+    Adds `ETag` and `Last-Modified` validators to the detail responses and
+    `ETag` validators to the list ones. `If-None-Match`/`If-Modified-Since`
+    return `304 Not Modified` before anything is serialized and
+    `If-Match`/`If-Unmodified-Since` protect the writes against concurrent changes.
+
+    The lists have no `Last-Modified`, their latest change cannot tell the
+    deleted objects nor the changes made within the same second of it.
+    The `Last-Modified` of the details is informative, the http dates have
+    whole seconds, so the reads are validated by the `ETag` only.
+    """
+    last_modified_field = 'last_update'
+
+    def get_etag(self, *values):
+        """
+        Returns an etag built from the provided values.
+        """
+        data = '|'.join(str(value) for value in values)
+        return quote_etag(hashlib.md5(data.encode('utf-8')).hexdigest())
+
+    def get_object_validators(self, obj):
+        """
+        Returns the etag and the last modified datetime of an object.
+        """
+        last_modified = getattr(obj, self.last_modified_field)
+        return self.get_etag(obj.pk, last_modified.isoformat()), last_modified
+
+    def get_list_state(self, queryset):
+        """
+        Returns the values that change whenever the list changes.
+        Subclasses may extend it with related objects that are part of the list.
+        """
+        state = queryset.order_by().aggregate(last_modified=Max(self.last_modified_field), count=Count('pk'))
+        return [state['last_modified'], state['count']]
+
+    def get_list_validators(self, queryset):
+        """
+        Returns the etag of a list and no last modified datetime.
+        """
+        state = self.get_list_state(queryset)
+        return self.get_etag(self.request.user.pk, self.request.get_full_path(), *state), None
+
+    def get_conditional_response(self, etag, last_modified):
+        """
+        Returns the response for the request preconditions, if any.
+        """
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        if self.request.method in ('GET', 'HEAD'):
+            # a `304` by `If-Modified-Since` would hide the changes made within the same second.
+            timestamp = None
+
+        response = get_conditional_response(self.request, etag=etag, last_modified=timestamp)
+
+        if response is not None and response.status_code == status.HTTP_412_PRECONDITION_FAILED:
+            raise PreconditionFailed()
+
+        if response is not None:
+            self.set_validators(response, etag, last_modified)
+
+        return response
+
+    def set_validators(self, response, etag, last_modified):
+        """
+        Sets the validators headers on response.
+        """
+        response['ETag'] = etag
+
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+
+        return response
+
+    def get_object(self):
+        obj = super().get_object()
+
+        if self.request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            # writes are refused when the client has an outdated version.
+            self.get_conditional_response(*self.get_object_validators(obj))
+
+        return obj
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        validators = self.get_object_validators(instance)
+
+        response = self.get_conditional_response(*validators)
+
+        if response is None:
+            serializer = self.get_serializer(instance)
+
+            with timer('serialize'):
+                data = serializer.data
+
+            response = self.set_validators(Response(data), *validators)
+
+        return response
+
+    def list(self, request, *args, **kwargs):
+        validators = self.get_list_validators(self.filter_queryset(self.get_queryset()))
+
+        response = self.get_conditional_response(*validators)
+
+        if response is None:
+            response = self.set_validators(super().list(request, *args, **kwargs), *validators)
+
+        return response
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+
+        # keeps the updated object to send its new validators.
+        self.updated_object = serializer.instance
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        updated_object = getattr(self, 'updated_object', None)
+
+        if updated_object is not None and response.status_code == status.HTTP_200_OK and 'ETag' not in response:
+            self.set_validators(response, *self.get_object_validators(updated_object))
+
+        return response
+
+
+class StreamingResponseMixin:
+    """
+    Streams the large responses, like the bulk actions ones, in chunks
+    rendered as they are sent, see `commons.renderers.stream_response`.
+    It must come before the mixins changing the response headers.
+    """
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        return stream_response(super().finalize_response(request, response, *args, **kwargs))
+
+
+class ReplicaReadMixin:
+    """
+    Reads the safe requests from the database replicas. Users that
+    wrote anything are pinned to the primary database for a while,
+    so they always read their own writes.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        # the user is known only after the authentication.
+        if request.method in SAFE_METHODS and not is_user_pinned(getattr(request.user, 'pk', None)):
+            self.replica_reads = start_replica_reads()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, 'replica_reads', None)
+        written = request.method not in SAFE_METHODS
+
+        if token is not None:
+            self.replica_reads = None
+            written = stop_replica_reads(token) or written
+
+        if written:
+            # the django request keeps the user once authenticated.
+            pin_user(getattr(getattr(request._request, 'user', None), 'pk', None))
+
+        return super().finalize_response(request, response, *args, **kwargs)
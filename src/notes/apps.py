@@ -5,3 +5,7 @@ from django.utils.translation import ugettext_lazy
 class NotesConfig(AppConfig):
     name = 'notes'
     verbose_name = ugettext_lazy('Notes')
+
+    def ready(self):
+        # connect the model signals.
+        from notes import signals  # noqa
@@ -0,0 +1,846 @@
+import asyncio
+import collections
+import contextlib
+import datetime
+import http.client
+import io
+import json
+import os
+import random
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from wsgiref import simple_server
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection, connections
+from django.db.utils import load_backend
+from django.db.backends.signals import connection_created
+from django.db.models import Q
+from django.test.utils import override_settings
+from django.urls import include, path
+from django.utils import timezone
+from faker import Faker
+from rest_framework import renderers, routers, serializers
+
+from commons.auth import authentication_client
+from commons.benchmark import measure, register, summarize, test_database
+from commons.cache import MemoryCache
+from commons.db.pool import clear_pools
+from commons.hashers import HashingPool, hashing_pool
+from commons.jwt import JwtSecretKey
+from commons.renderers import JSONRenderer, orjson
+from commons.throttling import TokenBucketThrottle
+from commons.viewsets import list_cache
+from notes import models
+from notes.counters import recount
+from notes.search import search_notes
+from notes.serializers.note import NoteResultSerializer, NoteRowSerializer
+
+
+@register('jwt')
+def benchmark_jwt(number=1000, repeat=5, **kwargs):
+    """
+    Compares the token verification cost with and without the claims cache.
+    """
+    uncached = JwtSecretKey(cache=None)
+    cached = JwtSecretKey(cache={'BACKEND': 'commons.cache.MemoryCache'})
+
+    token, _ = uncached.generate(sub='benchmark@example.com', exp=3600)
+
+    return {
+        'decode': measure(lambda: uncached.verify(token), number, repeat),
+        'cached': measure(lambda: cached.verify(token), number, repeat)
+    }
+
+
+def build_notes(size):
+    """
+    Returns unsaved notes, and their `.values()` rows, to benchmark serialization.
+    """
+    now = timezone.now()
+    categories = [models.Category(id=index, name=f'Category {index}') for index in range(1, 11)]
+    notes = [
+        models.Note(
+            id=index,
+            title=f'Note {index}',
+            content='Lorem ipsum dolor sit amet.' * 4,
+            category=categories[index % 11] if index % 11 < 10 else None,
+            archived=index % 2 == 0,
+            created_at=now - datetime.timedelta(minutes=index),
+            last_update=now)
+        for index in range(1, size + 1)
+    ]
+
+    rows = [
+        {
+            'id': note.id,
+            'title': note.title,
+            'content': note.content,
+            'category_id': note.category_id,
+            'category__name': note.category.name if note.category else None,
+            'archived': note.archived,
+            'created_at': note.created_at,
+            'last_update': note.last_update
+        }
+        for note in notes
+    ]
+
+    return notes, rows
+
+
+@register('serializers')
+def benchmark_serializers(number=1, repeat=5, size=10000, **kwargs):
+    """
+    Compares the model serializer and the row serializer over a list of notes.
+    """
+    notes, rows = build_notes(size)
+
+    return {
+        'size': size,
+        'model': measure(lambda: NoteResultSerializer(notes, many=True).data, number, repeat),
+        'rows': measure(lambda: NoteRowSerializer(rows, many=True).data, number, repeat)
+    }
+
+
+class StockNoteResultSerializer(NoteResultSerializer):
+    """
+    `NoteResultSerializer` with the rest framework datetime fields.
+    """
+    created_at = serializers.DateTimeField(read_only=True)
+    last_update = serializers.DateTimeField(read_only=True)
+
+
+@register('renderers')
+def benchmark_renderers(number=None, repeat=5, sizes=(10, 100, 1000), **kwargs):
+    """
+    Compares the stock serialization and JSON rendering of pages of notes
+    with the project datetime field and renderer, on the standard library
+    and on orjson when it's installed, and with the page rendered in chunks.
+    """
+    results = {}
+
+    for size in sorted(sizes):
+        notes, _ = build_notes(size)
+        calls = number or max(1, 10000 // size)
+
+        def page(serializer_class):
+            return {
+                'count': size * 10,
+                'next': 'http://testserver/api/notes/?page=2',
+                'previous': None,
+                'results': serializer_class(notes, many=True).data
+            }
+
+        data = page(NoteResultSerializer)
+        stdlib, fast = JSONRenderer(), JSONRenderer()
+        stdlib.use_orjson = False
+
+        result = results[str(size)] = {
+            'serialize_stock': measure(lambda: page(StockNoteResultSerializer), calls, repeat),
+            'serialize': measure(lambda: page(NoteResultSerializer), calls, repeat),
+            'render_stock': measure(lambda: renderers.JSONRenderer().render(data), calls, repeat),
+            'render_stdlib': measure(lambda: stdlib.render(data), calls, repeat),
+            'render_stream': measure(lambda: b''.join(fast.iter_render(data)), calls, repeat),
+        }
+
+        if orjson is not None:
+            result['render_orjson'] = measure(lambda: fast.render(data), calls, repeat)
+
+        result['speedup'] = (result['serialize_stock']['best'] + result['render_stock']['best']) / \
+            (result['serialize']['best'] + result['render_orjson' if orjson else 'render_stdlib']['best'])
+
+    return results
+
+
+def seed_notes(user, size, words, batch_size=5000):
+    """
+    Inserts notes with random content for a user.
+    """
+    created = 0
+
+    while created < size:
+        count = min(batch_size, size - created)
+
+        models.Note.objects.bulk_create([
+            models.Note(
+                user=user,
+                title=' '.join(random.choices(words, k=4)),
+                content=' '.join(random.choices(words, k=40)))
+            for _ in range(count)
+        ])
+
+        created += count
+
+
+@register('search')
+def benchmark_search(number=20, repeat=3, sizes=(10000, 100000, 1000000), term='needle', matches=10, **kwargs):
+    """
+    Compares the full-text search with an `icontains` scan for a term
+    found in a fixed number of notes while the corpus grows, up to
+    a million notes. Seeding the largest size takes a few minutes.
+    """
+    words = [f'word{index}' for index in range(5000)]
+    results = {}
+
+    with test_database():
+        user = models.User.objects.create(name='Benchmark', email='benchmark@example.com')
+        queryset = models.Note.objects.filter(user=user)
+        seeded = 0
+
+        for size in sorted(sizes):
+            seed_notes(user, size - seeded - matches, words)
+            seed_notes(user, matches, [term])
+            seeded = size
+
+            def full_text():
+                page = search_notes(queryset, term).order_by('-search_rank', 'category', '-created_at', '-id')
+                return page.count(), list(page[:10])
+
+            def scan():
+                page = queryset.filter(Q(title__icontains=term) | Q(content__icontains=term))
+                return page.count(), list(page[:10])
+
+            results[size] = {
+                'full_text': measure(full_text, number, repeat),
+                'icontains': measure(scan, number, repeat)
+            }
+
+    return results
+
+
+def build_urlconf():
+    """
+    Returns an urlconf with the read endpoints, the views
+    are built according to the current `ASYNC_VIEWS` setting.
+    """
+    from notes.viewsets.category import CategoryViewSet
+    from notes.viewsets.note import NoteViewSet
+
+    router = routers.SimpleRouter()
+    router.register('categories', CategoryViewSet, basename='categories')
+    router.register('notes', NoteViewSet, basename='notes')
+
+    urlconf = types.ModuleType('benchmark_urls')
+    urlconf.urlpatterns = [path('api/', include((router.urls, 'api')))]
+
+    return urlconf
+
+
+def summarize_load(results, elapsed):
+    """
+    Returns the load run summary from the `(latency, status)` of its requests.
+    """
+    return {
+        **summarize([latency for latency, _ in results], elapsed),
+        'errors': sum(1 for _, status in results if status != 200)
+    }
+
+
+def build_wsgi_call(headers, method='GET', body=b''):
+    """
+    Returns a function requesting an url through the WSGI
+    handler, which returns the `(latency, status)` of the request.
+    """
+    handler = WSGIHandler()
+    content_type = headers.get('Content-Type', '')
+
+    def call(url):
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': url,
+            'QUERY_STRING': '',
+            'REMOTE_ADDR': '127.0.0.1',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'CONTENT_TYPE': content_type,
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.url_scheme': 'http',
+            **{
+                'HTTP_' + name.upper().replace('-', '_'): value
+                for name, value in headers.items() if name != 'Content-Type'
+            }
+        }
+
+        start = time.perf_counter()
+        response = handler(environ, lambda status, response_headers: None)
+        b''.join(response)
+        response.close()
+
+        return time.perf_counter() - start, response.status_code
+
+    return call
+
+
+def load_wsgi(paths, headers, concurrency, method='GET', body=b''):
+    """
+    Requests the paths through the WSGI handler from a pool of threads, like a threaded server.
+    """
+    call = build_wsgi_call(headers, method, body)
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, paths))
+
+    return summarize_load(results, time.perf_counter() - start)
+
+
+def load_asgi(paths, headers, concurrency):
+    """
+    Requests the paths through the ASGI handler from concurrent tasks on an event loop.
+    """
+    handler = ASGIHandler()
+
+    async def call(url, semaphore):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': url,
+            'raw_path': url.encode('ascii'),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(name.lower().encode('ascii'), value.encode('ascii')) for name, value in headers.items()],
+            'client': ('127.0.0.1', 0),
+            'server': ('localhost', 80)
+        }
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        response = {}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+
+        async with semaphore:
+            start = time.perf_counter()
+            await handler(scope, receive, send)
+            return time.perf_counter() - start, response.get('status')
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(*[call(url, semaphore) for url in paths])
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+
+    return summarize_load(results, time.perf_counter() - start)
+
+
+@contextlib.contextmanager
+def query_latency(seconds):
+    """
+    Delays every query by the provided seconds, on every thread,
+    to simulate the network round trip to a database server.
+    """
+    def wrapper(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def add_wrapper(connection, **kwargs):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+    add_wrapper(connection)
+    connection_created.connect(add_wrapper)
+
+    try:
+        yield
+
+    finally:
+        connection_created.disconnect(add_wrapper)
+
+        for alias in connections:
+            if wrapper in connections[alias].execute_wrappers:
+                connections[alias].execute_wrappers.remove(wrapper)
+
+
+@register('asgi')
+def benchmark_asgi(number=400, repeat=1, sizes=(1000,), concurrency=16, latency=0.002, **kwargs):
+    """
+    Compares the throughput and latency of the read endpoints served by the
+    WSGI handler, by the ASGI handler with the sync views, which run on its
+    single sync thread, and by the ASGI handler with the async views. Every
+    query waits `latency` seconds, as a database server would take.
+    """
+    words = [f'word{index}' for index in range(5000)]
+    modes = [('wsgi', load_wsgi, False), ('asgi_sync', load_asgi, False), ('asgi', load_asgi, True)]
+    results = {}
+
+    with test_database():
+        user = models.User.objects.create(name='Benchmark', email='benchmark@example.com')
+        category = models.Category.objects.create(name='Benchmark', user=user)
+        seed_notes(user, max(sizes), words)
+
+        note = models.Note.objects.filter(user=user).first()
+        note.category = category
+        note.save()
+
+        token, _ = authentication_client.generate_token(user)
+        headers = {'Host': 'localhost', 'Authorization': f'Bearer {token}'}
+
+        urls = ['/api/notes/', f'/api/notes/{note.pk}/', '/api/categories/']
+        paths = [urls[index % len(urls)] for index in range(number)]
+
+        for name, load, async_views in modes:
+            with override_settings(ASYNC_VIEWS=async_views, DEBUG=False), query_latency(latency):
+                with override_settings(ROOT_URLCONF=build_urlconf()):
+                    runs = [load(paths, headers, concurrency) for _ in range(repeat)]
+
+            results[name] = {
+                'concurrency': concurrency,
+                'latency': latency,
+                **max(runs, key=lambda run: run['throughput'])
+            }
+
+    return results
+
+
+@register('connections')
+def benchmark_connections(number=500, repeat=3, concurrency=16, pool_size=4, **kwargs):
+    """
+    Compares a request that opens and closes its own SQLite connection with
+    one that takes it from the pool, then runs concurrent requests over a
+    smaller pool and reports its metrics, like the checkout wait time.
+    """
+    fd, name = tempfile.mkstemp(suffix='.sqlite')
+    os.close(fd)
+
+    def build_wrapper(engine, pool=None, alias='benchmark'):
+        settings_dict = {
+            **connection.settings_dict,
+            'ENGINE': engine,
+            'NAME': name,
+            'CONN_MAX_AGE': 0,
+            'TEST': {},
+            **({'POOL': pool} if pool else {})
+        }
+        return load_backend(engine).DatabaseWrapper(settings_dict, alias=alias)
+
+    def request(wrapper):
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+        wrapper.close()
+
+    try:
+        plain = build_wrapper('django.db.backends.sqlite3')
+        pooled = build_wrapper('commons.db.backends.sqlite3', pool={'MAX_SIZE': pool_size})
+
+        results = {
+            'connect': measure(lambda: request(plain), number, repeat),
+            'pool': measure(lambda: request(pooled), number, repeat)
+        }
+
+        options = {'MAX_SIZE': pool_size, 'PRE_PING': False}
+
+        def worker(_):
+            wrapper = build_wrapper('commons.db.backends.sqlite3', pool=options, alias='benchmark-concurrent')
+
+            for _ in range(number // concurrency):
+                with wrapper.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    # keep the connection a while, like a request would.
+                    time.sleep(0.001)
+
+                wrapper.close()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(worker, range(concurrency)))
+
+        concurrent = build_wrapper('commons.db.backends.sqlite3', pool=options, alias='benchmark-concurrent')
+        results['concurrent'] = {'concurrency': concurrency, **concurrent.pool.stats()}
+
+    finally:
+        clear_pools('benchmark')
+        clear_pools('benchmark-concurrent')
+        os.remove(name)
+
+    return results
+
+
+@register('sign_in')
+def benchmark_sign_in(number=100, repeat=1, concurrency=16, **kwargs):
+    """
+    Compares the sign-in throughput and latency under each password hashing
+    policy, with the passwords verified on the bounded hashing pool and the
+    throttling disabled. The sign-ins refused because the pool was busy are
+    counted as errors.
+    """
+    results = {}
+
+    with test_database():
+        for name, hasher in settings.PASSWORD_HASHER_CHOICES.items():
+            with override_settings(PASSWORD_HASHERS=[hasher], DEBUG=False), \
+                    mock.patch.object(TokenBucketThrottle, 'cache', None):
+                try:
+                    get_hasher('default').encode('password', 'salt')
+
+                except ValueError as e:
+                    # optional hashers without their libraries.
+                    results[name] = {'error': str(e)}
+                    continue
+
+                email = f'{name}@example.com'
+                models.User.objects.create(name=name, email=email, password='password')
+                body = json.dumps({'email': email, 'password': 'password'}).encode('utf-8')
+
+                runs = [
+                    load_wsgi(
+                        ['/api/auth/sign-in/'] * number,
+                        {'Host': 'localhost', 'Content-Type': 'application/json'},
+                        concurrency, method='POST', body=body)
+                    for _ in range(repeat)
+                ]
+
+            results[name] = {
+                'concurrency': concurrency,
+                'threads': hashing_pool.max_workers,
+                **max(runs, key=lambda run: run['throughput'])
+            }
+
+    return results
+
+
+@contextlib.contextmanager
+def flood(url, headers, concurrency, rate, body):
+    """
+    Keeps posting the body to the url at `rate` requests per second, from a
+    pool of threads, while the block runs. It yields the count of the
+    responses by status code.
+    """
+    call = build_wsgi_call(headers, method='POST', body=body)
+    stop, statuses = threading.Event(), collections.Counter()
+    interval = concurrency / rate if rate else 0
+
+    def worker():
+        next_at = time.perf_counter()
+
+        while not stop.is_set():
+            _, status = call(url)
+            statuses[status] += 1
+
+            # the requests late on the schedule are sent right away.
+            next_at += interval
+            stop.wait(max(0, next_at - time.perf_counter()))
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+
+    for thread in threads:
+        thread.start()
+
+    try:
+        yield statuses
+
+    finally:
+        stop.set()
+
+        for thread in threads:
+            thread.join()
+
+
+@register('auth_flood')
+def benchmark_auth_flood(number=300, repeat=1, size=1000, concurrency=4, flood_concurrency=16, flood_rate=200,
+                         **kwargs):
+    """
+    Measures the latency of `/api/notes/` while a flood of `flood_rate`
+    sign-ins per second with a wrong password hits the server, with the
+    throttling, with the hashing pool cap only and with neither of them,
+    where every flood request hashes a password at once, against the
+    latency without the flood.
+    """
+    scenarios = [
+        ('baseline', False, False, False),
+        ('throttled', True, True, True),
+        ('pool_only', True, False, True),
+        ('uncapped', True, False, False)
+    ]
+    results = {}
+
+    with test_database():
+        user = models.User.objects.create(name='Benchmark', email='benchmark@example.com', password='password')
+        seed_notes(user, size, [f'word{index}' for index in range(5000)])
+
+        token, _ = authentication_client.generate_token(user)
+        headers = {'Host': 'localhost', 'Authorization': f'Bearer {token}'}
+
+        body = json.dumps({'email': user.email, 'password': 'wrong'}).encode('utf-8')
+        flood_headers = {'Host': 'localhost', 'Content-Type': 'application/json'}
+
+        for name, flooded, throttled, capped in scenarios:
+            # a pool as large as the flood hashes every password at once.
+            pool = hashing_pool if capped else HashingPool(
+                max_workers=flood_concurrency, max_pending=flood_concurrency, timeout=hashing_pool.timeout)
+
+            with override_settings(DEBUG=False), \
+                    mock.patch.object(TokenBucketThrottle, 'cache', MemoryCache() if throttled else None), \
+                    mock.patch('commons.hashers.hashing_pool', pool), \
+                    flood('/api/auth/sign-in/', flood_headers, flood_concurrency if flooded else 0, flood_rate, body) as statuses:
+                runs = [load_wsgi(['/api/notes/'] * number, headers, concurrency) for _ in range(repeat)]
+
+            if not capped:
+                pool.executor.shutdown()
+
+            results[name] = {
+                'concurrency': concurrency,
+                'flood_concurrency': flood_concurrency if flooded else 0,
+                'flood_rate': flood_rate if flooded else 0,
+                'flood': {str(status): count for status, count in sorted(statuses.items())},
+                **min(runs, key=lambda run: run['p99'])
+            }
+
+    return results
+
+
+def seed_api_data(size, users, categories=5, batch_size=5000, password='password'):
+    """
+    Inserts users, with their categories, and notes spread between them with
+    Faker text, then rebuilds the note counters. Every user has `password`.
+    """
+    fake = Faker()
+    titles = [fake.sentence(nb_words=5)[:100] for _ in range(1000)]
+    contents = [fake.paragraph(nb_sentences=4) for _ in range(1000)]
+
+    # a single hash for every user, seeding must not wait on the hasher.
+    encoded = make_password(password)
+
+    models.User.objects.bulk_create([
+        models.User(name=fake.name()[:60], email=f'user{index}@example.com', password=encoded)
+        for index in range(users)
+    ], batch_size=batch_size)
+
+    user_ids = list(models.User.objects.filter(email__endswith='@example.com').values_list('pk', flat=True))
+
+    models.Category.objects.bulk_create([
+        models.Category(user_id=user_id, name=fake.word().title())
+        for user_id in user_ids for _ in range(categories)
+    ], batch_size=batch_size)
+
+    user_categories = collections.defaultdict(list)
+
+    for category_id, user_id in models.Category.objects.values_list('pk', 'user_id'):
+        user_categories[user_id].append(category_id)
+
+    created = 0
+
+    while created < size:
+        count = min(batch_size, size - created)
+        owners = random.choices(user_ids, k=count)
+
+        models.Note.objects.bulk_create([
+            models.Note(
+                user_id=user_id,
+                title=random.choice(titles),
+                content=random.choice(contents),
+                # most notes have a category and a few are archived.
+                category_id=random.choice(user_categories[user_id]) if random.random() < 0.7 else None,
+                archived=random.random() < 0.2)
+            for user_id in owners
+        ])
+
+        created += count
+
+    for user_id in user_ids:
+        recount(user_id)
+
+    return user_ids
+
+
+@contextlib.contextmanager
+def local_server():
+    """
+    Serves the project on a threaded WSGI server on a free local port, yielding its address.
+    """
+    class Server(socketserver.ThreadingMixIn, simple_server.WSGIServer):
+        daemon_threads = True
+
+    class Handler(simple_server.WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    server = simple_server.make_server('127.0.0.1', 0, WSGIHandler(), server_class=Server, handler_class=Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    try:
+        yield server.server_address
+
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextlib.contextmanager
+def count_queries():
+    """
+    Counts the queries run on every thread while the block runs, yielding the counter.
+    """
+    counter = collections.Counter()
+    lock = threading.Lock()
+
+    def wrapper(execute, sql, params, many, context):
+        with lock:
+            counter['queries'] += 1
+
+        return execute(sql, params, many, context)
+
+    def add_wrapper(connection, **kwargs):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+    connection_created.connect(add_wrapper)
+
+    try:
+        yield counter
+
+    finally:
+        connection_created.disconnect(add_wrapper)
+
+
+def drive(address, requests, concurrency):
+    """
+    Sends the `(method, path, headers, body)` requests to the server from
+    a pool of threads, returning the load summary with the query count.
+    """
+    def call(request):
+        method, url, headers, body = request
+        client = http.client.HTTPConnection(*address, timeout=60)
+
+        try:
+            start = time.perf_counter()
+            client.request(method, url, body=body, headers=headers)
+            response = client.getresponse()
+            response.read()
+
+            return time.perf_counter() - start, response.status
+
+        finally:
+            client.close()
+
+    with count_queries() as counter:
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(call, requests))
+
+        elapsed = time.perf_counter() - start
+
+    return {
+        **summarize(latencies=[latency for latency, _ in results], elapsed=elapsed),
+        'errors': sum(1 for _, status in results if status >= 400),
+        'queries_per_request': counter['queries'] / len(results)
+    }
+
+
+def drive_cached(address, requests, concurrency):
+    """
+    Drives the requests from a cold list cache, reporting its hit ratio.
+    """
+    list_cache.clear()
+    list_cache.reset_stats()
+
+    result = drive(address, requests, concurrency)
+    stats = list_cache.stats()
+
+    if stats.get('hits') or stats.get('misses'):
+        result['list_cache_hit_ratio'] = stats['ratio']
+
+    return result
+
+
+def build_api_requests(user_ids, number, password='password', sample=100):
+    """
+    Returns the requests of each scenario, spread between a sample of the users.
+    """
+    sample = random.sample(user_ids, min(sample, len(user_ids)))
+    emails = dict(models.User.objects.filter(pk__in=sample).values_list('pk', 'email'))
+    clients = []
+
+    for user_id in sample:
+        user = models.User(pk=user_id, email=emails[user_id])
+        token, _ = authentication_client.generate_token(user)
+        categories = list(models.Category.objects.filter(user_id=user_id).values_list('pk', flat=True))
+        active = list(models.Note.objects.filter(user_id=user_id, archived=False).values_list('pk', flat=True))
+        clients.append((emails[user_id], {'Authorization': f'Bearer {token}'}, categories, active))
+
+    json_headers = {'Content-Type': 'application/json'}
+    scenarios = collections.defaultdict(list)
+    archived = set()
+
+    for index in range(number):
+        email, headers, categories, active = clients[index % len(clients)]
+        category = random.choice(categories)
+        note = random.choice(active)
+
+        scenarios['sign_in'].append(('POST', '/api/auth/sign-in/', json_headers, json.dumps({
+            'email': email, 'password': password})))
+        scenarios['list'].append(('GET', '/api/notes/', headers, None))
+        scenarios['filtered_list'].append(('GET', f'/api/notes/?archived=false&category={category}', headers, None))
+        scenarios['create'].append(('POST', '/api/notes/', {**headers, **json_headers}, json.dumps({
+            'title': f'Load test note {index}', 'content': 'Created by the load test.', 'category': category})))
+        scenarios['update'].append(('PATCH', f'/api/notes/{note}/', {**headers, **json_headers}, json.dumps({
+            'title': f'Updated note {index}'})))
+
+        # a note can only be archived once.
+        unarchived = [pk for pk in active if pk not in archived]
+
+        if unarchived:
+            archived.add(unarchived[0])
+            scenarios['archive'].append(('PUT', f'/api/notes/{unarchived[0]}/archive/', headers, None))
+
+    return scenarios
+
+
+@register('api')
+def benchmark_api(number=200, repeat=1, sizes=(1000, 100000, 1000000), concurrency=8, **kwargs):
+    """
+    Seeds users, categories and notes with Faker text for each size, a
+    user per hundred notes up to a thousand users, then drives sign-in,
+    list, filtered list, create, update and archive requests against a
+    local server. Each scenario reports its throughput, its latency
+    percentiles, the failed requests and the queries per request.
+    """
+    results = {}
+    directory = tempfile.mkdtemp()
+
+    for size in sorted(sizes):
+        # the concurrent writes would lock the tables of a memory database.
+        name = os.path.join(directory, f'api-{size}.sqlite') if connection.vendor == 'sqlite' else None
+
+        with test_database(name=name), \
+                override_settings(DEBUG=False), \
+                mock.patch.object(TokenBucketThrottle, 'cache', None):
+            start = time.perf_counter()
+            user_ids = seed_api_data(size, users=min(1000, max(10, size // 100)))
+            seed_time = time.perf_counter() - start
+
+            scenarios = build_api_requests(user_ids, number)
+
+            result = results[str(size)] = {
+                'users': len(user_ids),
+                'seed_seconds': seed_time,
+                'concurrency': concurrency
+            }
+
+            with local_server() as address:
+                for scenario, requests in scenarios.items():
+                    runs = [drive_cached(address, requests, concurrency) for _ in range(repeat)]
+                    result[scenario] = min(runs, key=lambda run: run['p95'])
+
+    shutil.rmtree(directory, ignore_errors=True)
+
+    return results
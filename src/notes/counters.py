@@ -0,0 +1,92 @@
+from collections import defaultdict
+
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from notes import models
+
+
+class NoteCounterDelta:
+    """
+    Accumulates the counter changes of note transitions, so a batch
+    of notes updates every counter with a single query.
+
+    The note states are `(archived, category_id)` tuples, and `None`
+    stands for a note that doesn't exist (before a create or after a delete).
+    """
+
+    def __init__(self):
+        self.users = defaultdict(lambda: [0, 0])
+        self.categories = defaultdict(lambda: [0, 0])
+
+    def add(self, user_id, before, after):
+        """
+        Adds a note transition from a state to another.
+        """
+        if before == after:
+            return
+
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None:
+                continue
+
+            archived, category_id = state
+
+            counters = self.users[user_id]
+            counters[0] += sign
+            counters[1] += sign * bool(archived)
+
+            if category_id is not None:
+                counters = self.categories[category_id]
+                counters[0] += sign
+                counters[1] += sign * bool(archived)
+
+    def apply(self, create=True):
+        """
+        Applies the accumulated changes to the counters, see `NoteCounter.increment`.
+        """
+        for user_id, (total, archived) in self.users.items():
+            models.NoteCounter.increment(user_id, total=total, archived=archived, create=create)
+
+        for category_id, (total, archived) in self.categories.items():
+            if not total and not archived:
+                continue
+
+            models.Category.objects.filter(pk=category_id).update(
+                notes_count=F('notes_count') + total,
+                archived_notes_count=F('archived_notes_count') + archived)
+
+        self.users.clear()
+        self.categories.clear()
+
+
+def update_note_counters(notes, before=None):
+    """
+    Updates the counters after saving the notes, `before` are
+    their states prior to the change, missing for new notes.
+    """
+    delta = NoteCounterDelta()
+    before = before or [None] * len(notes)
+
+    for note, state in zip(notes, before):
+        delta.add(note.user_id, state, note.get_counted_state())
+        note.counted_state = note.get_counted_state()
+
+    delta.apply()
+
+
+def recount(user_id):
+    """
+    Rebuilds the note counters of a user and its categories from the notes table.
+    """
+    counts = models.Note.objects \
+        .filter(category_id=OuterRef('pk')) \
+        .order_by() \
+        .values('category_id')
+
+    models.Category.objects.filter(user_id=user_id).update(
+        notes_count=Coalesce(Subquery(counts.annotate(c=Count('pk')).values('c')), 0),
+        archived_notes_count=Coalesce(Subquery(
+            counts.annotate(c=Count('pk', filter=Q(archived=True))).values('c')), 0))
+
+    return models.NoteCounter.recount(user_id)
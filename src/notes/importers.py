@@ -0,0 +1,131 @@
+from django.db import transaction
+from django.utils.translation import ugettext as _
+from rest_framework import serializers
+
+from commons.viewsets import list_cache
+from notes import models
+from notes.counters import update_note_counters
+
+
+class NoteImportSerializer(serializers.Serializer):  # noqa
+    title = serializers.CharField(max_length=100)
+    content = serializers.CharField(allow_null=True, allow_blank=True, required=False)
+    category = serializers.CharField(max_length=40, allow_null=True, allow_blank=True, required=False)
+    archived = serializers.BooleanField(required=False, default=False)
+
+    def to_internal_value(self, data):
+        # empty csv columns are handled as missing values.
+        data = {key: value for key, value in data.items() if value != ''}
+
+        # accepts the same representations produced by the export.
+        if isinstance(data.get('category'), dict):
+            data['category'] = data['category'].get('name')
+
+        elif 'category_name' in data:
+            data.setdefault('category', data['category_name'])
+
+        return super().to_internal_value(data)
+
+
+class NoteImporter:
+    """
+    Inserts the notes read from an import file in batches, creating
+    the missing categories by name. Invalid rows are reported without
+    aborting the import and every batch is committed on its own.
+    """
+    serializer_class = NoteImportSerializer
+
+    # max number of row errors kept on the summary.
+    max_errors = 100
+
+    def __init__(self, user, batch_size=1000):
+        self.user = user
+        self.batch_size = batch_size
+        self.categories = None
+        self.summary = {'inserted': 0, 'skipped': 0, 'failed': 0, 'errors': []}
+
+    def get_category(self, name):
+        """
+        Returns the user category with the provided name, creating it when missing.
+        """
+        if not name:
+            return None
+
+        if self.categories is None:
+            self.categories = {obj.name: obj for obj in models.Category.objects.filter(user=self.user)}
+
+        if name not in self.categories:
+            self.categories[name] = models.Category.objects.create(name=name, user=self.user)
+
+        return self.categories[name]
+
+    def fail(self, line, errors):
+        """
+        Records a row that could not be imported.
+        """
+        self.summary['failed'] += 1
+
+        if len(self.summary['errors']) < self.max_errors:
+            self.summary['errors'].append({'line': line, 'errors': errors})
+
+    def flush(self, batch):
+        """
+        Inserts a batch of notes.
+        """
+        if not batch:
+            return
+
+        with transaction.atomic():
+            models.Note.objects.bulk_create(batch)
+            update_note_counters(batch)
+            # the bulk inserts send no save signals.
+            list_cache.invalidate(self.user.pk)
+
+        self.summary['inserted'] += len(batch)
+        batch.clear()
+
+    def build(self, data):
+        """
+        Returns the note for a validated row.
+        """
+        return models.Note(
+            user=self.user,
+            title=data['title'],
+            content=data.get('content') or None,
+            category=self.get_category(data.get('category')),
+            archived=data['archived'])
+
+    def run(self, rows):
+        """
+        Imports the `(line, row)` pairs, rows are dicts, `None` for
+        the skipped ones or the exception raised when decoding them.
+        """
+        batch = []
+
+        for line, row in rows:
+            if row is None:
+                self.summary['skipped'] += 1
+                continue
+
+            if isinstance(row, Exception):
+                self.fail(line, {'non_field_errors': [str(row)]})
+                continue
+
+            if not isinstance(row, dict):
+                self.fail(line, {'non_field_errors': [_('Expected an object.')]})
+                continue
+
+            serializer = self.serializer_class(data=row)
+
+            if not serializer.is_valid():
+                self.fail(line, serializer.errors)
+                continue
+
+            batch.append(self.build(serializer.validated_data))
+
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+
+        self.flush(batch)
+
+        return self.summary
@@ -0,0 +1,63 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from commons.benchmark import compare, registry
+from notes import benchmarks  # noqa
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs the project benchmarks and prints the results, the micro-benchmark timings '
+        'are in microseconds and the load latencies in milliseconds.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names', nargs='*', metavar='name',
+            help='Benchmarks to run, all of them when omitted: %s.' % ', '.join(sorted(registry)))
+        parser.add_argument('--number', type=int, help='Calls per repetition, each benchmark has its own default.')
+        parser.add_argument('--repeat', type=int, help='Number of repetitions, each benchmark has its own default.')
+        parser.add_argument(
+            '--size', type=int, action='append', dest='sizes',
+            help='Data size used by the benchmarks that seed data, can be repeated.')
+        parser.add_argument('--concurrency', type=int, help='Concurrent clients of the load benchmarks.')
+        parser.add_argument('--output', help='Saves the results as JSON to this file.')
+        parser.add_argument(
+            '--baseline',
+            help='Compares the results with the ones saved on this file, failing on regressions.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.1,
+            help='Relative change allowed before a result counts as a regression, 0.1 by default.')
+
+    def handle(self, *args, **options):
+        names = options['names'] or sorted(registry)
+        unknown = set(names) - set(registry)
+
+        if unknown:
+            raise CommandError('Unknown benchmarks: %s.' % ', '.join(sorted(unknown)))
+
+        kwargs = {
+            key: options[key] for key in ['number', 'repeat', 'sizes', 'concurrency'] if options[key] is not None
+        }
+        results = {}
+
+        for name in names:
+            results[name] = registry[name](**kwargs)
+
+        self.stdout.write(json.dumps(results, indent=2))
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(results, file, indent=2)
+
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                baseline = json.load(file)
+
+            regressions = compare(results, baseline, options['tolerance'])
+
+            for path, previous, current, change in regressions:
+                self.stderr.write(f'{path}: {previous:.4g} -> {current:.4g} ({change:+.1%})')
+
+            if regressions:
+                raise CommandError('%d results regressed over the baseline.' % len(regressions))
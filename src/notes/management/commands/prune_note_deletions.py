@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from notes import models
+from notes.sync import NoteChanges
+
+
+class Command(BaseCommand):
+    help = 'Removes the tombstones of deleted notes and categories older than the sync retention.'
+
+    def handle(self, *args, **options):
+        limit = timezone.now() - NoteChanges.retention
+        notes, _ = models.NoteDeletion.objects.filter(deleted_at__lt=limit).delete()
+        categories, _ = models.CategoryDeletion.objects.filter(deleted_at__lt=limit).delete()
+
+        self.stdout.write(self.style.SUCCESS(f'{notes} note deletions and {categories} category deletions removed.'))
@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from notes.counters import recount
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the materialized note counters from the notes table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users', help='Only recount this user id.')
+
+    def handle(self, *args, **options):
+        users = options['users'] or get_user_model().objects.values_list('pk', flat=True).iterator()
+
+        for user_id in users:
+            with transaction.atomic():
+                recount(user_id)
+
+        self.stdout.write(self.style.SUCCESS('Note counters rebuilt.'))
@@ -0,0 +1,27 @@
+# Generated by Django 3.1.2 on 2026-10-18 00:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_auto_20201022_1619'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='note',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notes', to='notes.category', verbose_name='Category'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['user', 'archived', 'category', '-created_at'], name='note_user_archived_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['user', 'category', '-created_at'], name='note_user_category_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 3.1.2 on 2026-10-18 00:23
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+import django.db.models.deletion
+
+
+def build_counters(apps, schema_editor):
+    User = apps.get_model('notes', 'User')
+    Category = apps.get_model('notes', 'Category')
+    Note = apps.get_model('notes', 'Note')
+    NoteCounter = apps.get_model('notes', 'NoteCounter')
+
+    archived = Count('pk', filter=Q(archived=True))
+
+    users = {
+        row['user_id']: row for row in Note.objects.order_by()
+        .values('user_id').annotate(total=Count('pk'), archived=archived)
+    }
+
+    NoteCounter.objects.bulk_create([
+        NoteCounter(
+            user_id=user_id,
+            total=users.get(user_id, {}).get('total', 0),
+            archived=users.get(user_id, {}).get('archived', 0))
+        for user_id in User.objects.values_list('pk', flat=True)
+    ])
+
+    for row in Note.objects.order_by().exclude(category=None) \
+            .values('category_id').annotate(total=Count('pk'), archived=archived):
+        Category.objects.filter(pk=row['category_id']).update(
+            notes_count=row['total'], archived_notes_count=row['archived'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_note_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='note_counter', serialize=False, to='notes.user', verbose_name='User')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total')),
+                ('archived', models.PositiveIntegerField(default=0, verbose_name='Archived')),
+            ],
+            options={
+                'verbose_name': 'Note Counter',
+                'verbose_name_plural': 'Note Counters',
+            },
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='archived_notes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Archived Notes Count'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='notes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Notes Count'),
+        ),
+        migrations.RunPython(build_counters, migrations.RunPython.noop),
+    ]
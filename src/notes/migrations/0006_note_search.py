@@ -0,0 +1,74 @@
+from django.db import migrations
+
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        title, content, content='notes_note', content_rowid='id', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_insert AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_delete AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_update AFTER UPDATE OF title, content ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO notes_note_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS notes_note_fts_update',
+    'DROP TRIGGER IF EXISTS notes_note_fts_delete',
+    'DROP TRIGGER IF EXISTS notes_note_fts_insert',
+    'DROP TABLE IF EXISTS notes_note_fts',
+]
+
+# generated columns require PostgreSQL 12 or newer.
+POSTGRESQL_FORWARD = [
+    """
+    ALTER TABLE notes_note ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX notes_note_search_idx ON notes_note USING GIN (search_vector)',
+]
+
+POSTGRESQL_BACKWARD = [
+    'DROP INDEX IF EXISTS notes_note_search_idx',
+    'ALTER TABLE notes_note DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def run(statements):
+    """
+    Returns a migration function running the statements of the current database vendor.
+    """
+    def migrate(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+
+    return migrate
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0005_note_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD}),
+            run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRESQL_BACKWARD})),
+    ]
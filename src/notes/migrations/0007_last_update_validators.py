@@ -0,0 +1,22 @@
+# Generated by Django 3.1.2 on 2026-10-18 00:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0006_note_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='last_update',
+            field=models.DateTimeField(auto_now=True, verbose_name='Last Update'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['user', 'last_update'], name='note_user_updated_idx'),
+        ),
+    ]
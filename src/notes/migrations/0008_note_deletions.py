@@ -0,0 +1,32 @@
+# Generated by Django 3.1.2 on 2026-10-18 00:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0007_last_update_validators'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteDeletion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('note_id', models.PositiveIntegerField(verbose_name='Note')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Deleted At')),
+                ('user', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='notes.user', verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Note Deletion',
+                'verbose_name_plural': 'Note Deletions',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notedeletion',
+            index=models.Index(fields=['user', 'deleted_at'], name='note_deletion_user_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.1.2 on 2026-10-18 01:17
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0008_note_deletions'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='note',
+            options={'ordering': ('category_id', '-created_at'), 'verbose_name': 'Note', 'verbose_name_plural': 'Notes'},
+        ),
+    ]
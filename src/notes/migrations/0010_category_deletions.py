@@ -0,0 +1,40 @@
+# Generated by Django 3.1.2 on 2026-10-18 01:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0009_note_list_ordering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryDeletion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category_id', models.PositiveIntegerField(verbose_name='Category')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Deleted At')),
+            ],
+            options={
+                'verbose_name': 'Category Deletion',
+                'verbose_name_plural': 'Category Deletions',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['user', 'last_update'], name='category_user_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='categorydeletion',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='notes.user', verbose_name='User'),
+        ),
+        migrations.AddIndex(
+            model_name='categorydeletion',
+            index=models.Index(fields=['user', 'deleted_at'], name='category_deletion_user_idx'),
+        ),
+    ]
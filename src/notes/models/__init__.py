@@ -1,3 +1,5 @@
 from notes.models.category import Category
+from notes.models.counter import NoteCounter
+from notes.models.deletion import CategoryDeletion, NoteDeletion
 from notes.models.note import Note
 from notes.models.user import User
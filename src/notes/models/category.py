@@ -13,10 +13,34 @@ class Category(models.Model):
         verbose_name=_('User'),
         on_delete=models.CASCADE)
 
+    last_update = models.DateTimeField(
+        _('Last Update'), auto_now=True)
+
+    # materialized counters maintained by `notes.counters`.
+    notes_count = models.PositiveIntegerField(
+        _('Notes Count'), default=0, editable=False)
+
+    archived_notes_count = models.PositiveIntegerField(
+        _('Archived Notes Count'), default=0, editable=False)
+
     class Meta:
         verbose_name = _('Category')
         verbose_name_plural = _('Categories')
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['user', 'last_update'], name='category_user_updated_idx'),
+        ]
 
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # counters are only written by `notes.counters`, so
+            # saving an outdated instance does not overwrite them.
+            kwargs['update_fields'] = [
+                field.name for field in getattr(self, '_meta').concrete_fields
+                if not field.primary_key and field.name not in ('notes_count', 'archived_notes_count')
+            ]
+
+        super().save(*args, **kwargs)
@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Q
+from django.utils.translation import ugettext_lazy as _
+
+
+class NoteCounter(models.Model):
+    """
+    Materialized note counters of a user, maintained incrementally
+    to avoid `COUNT(*)` scans over the user notes.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        primary_key=True,
+        related_name='note_counter',
+        verbose_name=_('User'),
+        on_delete=models.CASCADE)
+
+    total = models.PositiveIntegerField(
+        _('Total'), default=0)
+
+    archived = models.PositiveIntegerField(
+        _('Archived'), default=0)
+
+    class Meta:
+        verbose_name = _('Note Counter')
+        verbose_name_plural = _('Note Counters')
+
+    def __str__(self):
+        return f'{self.total} ({self.archived})'
+
+    @classmethod
+    def recount(cls, user_id):
+        """
+        Rebuilds the user counters from the notes table.
+        """
+        from notes.models.note import Note
+
+        counts = Note.objects.filter(user_id=user_id).order_by().aggregate(
+            total=Count('pk'), archived=Count('pk', filter=Q(archived=True)))
+
+        counter, _ = cls.objects.update_or_create(user_id=user_id, defaults=counts)
+        return counter
+
+    @classmethod
+    def get_for_user(cls, user_id):
+        """
+        Returns the user counters, building them when missing.
+        """
+        counter = cls.objects.filter(user_id=user_id).first()
+        return counter if counter is not None else cls.recount(user_id)
+
+    @classmethod
+    def increment(cls, user_id, total=0, archived=0, create=True):
+        """
+        Atomically applies the deltas to the user counters, missing
+        counters are built from the notes table unless `create` is false.
+        """
+        if not total and not archived:
+            return
+
+        updated = cls.objects.filter(user_id=user_id).update(
+            total=F('total') + total, archived=F('archived') + archived)
+
+        if updated or not create:
+            return
+
+        try:
+            # the counters did not exist yet, the recount
+            # already considers the changes made to the notes.
+            with transaction.atomic():
+                cls.recount(user_id)
+
+        except IntegrityError:
+            # created concurrently, so it's safe to increment it.
+            cls.increment(user_id, total=total, archived=archived)
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+
+class NoteDeletion(models.Model):
+    """
+    Tombstone of a deleted note, kept for a while so the
+    incremental sync can tell clients which notes are gone.
+    """
+    note_id = models.PositiveIntegerField(
+        _('Note'))
+
+    # the tombstones are recorded while the user notes are being
+    # deleted in cascade, so the user deletion removes them later.
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='+',
+        verbose_name=_('User'),
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False)
+
+    deleted_at = models.DateTimeField(
+        _('Deleted At'), auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = _('Note Deletion')
+        verbose_name_plural = _('Note Deletions')
+        ordering = ('id',)
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='note_deletion_user_idx'),
+        ]
+
+    def __str__(self):
+        return str(self.note_id)
+
+
+class CategoryDeletion(models.Model):
+    """
+    Tombstone of a deleted category, kept like the `NoteDeletion` ones.
+    """
+    category_id = models.PositiveIntegerField(
+        _('Category'))
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='+',
+        verbose_name=_('User'),
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False)
+
+    deleted_at = models.DateTimeField(
+        _('Deleted At'), auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = _('Category Deletion')
+        verbose_name_plural = _('Category Deletions')
+        ordering = ('id',)
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='category_deletion_user_idx'),
+        ]
+
+    def __str__(self):
+        return str(self.category_id)
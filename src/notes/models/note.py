@@ -35,7 +35,38 @@ class Note(models.Model):
     class Meta:
         verbose_name = _('Note')
         verbose_name_plural = _('Notes')
-        ordering = ('category', '-created_at')
+        # by the category id, not by its name, so the indexes serve the lists.
+        ordering = ('category_id', '-created_at')
+        indexes = [
+            models.Index(
+                fields=['user', 'archived', 'category', '-created_at'],
+                name='note_user_archived_idx'),
+            models.Index(
+                fields=['user', 'category', '-created_at'],
+                name='note_user_category_idx'),
+            models.Index(
+                fields=['user', 'last_update'],
+                name='note_user_updated_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+
+        # keep the loaded state, so the counters can be
+        # updated on save without querying it again.
+        instance.counted_state = instance.get_counted_state()
+
+        return instance
+
+    def get_counted_state(self):
+        """
+        Returns the state used by the note counters, or `None` when it's not loaded.
+        """
+        if 'archived' not in self.__dict__ or 'category_id' not in self.__dict__:
+            return None
+
+        return self.archived, self.category_id
@@ -0,0 +1,58 @@
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+
+def get_terms(text):
+    """
+    Returns the words of a search text, dropping the
+    characters with special meaning on the search syntaxes.
+    """
+    return re.findall(r'\w+', text or '')
+
+
+def search_notes(queryset, text):
+    """
+    Filters the notes matching the search text and selects
+    their `search_rank`, where higher means more relevant. It uses the
+    full-text index of the database (SQLite FTS5 or PostgreSQL GIN)
+    and every word matches as a prefix.
+    """
+    terms = get_terms(text)
+
+    if not terms:
+        return queryset.extra(select={'search_rank': '0'}).none()
+
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'sqlite':
+        query = ' '.join(f'"{term}"*' for term in terms)
+
+        # the matches are looked up on the index first, then every match
+        # is ranked by its rowid, title matches weight twice the content ones.
+        return queryset.extra(
+            select={'search_rank': (
+                'SELECT -bm25(notes_note_fts, 2.0, 1.0) FROM notes_note_fts '
+                'WHERE notes_note_fts MATCH %s AND notes_note_fts.rowid = notes_note.id'
+            )},
+            select_params=[query],
+            where=['notes_note.id IN (SELECT rowid FROM notes_note_fts WHERE notes_note_fts MATCH %s)'],
+            params=[query])
+
+    if vendor == 'postgresql':
+        query = ' & '.join(f'{term}:*' for term in terms)
+
+        return queryset.extra(
+            select={'search_rank': "ts_rank(notes_note.search_vector, to_tsquery('simple', %s))"},
+            select_params=[query],
+            where=["notes_note.search_vector @@ to_tsquery('simple', %s)"],
+            params=[query])
+
+    # databases without full-text index fall back to a scan.
+    condition = Q()
+
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(content__icontains=term)
+
+    return queryset.filter(condition).extra(select={'search_rank': '0'})
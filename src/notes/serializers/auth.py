@@ -2,6 +2,7 @@ from django.contrib.auth.password_validation import validate_password
 from django.utils.translation import ugettext_lazy as _
 from rest_framework import serializers
 
+from commons.hashers import make_password
 from notes import models
 
 
@@ -32,7 +33,14 @@ class SignUpSerializer(serializers.ModelSerializer):
         return validated_data
 
     def create(self, validated_data):
-        return models.User.objects.create(**validated_data)
+        password = validated_data.pop('password')
+        instance = models.User(**validated_data)
+
+        # hashed on the bounded pool, like the sign-in passwords.
+        instance.password = make_password(password)
+        instance.save()
+
+        return instance
 
 
 class SignInSerializer(serializers.Serializer):  # noqa
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 
+from commons.serializers import RowSerializer
 from notes import models
 
 
@@ -15,3 +16,16 @@ class CategorySerializer(serializers.ModelSerializer):
             **validated_data,
             'user_id': request.user.pk
         })
+
+
+class CategoryRowSerializer(RowSerializer):
+    """
+    Fast read only version of `CategorySerializer`.
+    """
+    fields = ['id', 'name']
+
+    def to_representation(self, row):
+        return {
+            'id': row['id'],
+            'name': row['name']
+        }
@@ -0,0 +1,104 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models
+from rest_framework import serializers
+
+
+class UserRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key related field restricted to the objects owned by
+    the request user. When the objects were prefetched by a list
+    serializer, they are taken from the context instead of the database.
+    """
+
+    def get_queryset(self):
+        request = self.context.get('request')
+        return super().get_queryset().filter(user_id=request.user.pk)
+
+    def get_loaded(self, data):
+        """
+        Returns the related object already loaded on the instance being
+        updated when it's the same provided, so it's not queried again.
+        """
+        instance = getattr(self.parent, 'instance', None)
+
+        if not isinstance(instance, models.Model) or isinstance(data, bool):
+            return None
+
+        field = getattr(instance, '_meta').get_field(self.source)
+
+        try:
+            if not field.is_cached(instance) or getattr(instance, field.attname) != int(data):
+                return None
+
+        except (TypeError, ValueError):
+            return None
+
+        return getattr(instance, self.source)
+
+    def get_prefetched(self):
+        """
+        Returns the objects prefetched for this field, if any.
+        """
+        return self.context.get('prefetched', {}).get(self.field_name)
+
+    def prefetch(self, values):
+        """
+        Loads the objects for all the provided primary keys with a single query.
+        """
+        pks = set()
+
+        for value in values:
+            try:
+                pks.add(int(value))
+
+            except (TypeError, ValueError):
+                # invalid values are reported by the field validation.
+                continue
+
+        objects = self.get_queryset().order_by().in_bulk(pks) if pks else {}
+        self.context.setdefault('prefetched', {})[self.field_name] = objects
+
+        return objects
+
+    def to_internal_value(self, data):
+        loaded = self.get_loaded(data)
+
+        if loaded is not None:
+            return loaded
+
+        prefetched = self.get_prefetched()
+
+        if prefetched is None:
+            return super().to_internal_value(data)
+
+        try:
+            if isinstance(data, bool):
+                raise TypeError
+
+            return prefetched[int(data)]
+
+        except (KeyError, ObjectDoesNotExist):
+            self.fail('does_not_exist', pk_value=data)
+
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class PrefetchListSerializer(serializers.ListSerializer):
+    """
+    List serializer that loads the related objects of every item
+    with a single query per field before validating them.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            for field in self.child.fields.values():
+                if not isinstance(field, UserRelatedField) or field.read_only:
+                    continue
+
+                field.prefetch([
+                    item[field.field_name] for item in data
+                    if isinstance(item, dict) and item.get(field.field_name) is not None
+                ])
+
+        return super().to_internal_value(data)
@@ -1,11 +1,15 @@
 from rest_framework import serializers
 
+from commons.serializers import DateTimeField, RowSerializer
 from notes import models
 from notes.serializers.category import CategorySerializer
+from notes.serializers.fields import PrefetchListSerializer, UserRelatedField
 
 
 class NoteResultSerializer(serializers.ModelSerializer):
     category = CategorySerializer(many=False)
+    created_at = DateTimeField(read_only=True)
+    last_update = DateTimeField(read_only=True)
 
     class Meta:
         model = models.Note
@@ -15,10 +19,38 @@ class NoteResultSerializer(serializers.ModelSerializer):
         ]
 
 
+class NoteRowSerializer(RowSerializer):
+    """
+    Fast read only version of `NoteResultSerializer`.
+    """
+    fields = [
+        'id', 'title', 'content', 'category_id', 'category__name', 'archived',
+        'created_at', 'last_update'
+    ]
+
+    def to_representation(self, row):
+        category_id = row['category_id']
+
+        return {
+            'id': row['id'],
+            'title': row['title'],
+            'content': row['content'],
+            'category': None if category_id is None else {
+                'id': category_id,
+                'name': row['category__name']
+            },
+            'archived': row['archived'],
+            'created_at': self.format_datetime(row['created_at']),
+            'last_update': self.format_datetime(row['last_update'])
+        }
+
+
 class NoteCommandSerializer(serializers.ModelSerializer):
+    serializer_related_field = UserRelatedField
 
     class Meta:
         model = models.Note
+        list_serializer_class = PrefetchListSerializer
         fields = [
             'id', 'title', 'content', 'category'
         ]
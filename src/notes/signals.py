@@ -0,0 +1,126 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from commons.auth import authentication_client
+from commons.viewsets import list_cache
+from notes import models
+from notes.counters import NoteCounterDelta
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def remember_user_identity(sender, instance, update_fields=None, **kwargs):
+    """
+    Keeps the stored identity of a user before saving, so the
+    cache entry can be removed even when the identity changes.
+    """
+    field = authentication_client.identity_field
+
+    if instance.pk is None or (update_fields is not None and field not in update_fields):
+        return
+
+    instance._cached_identity = sender.objects \
+        .filter(pk=instance.pk) \
+        .values_list(field, flat=True) \
+        .first()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """
+    Removes the user from the authentication cache
+    whenever it's saved, deactivated or deleted.
+    """
+    authentication_client.invalidate(
+        getattr(instance, authentication_client.identity_field),
+        getattr(instance, '_cached_identity', None)
+    )
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def delete_note_deletions(sender, instance, **kwargs):
+    """
+    Removes the tombstones of a deleted user, including the
+    ones recorded while deleting its notes in cascade.
+    """
+    models.NoteDeletion.objects.filter(user_id=instance.pk).delete()
+    models.CategoryDeletion.objects.filter(user_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_note_counter(sender, instance, created, **kwargs):
+    """
+    Starts the note counters of new users.
+    """
+    if created:
+        models.NoteCounter.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=models.Note)
+def remember_note_state(sender, instance, **kwargs):
+    """
+    Keeps the note state before saving to update the counters.
+    """
+    if instance._state.adding:
+        instance.counted_state = None
+        return
+
+    if getattr(instance, 'counted_state', None) is None:
+        instance.counted_state = sender.objects \
+            .filter(pk=instance.pk) \
+            .values_list('archived', 'category_id') \
+            .first()
+
+
+@receiver(post_save, sender=models.Note)
+def update_note_counters(sender, instance, **kwargs):
+    """
+    Updates the counters when a note is created, archived or moved to another category.
+    """
+    delta = NoteCounterDelta()
+    delta.add(instance.user_id, instance.counted_state, instance.get_counted_state())
+    delta.apply()
+
+    instance.counted_state = instance.get_counted_state()
+
+
+@receiver(post_delete, sender=models.Note)
+def discount_deleted_note(sender, instance, **kwargs):
+    """
+    Updates the counters when a note is deleted.
+    """
+    delta = NoteCounterDelta()
+    delta.add(instance.user_id, getattr(instance, 'counted_state', None) or instance.get_counted_state(), None)
+
+    # the counters are never rebuilt here, since the notes of a deleted
+    # user are removed in a batch before this signal and along its counters.
+    delta.apply(create=False)
+
+
+@receiver(post_delete, sender=models.Note)
+def record_note_deletion(sender, instance, **kwargs):
+    """
+    Keeps a tombstone of the deleted note for the incremental sync.
+    """
+    models.NoteDeletion.objects.create(note_id=instance.pk, user_id=instance.user_id)
+
+
+@receiver(post_delete, sender=models.Category)
+def record_category_deletion(sender, instance, **kwargs):
+    """
+    Keeps a tombstone of the deleted category for the incremental sync.
+    """
+    models.CategoryDeletion.objects.create(category_id=instance.pk, user_id=instance.user_id)
+
+
+@receiver(post_save, sender=models.Note)
+@receiver(post_delete, sender=models.Note)
+@receiver(post_save, sender=models.Category)
+@receiver(post_delete, sender=models.Category)
+def invalidate_user_lists(sender, instance, using=None, **kwargs):
+    """
+    Outdates the cached lists of the user whenever one of its notes or
+    categories changes, the category names are shown by the notes lists.
+    """
+    list_cache.invalidate(instance.user_id, using=using)
@@ -0,0 +1,236 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from notes import models
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+def parse_timestamp(value):
+    """
+    Returns the datetime of a token timestamp, raising `ValueError` when it's malformed.
+    """
+    timestamp = parse_datetime(value)
+
+    if timestamp is None:
+        raise ValueError(value)
+
+    return timestamp
+
+
+def encode_feed(state):
+    """
+    Returns the JSON state of a `ChangeFeed`, the versions the
+    client already has are sent as offsets from the position.
+    """
+    position, horizon, seen = state
+
+    if position is None:
+        return [None, None, []]
+
+    offset = datetime.timedelta(microseconds=1)
+
+    return [
+        [position[0].isoformat(), position[1]],
+        None if horizon is None else horizon.isoformat(),
+        [[pk, (updated - position[0]) // offset] for pk, updated in seen]
+    ]
+
+
+def decode_feed(value):
+    """
+    Returns the state of a `ChangeFeed` from its JSON state.
+    """
+    position, horizon, seen = value
+
+    if position is None:
+        return None, None, frozenset()
+
+    position = (parse_timestamp(position[0]), int(position[1]))
+    horizon = None if horizon is None else parse_timestamp(horizon)
+    seen = frozenset(
+        (int(pk), position[0] + datetime.timedelta(microseconds=int(offset))) for pk, offset in seen)
+
+    return position, horizon, seen
+
+
+def encode_token(state):
+    """
+    Returns the opaque token of a sync state.
+    """
+    data = json.dumps(state, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii')
+
+
+def decode_token(token):
+    """
+    Returns the sync state of a token, raising `InvalidToken` when it's malformed.
+    """
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+
+        return {
+            **{key: decode_feed(state[key]) for key in NoteChanges.feeds},
+            't': int(state['t'])
+        }
+
+    except (TypeError, ValueError, KeyError, IndexError, AttributeError, binascii.Error):
+        raise InvalidToken(token)
+
+
+class ChangeFeed:
+    """
+    Walks the rows of a queryset changed after a position, sorted by
+    `(field, id)`, at most `limit` rows at once.
+
+    The timestamps are taken before the transactions commit, so a row may
+    show up after the ones with later timestamps were read. Once the client
+    is up to date its position goes back to `overlap` before the sync, so
+    the rows committed late are read on the next one. The rows it already
+    has on that window, up to `dedupe_size`, are skipped by their version.
+    """
+
+    def __init__(self, queryset, field, fields, limit, overlap, dedupe_size):
+        self.queryset = queryset
+        self.field = field
+        self.fields = fields
+        self.limit = limit
+        self.overlap = overlap
+        self.dedupe_size = dedupe_size
+
+    def get_queryset(self, position):
+        """
+        Returns the queryset of the rows after position, in the feed order.
+        """
+        queryset = self.queryset
+
+        if position is not None:
+            updated, pk = position
+            queryset = queryset.filter(Q(**{f'{self.field}__gt': updated}) | Q(**{self.field: updated, 'id__gt': pk}))
+
+        return queryset.order_by(self.field, 'id')
+
+    def read(self, state, now, values=None):
+        """
+        Returns the rows changed after the feed state, whether there are
+        more of them and the state to continue from. The rows are fetched
+        with `values(queryset)` when provided, they must include the ids
+        and the feed field.
+        """
+        position, horizon, seen = state
+        field = self.field
+
+        queryset = self.get_queryset(position)
+        queryset = values(queryset) if values else queryset.values(*self.fields)
+
+        # the rows the client has are skipped after fetching them.
+        rows = [row for row in queryset[:self.limit + 1 + len(seen)] if (row['id'], row[field]) not in seen]
+
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+
+        if horizon is None:
+            # the transactions running by the first read are waited for until the last one.
+            horizon = now - self.overlap
+
+        if rows:
+            position = (rows[-1][field], rows[-1]['id'])
+
+        seen = seen.union((row['id'], row[field]) for row in rows)
+
+        if not has_more:
+            if position is not None and position > (horizon, 0):
+                position = (horizon, 0)
+
+            horizon = None
+
+        seen = sorted(
+            ((pk, updated) for pk, updated in seen if position is not None and (updated, pk) > position),
+            key=lambda version: (version[1], version[0]))
+
+        return rows, has_more, (position, horizon, frozenset(seen[-self.dedupe_size:]))
+
+
+class NoteChanges:
+    """
+    Collects the notes and categories created, updated or deleted after a
+    sync token, each of them walked by a `ChangeFeed`, so each sync only
+    reads the rows changed since the last one.
+
+    The deleted notes and categories are walked by their tombstones. Tokens
+    older than the tombstones retention cannot tell every deleted note
+    anymore, so they restart the sync from scratch.
+    """
+    retention = datetime.timedelta(days=getattr(settings, 'NOTES_DELETIONS_RETENTION_DAYS', 30))
+    overlap = datetime.timedelta(seconds=getattr(settings, 'NOTES_CHANGES_OVERLAP_SECONDS', 30))
+    dedupe_size = getattr(settings, 'NOTES_CHANGES_DEDUPE_SIZE', 50)
+
+    # token keys of the notes, the note tombstones, the categories and the category tombstones.
+    feeds = ('n', 'd', 'c', 'x')
+
+    def __init__(self, user_id, limit=500):
+        self.user_id = user_id
+        self.limit = limit
+
+    def get_feed(self, model, field, fields):
+        return ChangeFeed(
+            model.objects.filter(user_id=self.user_id), field, fields,
+            limit=self.limit, overlap=self.overlap, dedupe_size=self.dedupe_size)
+
+    def get_initial_state(self, now):
+        """
+        Returns the state of a full sync, the tombstones up to the overlap
+        are skipped since the client does not know any note yet.
+        """
+        deletions = ((now - self.overlap, 0), None, frozenset())
+        empty = (None, None, frozenset())
+
+        return {'n': empty, 'd': deletions, 'c': empty, 'x': deletions}
+
+    def run(self, token=None, values=None):
+        """
+        Returns the changes after the token, the notes are fetched
+        with `values(queryset)` when provided, so they can be serialized
+        from rows. The result has a new token to continue from.
+        """
+        now = timezone.now()
+        state = decode_token(token) if token else None
+        reset = state is not None and now.timestamp() - state['t'] > self.retention.total_seconds()
+
+        if state is None or reset:
+            state = self.get_initial_state(now)
+
+        notes, notes_more, state['n'] = self.get_feed(
+            models.Note, 'last_update', ()).read(state['n'], now, values=values)
+
+        deletions, deletions_more, state['d'] = self.get_feed(
+            models.NoteDeletion, 'deleted_at', ('id', 'note_id', 'deleted_at')).read(state['d'], now)
+
+        # the names of the categories are part of the notes representation.
+        categories, categories_more, state['c'] = self.get_feed(
+            models.Category, 'last_update', ('id', 'name', 'last_update')).read(state['c'], now)
+
+        category_deletions, category_deletions_more, state['x'] = self.get_feed(
+            models.CategoryDeletion, 'deleted_at', ('id', 'category_id', 'deleted_at')).read(state['x'], now)
+
+        return {
+            'notes': notes,
+            'deleted': [row['note_id'] for row in deletions],
+            'categories': categories,
+            'deleted_categories': [row['category_id'] for row in category_deletions],
+            'has_more': notes_more or deletions_more or categories_more or category_deletions_more,
+            'reset': reset,
+            'token': encode_token({
+                **{key: encode_feed(state[key]) for key in self.feeds},
+                't': int(now.timestamp())
+            })
+        }
@@ -0,0 +1,34 @@
+# json schemas of the api representations.
+
+CATEGORY_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'id': {'type': 'integer'},
+        'name': {'type': 'string'}
+    },
+    'required': ['id', 'name'],
+    'additionalProperties': False
+}
+
+NOTE_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'id': {'type': 'integer'},
+        'title': {'type': 'string'},
+        'content': {'type': ['string', 'null']},
+        'category': {
+            'type': ['object', 'null'],
+            'properties': {
+                'id': {'type': 'integer'},
+                'name': {'type': 'string'}
+            },
+            'required': ['id', 'name'],
+            'additionalProperties': False
+        },
+        'archived': {'type': 'boolean'},
+        'created_at': {'type': 'string'},
+        'last_update': {'type': 'string'}
+    },
+    'required': ['id', 'title', 'content', 'category', 'archived', 'created_at', 'last_update'],
+    'additionalProperties': False
+}
@@ -0,0 +1,211 @@
+import time
+from unittest import mock
+
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework import status
+
+from commons.asgi import authenticate_cached
+from commons.auth import JwtAuthentication, authentication_client
+from commons.cache import MemoryCache
+from commons.hashers import hashing_pool
+from commons.tests import APITestCase, AuthenticatedAPITestCase
+from notes import models
+from notes.viewsets.note import NoteViewSet
+
+
+class AuthTests(APITestCase):
+    password = 'Zq8!vkT_mw2x'
+
+    token_schema = {
+        'type': 'object',
+        'properties': {
+            'user': {
+                'type': 'object',
+                'properties': {
+                    'id': {'type': 'integer'},
+                    'name': {'type': 'string'},
+                    'email': {'type': 'string'}
+                },
+                'required': ['id', 'name', 'email']
+            },
+            'token': {'type': 'string'},
+            'token_expiration_date': {'type': 'string'}
+        },
+        'required': ['user', 'token', 'token_expiration_date'],
+        'additionalProperties': False
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.user = models.User.objects.create(
+            name=self.faker.name(), email=self.faker.email(), password=self.password)
+
+    def test_sign_up(self):
+        email = self.faker.email()
+
+        response = self.client.post(reverse('api:auth-sign-up'), data={
+            'name': self.faker.name(),
+            'email': email,
+            'password': self.password,
+            'password_confirm': self.password
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertSchema(self.token_schema, response.data)
+        self.assertEqual(response.data['user']['email'], email)
+        self.assertTrue(models.User.objects.get(email=email).check_password(self.password))
+
+    def test_sign_up_hashes_on_the_pool(self):
+        with mock.patch.object(hashing_pool, 'run', wraps=hashing_pool.run) as run:
+            response = self.client.post(reverse('api:auth-sign-up'), data={
+                'name': self.faker.name(),
+                'email': self.faker.email(),
+                'password': self.password,
+                'password_confirm': self.password
+            }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(run.call_count, 1)
+
+    def test_create_user_hashes_in_place(self):
+        with mock.patch.object(hashing_pool, 'run') as run:
+            user = models.User.objects.create(name=self.faker.name(), email=self.faker.email(), password=self.password)
+
+        run.assert_not_called()
+        self.assertTrue(user.check_password(self.password))
+
+    def test_sign_up_with_different_passwords(self):
+        response = self.client.post(reverse('api:auth-sign-up'), data={
+            'name': self.faker.name(),
+            'email': self.faker.email(),
+            'password': self.password,
+            'password_confirm': f'{self.password}!'
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('password', response.data)
+
+    def test_sign_up_with_existing_email(self):
+        response = self.client.post(reverse('api:auth-sign-up'), data={
+            'name': self.faker.name(),
+            'email': self.user.email,
+            'password': self.password,
+            'password_confirm': self.password
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', response.data)
+
+    def test_sign_in(self):
+        response = self.client.post(reverse('api:auth-sign-in'), data={
+            'email': self.user.email,
+            'password': self.password
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertSchema(self.token_schema, response.data)
+        self.assertEqual(response.data['user']['id'], self.user.pk)
+
+    def test_sign_in_with_invalid_credentials(self):
+        response = self.client.post(reverse('api:auth-sign-in'), data={
+            'email': self.user.email,
+            'password': f'{self.password}!'
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', response.data)
+
+    def test_sign_in_inactive_user(self):
+        models.User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        response = self.client.post(reverse('api:auth-sign-in'), data={
+            'email': self.user.email,
+            'password': self.password
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AuthenticationTests(AuthenticatedAPITestCase):
+
+    def test_authenticated_request(self):
+        response = self.client.get(reverse('api:categories-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_unauthenticated_request(self):
+        self.unauthenticated()
+
+        response = self.client.get(reverse('api:categories-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token(self):
+        self.set_token('invalid')
+
+        response = self.client.get(reverse('api:categories-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user(self):
+        self.assertEqual(self.client.get(reverse('api:notes-stats')).status_code, status.HTTP_200_OK)
+
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(reverse('api:notes-stats'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_deactivated_without_signals(self):
+        if not isinstance(authentication_client.cache, MemoryCache):
+            self.skipTest('The users are not cached on the process memory.')
+
+        self.assertEqual(self.client.get(reverse('api:notes-stats')).status_code, status.HTTP_200_OK)
+
+        models.User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        # the cached user is used until it expires.
+        self.assertEqual(self.client.get(reverse('api:notes-stats')).status_code, status.HTTP_200_OK)
+
+        expired = time.monotonic() + authentication_client.cache.timeout + 1
+
+        with mock.patch('commons.cache.time.monotonic', return_value=expired):
+            response = self.client.get(reverse('api:notes-stats'))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_of_deleted_user(self):
+        models.User.objects.filter(pk=self.user.pk).delete()
+
+        response = self.client.get(reverse('api:notes-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class CachedAuthenticationTests(AuthenticatedAPITestCase):
+    """
+    The async views authenticate the requests on the event loop first,
+    the view authentication reuses the result instead of verifying again.
+    """
+
+    def authenticate_request(self, token):
+        request = RequestFactory().get('/api/notes/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        authenticate_cached(NoteViewSet.as_view({'get': 'list'}), request)
+
+        return JwtAuthentication().authenticate(request)
+
+    def test_cached_user(self):
+        # the first request caches the user.
+        self.client.get(reverse('api:notes-stats'))
+
+        with mock.patch.object(authentication_client, 'get_object') as get_object:
+            authenticated = self.authenticate_request(self.user_token)
+
+        get_object.assert_not_called()
+        self.assertEqual(authenticated[0].pk, self.user.pk)
+
+    def test_invalid_token_is_verified_once(self):
+        jwt = authentication_client.jwt
+
+        with mock.patch.object(jwt, 'decode', wraps=jwt.decode) as decode:
+            authenticated = self.authenticate_request('invalid')
+
+        self.assertIsNone(authenticated)
+        self.assertEqual(decode.call_count, 1)
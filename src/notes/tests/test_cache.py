@@ -0,0 +1,27 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from commons.cache import ResponseCache
+
+
+class ResponseCacheTests(SimpleTestCase):
+    shared_caches = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp/lists'},
+    }
+
+    def test_disabled(self):
+        self.assertFalse(ResponseCache({'BACKEND': ''}).enabled)
+        self.assertFalse(ResponseCache(None).enabled)
+
+    def test_process_cache(self):
+        with self.assertRaises(ImproperlyConfigured):
+            ResponseCache({'BACKEND': 'commons.cache.MemoryCache'})
+
+        with self.settings(CACHES=self.shared_caches), self.assertRaises(ImproperlyConfigured):
+            ResponseCache({'BACKEND': 'commons.cache.DjangoCache'})
+
+    def test_shared_cache(self):
+        with self.settings(CACHES=self.shared_caches):
+            cache = ResponseCache({'BACKEND': 'commons.cache.DjangoCache', 'OPTIONS': {'alias': 'shared'}})
+            self.assertTrue(cache.enabled)
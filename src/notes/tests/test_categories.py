@@ -0,0 +1,99 @@
+from django.urls import reverse
+from mixer.backend.django import mixer
+from rest_framework import status
+
+from commons.tests import AuthenticatedAPITestCase
+from notes import models
+from notes.tests.schemas import CATEGORY_SCHEMA
+
+
+class CategoryTests(AuthenticatedAPITestCase):
+
+    def test_list(self):
+        categories = mixer.cycle(3).blend(models.Category, user=self.user)
+        mixer.blend(models.Category)
+
+        response = self.client.get(reverse('api:categories-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertPaginatedSchema(CATEGORY_SCHEMA, response.data)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            [obj.pk for obj in sorted(categories, key=lambda obj: (obj.name, obj.pk))])
+
+    def test_list_with_cursor(self):
+        mixer.cycle(12).blend(models.Category, user=self.user)
+
+        response = self.client.get(reverse('api:categories-list'), data={'pagination': 'cursor'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCursorPaginatedSchema(CATEGORY_SCHEMA, response.data)
+        self.assertEqual(len(response.data['results']), 10)
+
+        response = self.client.get(response.data['next'])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_create(self):
+        response = self.client.post(reverse('api:categories-list'), data={'name': 'Work'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertSchema(CATEGORY_SCHEMA, response.data)
+        self.assertTrue(models.Category.objects.filter(pk=response.data['id'], user=self.user).exists())
+
+    def test_retrieve(self):
+        category = mixer.blend(models.Category, user=self.user)
+
+        response = self.client.get(reverse('api:categories-detail', args=[category.pk]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'id': category.pk, 'name': category.name})
+
+    def test_retrieve_category_of_another_user(self):
+        category = mixer.blend(models.Category)
+
+        response = self.client.get(reverse('api:categories-detail', args=[category.pk]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_update(self):
+        category = mixer.blend(models.Category, user=self.user)
+
+        response = self.client.put(
+            reverse('api:categories-detail', args=[category.pk]), data={'name': 'Renamed'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['name'], 'Renamed')
+
+        category.refresh_from_db()
+        self.assertEqual(category.name, 'Renamed')
+
+    def test_partial_update(self):
+        category = mixer.blend(models.Category, user=self.user)
+
+        response = self.client.patch(
+            reverse('api:categories-detail', args=[category.pk]), data={'name': 'Renamed'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['name'], 'Renamed')
+
+    def test_delete(self):
+        category = mixer.blend(models.Category, user=self.user)
+
+        response = self.client.delete(reverse('api:categories-detail', args=[category.pk]))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(models.Category.objects.filter(pk=category.pk).exists())
+
+    def test_list_is_updated_after_changes(self):
+        category = mixer.blend(models.Category, user=self.user, name='Before')
+
+        response = self.client.get(reverse('api:categories-list'))
+        self.assertEqual(response.data['results'][0]['name'], 'Before')
+
+        self.client.patch(
+            reverse('api:categories-detail', args=[category.pk]), data={'name': 'After'}, format='json')
+
+        response = self.client.get(reverse('api:categories-list'))
+        self.assertEqual(response.data['results'][0]['name'], 'After')
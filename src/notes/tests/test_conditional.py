@@ -0,0 +1,127 @@
+import datetime
+
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework import status
+
+from commons.tests import AuthenticatedAPITestCase
+from commons.viewsets import list_cache
+from notes import models
+
+
+class NoteConditionalTests(AuthenticatedAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.notes = [
+            models.Note.objects.create(title=self.faker.sentence(nb_words=3), user=self.user)
+            for _ in range(3)
+        ]
+
+    def test_detail_not_modified(self):
+        url = reverse('api:notes-detail', args=[self.notes[0].pk])
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_modified_within_the_same_second(self):
+        url = reverse('api:notes-detail', args=[self.notes[0].pk])
+        notes = models.Note.objects.filter(pk=self.notes[0].pk)
+        second = self.notes[0].last_update.replace(microsecond=0)
+
+        notes.update(last_update=second + datetime.timedelta(milliseconds=100))
+        response = self.client.get(url)
+
+        notes.update(title='Updated', last_update=second + datetime.timedelta(milliseconds=600))
+        self.assertEqual(self.client.get(url)['Last-Modified'], response['Last-Modified'])
+
+        # the date cannot tell the versions apart, only the etag is used.
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], 'Updated')
+
+    def test_detail_modified(self):
+        url = reverse('api:notes-detail', args=[self.notes[0].pk])
+        etag = self.client.get(url)['ETag']
+
+        self.client.patch(url, data={'title': 'Updated'}, format='json')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], 'Updated')
+
+    def test_detail_precondition_failed(self):
+        url = reverse('api:notes-detail', args=[self.notes[0].pk])
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.patch(url, data={'title': 'First'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # the etag was outdated by the previous write.
+        response = self.client.patch(url, data={'title': 'Second'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+        response = self.client.delete(url, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+        response = self.client.patch(
+            url, data={'title': 'Second'}, format='json',
+            HTTP_IF_UNMODIFIED_SINCE=http_date(self.notes[0].last_update.timestamp() - 60))
+
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(models.Note.objects.get(pk=self.notes[0].pk).title, 'First')
+
+    def test_list_not_modified(self):
+        url = reverse('api:notes-list')
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('Last-Modified'))
+
+        # served by the lists cache, then by the database.
+        for _ in range(2):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+                             status.HTTP_304_NOT_MODIFIED)
+
+            list_cache.clear()
+
+    def test_list_modified_by_delete(self):
+        url = reverse('api:notes-list')
+        etag = self.client.get(url)['ETag']
+
+        # not the latest note, so the latest change of the list is kept.
+        self.client.delete(reverse('api:notes-detail', args=[self.notes[0].pk]))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_modified_by_update(self):
+        url = reverse('api:notes-list')
+        etag = self.client.get(url)['ETag']
+
+        self.client.patch(reverse('api:notes-detail', args=[self.notes[0].pk]), data={'title': 'Updated'}, format='json')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_precondition_failed(self):
+        url = reverse('api:notes-list')
+        etag = self.client.get(url)['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_MATCH=etag).status_code, status.HTTP_200_OK)
+
+        self.client.delete(reverse('api:notes-detail', args=[self.notes[0].pk]))
+
+        response = self.client.get(url, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
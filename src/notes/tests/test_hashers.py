@@ -0,0 +1,163 @@
+from concurrent.futures import Future
+from unittest import mock
+
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+
+from commons import hashers
+from commons.hashers import HashingPoolFull, ScryptPasswordHasher, hashing_pool, rehash_password
+from commons.tests import APITestCase
+from notes import models
+
+# a low work factor, the hashes are as valid but faster.
+SCRYPT_PARAMS = {'work_factor': 2 ** 4, 'block_size': 8, 'parallelism': 1}
+
+SCRYPT_HASHERS = ['commons.hashers.ScryptPasswordHasher', 'django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+def run_now(func, *args, **kwargs):
+    """
+    Runs a call submitted to the hashing pool right away, on the test thread.
+    """
+    future = Future()
+    future.set_result(func(*args, **kwargs))
+
+    return future
+
+
+def refuse_rehashes(func, *args, **kwargs):
+    """
+    Runs the calls submitted to the hashing pool right away, but the rehashes, refused as if it was full.
+    """
+    if func is hashers.rehash_password:
+        raise HashingPoolFull(wait=1)
+
+    return run_now(func, *args, **kwargs)
+
+
+class ScryptPasswordHasherTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.multiple(ScryptPasswordHasher, **SCRYPT_PARAMS)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.hasher = ScryptPasswordHasher()
+
+    def test_encode(self):
+        encoded = self.hasher.encode('password', 'salt')
+
+        self.assertTrue(encoded.startswith('scrypt$16$salt$8$1$'))
+        self.assertEqual(self.hasher.encode('password', 'salt'), encoded)
+        self.assertNotEqual(self.hasher.encode('password', 'other'), encoded)
+        self.assertEqual(self.hasher.decode(encoded)['n'], 16)
+
+    def test_verify(self):
+        encoded = self.hasher.encode('password', self.hasher.salt())
+
+        self.assertTrue(self.hasher.verify('password', encoded))
+        self.assertFalse(self.hasher.verify('Password', encoded))
+
+    def test_verify_other_parameters(self):
+        # the parameters of the hash are used, not the current ones.
+        encoded = self.hasher.encode('password', 'salt', n=2 ** 5, r=4, p=2)
+
+        self.assertTrue(self.hasher.verify('password', encoded))
+        self.assertFalse(self.hasher.verify('other', encoded))
+
+    def test_must_update(self):
+        self.assertFalse(self.hasher.must_update(self.hasher.encode('password', 'salt')))
+
+        for params in ({'n': 2 ** 5}, {'r': 4}, {'p': 2}):
+            self.assertTrue(self.hasher.must_update(self.hasher.encode('password', 'salt', **params)))
+
+    def test_safe_summary(self):
+        summary = self.hasher.safe_summary(self.hasher.encode('password', 'saltsaltsalt'))
+
+        self.assertEqual(summary['algorithm'], 'scrypt')
+        self.assertEqual(summary['work factor'], 16)
+        self.assertNotIn('saltsaltsalt', summary.values())
+
+    def test_django_hashers(self):
+        with self.settings(PASSWORD_HASHERS=SCRYPT_HASHERS):
+            encoded = make_password('password')
+
+            self.assertEqual(identify_hasher(encoded).algorithm, 'scrypt')
+            self.assertTrue(check_password('password', encoded))
+
+
+class RehashTests(APITestCase):
+    password = 'Zq8!vkT_mw2x'
+
+    def setUp(self):
+        super().setUp()
+
+        # hashed by the test hasher, outdated once scrypt is preferred.
+        self.user = models.User.objects.create(
+            name=self.faker.name(), email=self.faker.email(), password=self.password)
+
+        patchers = [
+            mock.patch.multiple(ScryptPasswordHasher, **SCRYPT_PARAMS),
+            # the rehashes run on the test thread, which keeps its database connection.
+            mock.patch.object(hashing_pool, 'submit', side_effect=run_now),
+            mock.patch('commons.hashers.close_old_connections'),
+            mock.patch('commons.hashers.rehash_password', wraps=rehash_password)
+        ]
+
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.rehash = hashers.rehash_password
+
+    def sign_in(self, password=None):
+        with self.settings(PASSWORD_HASHERS=SCRYPT_HASHERS):
+            return self.client.post(reverse('api:auth-sign-in'), data={
+                'email': self.user.email,
+                'password': password or self.password
+            }, format='json')
+
+    def get_password(self):
+        return models.User.objects.values_list('password', flat=True).get(pk=self.user.pk)
+
+    def test_rehash_on_sign_in(self):
+        encoded = self.get_password()
+
+        self.assertEqual(self.sign_in().status_code, status.HTTP_200_OK)
+
+        self.rehash.assert_called_once_with(models.User, self.user.pk, self.password, encoded)
+        self.assertTrue(self.get_password().startswith('scrypt$16$'))
+
+        # the new hash is used from now on, without hashing it again.
+        self.rehash.reset_mock()
+        self.assertEqual(self.sign_in().status_code, status.HTTP_200_OK)
+
+        self.rehash.assert_not_called()
+
+    def test_no_rehash_on_invalid_password(self):
+        encoded = self.get_password()
+
+        self.assertEqual(self.sign_in('wrong password').status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.rehash.assert_not_called()
+        self.assertEqual(self.get_password(), encoded)
+
+    def test_rehash_refused(self):
+        encoded = self.get_password()
+
+        # the sign-in goes on, the password is rehashed on another one.
+        with mock.patch.object(hashing_pool, 'submit', side_effect=refuse_rehashes):
+            self.assertEqual(self.sign_in().status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.get_password(), encoded)
+
+    def test_password_changed_meanwhile(self):
+        self.user.set_password('new password')
+        self.user.save()
+
+        with self.settings(PASSWORD_HASHERS=SCRYPT_HASHERS):
+            self.rehash(models.User, self.user.pk, self.password, 'outdated hash')
+
+        self.assertEqual(self.get_password(), self.user.password)
@@ -0,0 +1,46 @@
+from django.urls import reverse
+from mixer.backend.django import mixer
+from rest_framework import status
+
+from commons.tests import AuthenticatedAPITestCase
+from notes import models
+
+
+class NoteListIndexesTests(AuthenticatedAPITestCase):
+    """
+    The notes lists are filtered and sorted by the composite indexes,
+    without scanning the notes table or sorting it on temporary b-trees.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.category = mixer.blend(models.Category, user=self.user)
+
+        for archived in (False, True):
+            for category in (None, self.category):
+                models.Note.objects.create(
+                    title=self.faker.sentence(nb_words=3), user=self.user,
+                    category=category, archived=archived)
+
+    def get_notes_queries(self, **params):
+        with self.assertIndexedQueries() as context:
+            response = self.client.get(reverse('api:notes-list'), data=params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # the user, the counters and the validators queries are checked as well.
+        return [query['sql'] for query in context.captured_queries if 'FROM "notes_note"' in query['sql']]
+
+    def test_list(self):
+        self.assertTrue(self.get_notes_queries())
+
+    def test_list_by_archived(self):
+        self.assertTrue(self.get_notes_queries(archived='true'))
+        self.assertTrue(self.get_notes_queries(archived='false'))
+
+    def test_list_by_category(self):
+        self.assertTrue(self.get_notes_queries(category=self.category.pk))
+
+    def test_list_by_archived_and_category(self):
+        self.assertTrue(self.get_notes_queries(archived='false', category=self.category.pk))
@@ -0,0 +1,72 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.serializers import BaseSerializer
+
+from commons.instrumentation import InstrumentationMiddleware, current_timings
+from commons.tests import AuthenticatedAPITestCase
+from commons.viewsets import list_cache
+from notes import models
+from notes.viewsets.note import NoteViewSet
+
+
+class InstrumentationTests(AuthenticatedAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.note = models.Note.objects.create(title=self.faker.sentence(nb_words=3), user=self.user)
+
+        patcher = mock.patch.object(InstrumentationMiddleware, 'server_timing', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_timings(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {metric.split(';')[0] for metric in response['Server-Timing'].split(', ')}
+
+    def test_list_serialization(self):
+        for rows in (True, False):
+            list_cache.clear()
+
+            with mock.patch.object(NoteViewSet, 'use_row_serializer', rows):
+                timings = self.get_timings(self.client.get(reverse('api:notes-list')))
+
+            self.assertIn('serialize', timings)
+            self.assertIn('db', timings)
+
+    def test_detail_serialization(self):
+        timings = self.get_timings(self.client.get(reverse('api:notes-detail', args=[self.note.pk])))
+        self.assertIn('serialize', timings)
+
+    def test_serializers_are_not_patched(self):
+        self.assertFalse(getattr(BaseSerializer.data.fget, 'timed', False))
+
+    def test_timings_reset_on_errors(self):
+        middleware = InstrumentationMiddleware(mock.Mock(side_effect=RuntimeError))
+
+        with self.assertRaises(RuntimeError):
+            middleware(RequestFactory().get('/api/notes/'))
+
+        self.assertIsNone(current_timings.get())
+
+        middleware = InstrumentationMiddleware(lambda request: HttpResponse())
+        self.assertTrue(middleware(RequestFactory().get('/api/notes/')).has_header('Server-Timing'))
+
+    def test_async_timings_reset_on_errors(self):
+        async def get_response(request):
+            raise RuntimeError
+
+        middleware = InstrumentationMiddleware(get_response)
+
+        async def run():
+            with self.assertRaises(RuntimeError):
+                await middleware(RequestFactory().get('/api/notes/'))
+
+            # read on the same context as the middleware.
+            return current_timings.get()
+
+        self.assertIsNone(async_to_sync(run)())
@@ -0,0 +1,58 @@
+import sqlite3
+import tempfile
+
+from django.test import SimpleTestCase
+
+from commons.db.pool import ConnectionPool
+from commons.metrics import FileStore, Gauge, Registry, default_registry
+
+
+class GaugeTests(SimpleTestCase):
+
+    def test_set(self):
+        registry = Registry()
+        gauge = Gauge('connections', 'Connections.', ['state'], registry=registry)
+
+        gauge.set(3, state='active')
+        gauge.set(1, state='active')
+
+        self.assertIn('# TYPE connections gauge', registry.generate())
+        self.assertIn('connections{state="active"} 1.0', registry.generate())
+
+    def test_processes_are_summed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            registry = Registry(directory)
+            gauge = Gauge('connections', 'Connections.', registry=registry)
+            gauge.set(2)
+
+            # the store of another process.
+            other = FileStore(f'{directory}/metrics_0.db')
+            other.set(gauge.get_keys({}), 3)
+            other.close()
+
+            self.assertIn('connections 5.0', registry.generate())
+            registry.store.close()
+
+
+class PoolMetricsTests(SimpleTestCase):
+
+    def get_metrics(self):
+        return default_registry.generate().splitlines()
+
+    def test_connections_and_wait(self):
+        pool = ConnectionPool(max_size=1, name='tests:metrics')
+        conn = pool.checkout(lambda: sqlite3.connect(':memory:'))
+
+        metrics = self.get_metrics()
+        self.assertIn('db_pool_connections{pool="tests:metrics",state="active"} 1.0', metrics)
+        self.assertIn('db_pool_connections{pool="tests:metrics",state="idle"} 0.0', metrics)
+        self.assertIn('db_pool_checkout_wait_seconds_count{pool="tests:metrics"} 1.0', metrics)
+
+        pool.release(conn)
+
+        metrics = self.get_metrics()
+        self.assertIn('db_pool_connections{pool="tests:metrics",state="active"} 0.0', metrics)
+        self.assertIn('db_pool_connections{pool="tests:metrics",state="idle"} 1.0', metrics)
+
+        pool.clear()
+        self.assertIn('db_pool_connections{pool="tests:metrics",state="idle"} 0.0', self.get_metrics())
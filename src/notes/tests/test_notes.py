@@ -0,0 +1,363 @@
+import base64
+import csv
+import io
+import json
+
+from django.urls import reverse
+from mixer.backend.django import mixer
+from rest_framework import status
+
+from commons.tests import AuthenticatedAPITestCase
+from notes import models
+from notes.tests.schemas import NOTE_SCHEMA
+
+
+class NoteTests(AuthenticatedAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.category = mixer.blend(models.Category, user=self.user)
+
+    def create_notes(self, count, **kwargs):
+        return [
+            models.Note.objects.create(**{'title': self.faker.sentence(nb_words=3), 'user': self.user, **kwargs})
+            for _ in range(count)
+        ]
+
+    def test_list(self):
+        notes = self.create_notes(3, category=self.category)
+        mixer.blend(models.Note)
+
+        response = self.client.get(reverse('api:notes-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertPaginatedSchema(NOTE_SCHEMA, response.data)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([item['id'] for item in response.data['results']], [obj.pk for obj in reversed(notes)])
+
+    def test_list_by_archived(self):
+        self.create_notes(2)
+        archived = self.create_notes(1, archived=True)
+
+        response = self.client.get(reverse('api:notes-list'), data={'archived': 'true'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['id'], archived[0].pk)
+
+        response = self.client.get(reverse('api:notes-list'), data={'archived': 'false'})
+        self.assertEqual(response.data['count'], 2)
+
+    def test_list_by_category(self):
+        notes = self.create_notes(2, category=self.category)
+        self.create_notes(1)
+
+        response = self.client.get(reverse('api:notes-list'), data={'category': self.category.pk})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual({item['id'] for item in response.data['results']}, {obj.pk for obj in notes})
+
+    def test_list_with_invalid_filters(self):
+        self.create_notes(2)
+
+        response = self.client.get(reverse('api:notes-list'), data={'category': 'invalid'})
+        self.assertEqual(response.data['count'], 0)
+
+        response = self.client.get(reverse('api:notes-list'), data={'archived': 'invalid'})
+        self.assertEqual(response.data['count'], 0)
+
+    def test_list_with_cursor(self):
+        self.create_notes(12, category=self.category)
+
+        response = self.client.get(reverse('api:notes-list'), data={'pagination': 'cursor'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCursorPaginatedSchema(NOTE_SCHEMA, response.data)
+        self.assertEqual(len(response.data['results']), 10)
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_list_with_tampered_cursor(self):
+        self.create_notes(2, category=self.category)
+
+        positions = [
+            [{'id': 1}, '2020-01-01T00:00:00+00:00', 1],
+            [self.category.pk, 'yesterday', 1],
+            [self.category.pk, '2020-01-01T00:00:00+00:00', [1]],
+            [self.category.pk, '2020-01-01T00:00:00+00:00'],
+            'invalid'
+        ]
+
+        for position in positions:
+            cursor = base64.urlsafe_b64encode(json.dumps({'p': position}).encode('utf-8')).decode('ascii')
+            response = self.client.get(reverse('api:notes-list'), data={'cursor': cursor})
+
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, position)
+
+        response = self.client.get(reverse('api:notes-list'), data={'cursor': 'invalid'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_search_with_cursor(self):
+        response = self.client.get(reverse('api:notes-list'), data={'search': 'apples', 'pagination': 'cursor'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('search', response.data)
+
+    def test_search(self):
+        note = models.Note.objects.create(title='Groceries list', content='Buy apples', user=self.user)
+        self.create_notes(2)
+
+        response = self.client.get(reverse('api:notes-list'), data={'search': 'apples'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['results']], [note.pk])
+
+    def test_create(self):
+        response = self.client.post(reverse('api:notes-list'), data={
+            'title': 'Title',
+            'content': 'Content',
+            'category': self.category.pk
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertSchema(NOTE_SCHEMA, response.data)
+        self.assertEqual(response.data['category'], {'id': self.category.pk, 'name': self.category.name})
+        self.assertTrue(models.Note.objects.filter(pk=response.data['id'], user=self.user).exists())
+
+    def test_create_with_category_of_another_user(self):
+        category = mixer.blend(models.Category)
+
+        response = self.client.post(reverse('api:notes-list'), data={
+            'title': 'Title',
+            'category': category.pk
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('category', response.data)
+
+    def test_retrieve(self):
+        note, = self.create_notes(1, category=self.category)
+
+        response = self.client.get(reverse('api:notes-detail', args=[note.pk]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertSchema(NOTE_SCHEMA, response.data)
+        self.assertEqual(response.data['id'], note.pk)
+
+    def test_retrieve_note_of_another_user(self):
+        note = mixer.blend(models.Note)
+
+        response = self.client.get(reverse('api:notes-detail', args=[note.pk]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_update(self):
+        note, = self.create_notes(1)
+
+        response = self.client.put(reverse('api:notes-detail', args=[note.pk]), data={
+            'title': 'Updated',
+            'content': 'Updated',
+            'category': self.category.pk
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertSchema(NOTE_SCHEMA, response.data)
+
+        note.refresh_from_db()
+        self.assertEqual((note.title, note.category_id), ('Updated', self.category.pk))
+
+    def test_partial_update(self):
+        note, = self.create_notes(1, category=self.category)
+
+        response = self.client.patch(
+            reverse('api:notes-detail', args=[note.pk]), data={'title': 'Updated'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], 'Updated')
+        self.assertEqual(response.data['category']['id'], self.category.pk)
+
+    def test_delete(self):
+        note, = self.create_notes(1)
+
+        response = self.client.delete(reverse('api:notes-detail', args=[note.pk]))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(models.Note.objects.filter(pk=note.pk).exists())
+
+    def test_archive(self):
+        note, = self.create_notes(1)
+
+        response = self.client.put(reverse('api:notes-archive', args=[note.pk]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['archived'])
+
+        response = self.client.put(reverse('api:notes-archive', args=[note.pk]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create(self):
+        response = self.client.post(reverse('api:notes-bulk'), data=[
+            {'title': 'First', 'category': self.category.pk},
+            {'title': 'Second'}
+        ], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['title'] for item in response.data], ['First', 'Second'])
+        self.assertEqual(models.Note.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_create_with_invalid_item(self):
+        response = self.client.post(reverse('api:notes-bulk'), data=[
+            {'title': 'First'},
+            {'title': ''}
+        ], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(models.Note.objects.filter(user=self.user).exists())
+
+    def test_bulk_update(self):
+        notes = self.create_notes(2)
+
+        response = self.client.put(reverse('api:notes-bulk'), data=[
+            {'id': notes[0].pk, 'title': 'First', 'category': self.category.pk},
+            {'id': notes[1].pk, 'title': 'Second'}
+        ], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['title'] for item in response.data], ['First', 'Second'])
+        self.assertEqual(models.Note.objects.get(pk=notes[0].pk).category_id, self.category.pk)
+
+    def test_bulk_partial_update(self):
+        notes = self.create_notes(2, category=self.category)
+
+        response = self.client.patch(reverse('api:notes-bulk'), data=[
+            {'id': note.pk, 'title': 'Updated'} for note in notes
+        ], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(models.Note.objects.filter(user=self.user).values_list('title', 'category_id')),
+            {('Updated', self.category.pk)})
+
+    def test_bulk_update_note_of_another_user(self):
+        note = mixer.blend(models.Note)
+
+        response = self.client.patch(
+            reverse('api:notes-bulk'), data=[{'id': note.pk, 'title': 'Updated'}], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', response.data[0])
+        self.assertEqual(models.Note.objects.get(pk=note.pk).title, note.title)
+
+    def test_bulk_update_with_invalid_ids(self):
+        note = self.create_notes(1)[0]
+
+        response = self.client.put(reverse('api:notes-bulk'), data=[
+            {'id': [note.pk], 'title': 'First'},
+            {'id': True, 'title': 'Second'},
+            {'id': str(note.pk), 'title': 'Third'},
+            {'title': 'Fourth'}
+        ], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([set(error) for error in response.data], [{'id'}] * 4)
+        self.assertEqual(models.Note.objects.get(pk=note.pk).title, note.title)
+
+    def test_bulk_archive(self):
+        notes = self.create_notes(2)
+
+        response = self.client.put(reverse('api:notes-bulk-archive'), data=[note.pk for note in notes], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(models.Note.objects.filter(user=self.user, archived=True).count(), 2)
+
+    def test_bulk_archive_with_invalid_ids(self):
+        note = self.create_notes(1)[0]
+
+        response = self.client.put(
+            reverse('api:notes-bulk-archive'), data=[{'id': note.pk}, [note.pk], 1.5, note.pk], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([set(error) for error in response.data], [{'id'}] * 3 + [set()])
+        self.assertFalse(models.Note.objects.get(pk=note.pk).archived)
+
+    def test_stats(self):
+        self.create_notes(2, category=self.category)
+        self.create_notes(1, archived=True)
+
+        response = self.client.get(reverse('api:notes-stats'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'total': 3,
+            'archived': 1,
+            'categories': [{'id': self.category.pk, 'name': self.category.name, 'total': 2, 'archived': 0}]
+        })
+
+    def test_changes(self):
+        notes = self.create_notes(2)
+
+        response = self.client.get(reverse('api:notes-changes'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({item['id'] for item in response.data['notes']}, {obj.pk for obj in notes})
+        self.assertEqual(response.data['deleted'], [])
+        self.assertFalse(response.data['has_more'])
+
+    def test_changes_with_invalid_token(self):
+        response = self.client.get(reverse('api:notes-changes'), data={'since': 'invalid'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('since', response.data)
+
+    def test_export(self):
+        notes = self.create_notes(2, category=self.category)
+
+        response = self.client.get(reverse('api:notes-export'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        items = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+        self.assertEqual({item['id'] for item in items}, {obj.pk for obj in notes})
+        self.assertEqual(items[0]['category'], {'id': self.category.pk, 'name': self.category.name})
+
+    def test_export_csv(self):
+        self.create_notes(2, category=self.category)
+
+        response = self.client.get(reverse('api:notes-export'), data={'type': 'csv'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['category_name'], self.category.name)
+
+    def test_import(self):
+        content = '\n'.join([
+            json.dumps({'title': 'First', 'category': self.category.name}),
+            json.dumps({'title': 'Second', 'category': 'New'}),
+            json.dumps({'title': ''})
+        ])
+
+        response = self.client.post(
+            reverse('api:notes-import-notes'), data=content, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['inserted'], response.data['failed']), (2, 1))
+        self.assertEqual(
+            set(models.Note.objects.filter(user=self.user).values_list('title', 'category__name')),
+            {('First', self.category.name), ('Second', 'New')})
+
+    def test_import_csv(self):
+        content = f'title,category\nFirst,{self.category.name}\nSecond,\n'
+
+        response = self.client.post(
+            reverse('api:notes-import-notes'), data=content, content_type='text/csv')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['inserted'], 2)
+        self.assertEqual(models.Note.objects.filter(user=self.user, category=self.category).count(), 1)
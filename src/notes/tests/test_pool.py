@@ -0,0 +1,223 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.db import connection
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase
+
+from commons.db import pool as pool_module
+from commons.db.backends.sqlite3.base import DatabaseWrapper
+from commons.db.pool import ConnectionPool, PoolTimeout
+
+
+def connect():
+    return sqlite3.connect(':memory:', check_same_thread=False)
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def test_reuse(self):
+        pool = ConnectionPool(max_size=2, name='tests:reuse')
+        conn = pool.checkout(connect)
+        pool.release(conn)
+
+        self.assertIs(pool.checkout(connect), conn)
+        self.assertEqual(pool.stats()['created'], 1)
+
+    def test_overflow(self):
+        pool = ConnectionPool(max_size=1, max_overflow=1, timeout=0, name='tests:overflow')
+
+        first = pool.checkout(connect)
+        overflow = pool.checkout(connect)
+
+        with self.assertRaises(PoolTimeout):
+            pool.checkout(connect)
+
+        # the overflow connections are closed once released.
+        pool.release(overflow)
+        self.assertEqual(pool.stats()['closed'], 1)
+
+        pool.release(first)
+        self.assertEqual(pool.stats()['idle'], 1)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_timeout(self):
+        pool = ConnectionPool(max_size=1, timeout=0.05, name='tests:timeout')
+        pool.checkout(connect)
+
+        start = time.monotonic()
+
+        with self.assertRaises(PoolTimeout):
+            pool.checkout(connect)
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_wait_for_release(self):
+        pool = ConnectionPool(max_size=1, timeout=5, name='tests:wait')
+        conn = pool.checkout(connect)
+
+        timer = threading.Timer(0.05, pool.release, args=[conn])
+        timer.start()
+
+        self.assertIs(pool.checkout(connect), conn)
+        timer.join()
+
+        self.assertGreater(pool.stats()['max_wait'], 0)
+
+    def test_failed_connect(self):
+        pool = ConnectionPool(max_size=1, timeout=0, name='tests:connect')
+
+        with self.assertRaises(sqlite3.OperationalError):
+            pool.checkout(mock.Mock(side_effect=sqlite3.OperationalError))
+
+        # the slot of the failed connection is freed.
+        pool.checkout(connect)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_pre_ping(self):
+        pool = ConnectionPool(max_size=1, pre_ping=True, name='tests:ping')
+        conn = pool.checkout(connect)
+        pool.release(conn)
+
+        # closed by the server meanwhile.
+        conn.close()
+
+        self.assertIsNot(pool.checkout(connect), conn)
+        self.assertEqual(pool.stats()['ping_failures'], 1)
+        self.assertEqual(pool.stats()['closed'], 1)
+
+    def test_without_pre_ping(self):
+        pool = ConnectionPool(max_size=1, pre_ping=False, name='tests:no-ping')
+        conn = pool.checkout(connect)
+        pool.release(conn)
+        conn.close()
+
+        self.assertIs(pool.checkout(connect), conn)
+
+    def test_recycle(self):
+        pool = ConnectionPool(max_size=1, recycle=10, name='tests:recycle')
+        now = time.monotonic()
+
+        with mock.patch('commons.db.pool.time.monotonic', return_value=now):
+            conn = pool.checkout(connect)
+            pool.release(conn)
+
+        with mock.patch('commons.db.pool.time.monotonic', return_value=now + 10):
+            self.assertIs(pool.checkout(connect), conn)
+            pool.release(conn)
+
+        with mock.patch('commons.db.pool.time.monotonic', return_value=now + 11):
+            self.assertIsNot(pool.checkout(connect), conn)
+
+        self.assertEqual(pool.stats()['closed'], 1)
+
+    def test_release_rolls_back(self):
+        pool = ConnectionPool(max_size=1, name='tests:rollback')
+        conn = pool.checkout(connect)
+        conn.execute('CREATE TABLE items (id INTEGER)')
+        conn.commit()
+
+        conn.execute('INSERT INTO items VALUES (1)')
+        pool.release(conn)
+
+        conn = pool.checkout(connect)
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM items').fetchone(), (0,))
+
+    def test_discard(self):
+        pool = ConnectionPool(max_size=1, name='tests:discard')
+        pool.release(pool.checkout(connect), discard=True)
+
+        self.assertEqual(pool.stats()['idle'], 0)
+        self.assertEqual(pool.stats()['closed'], 1)
+
+    def test_release_unknown_connection(self):
+        pool = ConnectionPool(max_size=1, name='tests:unknown')
+        conn = connect()
+        pool.release(conn)
+
+        self.assertEqual(pool.stats()['idle'], 0)
+
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute('SELECT 1')
+
+    def test_clear(self):
+        pool = ConnectionPool(max_size=2, name='tests:clear')
+        conns = [pool.checkout(connect) for _ in range(2)]
+
+        for conn in conns:
+            pool.release(conn)
+
+        pool.clear()
+        self.assertEqual(pool.stats()['idle'], 0)
+        self.assertEqual(pool.stats()['size'], 0)
+
+
+class PooledDatabaseWrapperTests(SimpleTestCase):
+    alias = 'tests_pool'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.settings_dict = {
+            **connection.settings_dict,
+            'NAME': os.path.join(directory.name, 'pool.sqlite3'),
+            'POOL': {'MAX_SIZE': 1, 'TIMEOUT': 0}
+        }
+
+        self.addCleanup(pool_module.pools.pop, (self.alias, self.settings_dict['NAME']), None)
+        self.addCleanup(pool_module.clear_pools, self.alias)
+
+    def get_wrapper(self):
+        wrapper = DatabaseWrapper(self.settings_dict, alias=self.alias)
+        self.addCleanup(wrapper.close)
+
+        return wrapper
+
+    def test_close_releases(self):
+        wrapper = self.get_wrapper()
+        wrapper.ensure_connection()
+        conn = wrapper.connection
+
+        wrapper.close()
+
+        self.assertIsNone(wrapper.connection)
+        self.assertEqual(wrapper.pool.stats()['idle'], 1)
+
+        # the connection is reused by the next wrapper.
+        other = self.get_wrapper()
+        other.ensure_connection()
+
+        self.assertIs(other.connection, conn)
+        self.assertEqual(other.pool.stats()['created'], 1)
+
+    def test_close_broken(self):
+        wrapper = self.get_wrapper()
+        wrapper.ensure_connection()
+        wrapper.errors_occurred = True
+
+        wrapper.close()
+
+        self.assertEqual(wrapper.pool.stats()['idle'], 0)
+        self.assertEqual(wrapper.pool.stats()['closed'], 1)
+
+    def test_timeout(self):
+        self.get_wrapper().ensure_connection()
+
+        # the pool timeouts are database errors.
+        with self.assertRaises(OperationalError):
+            self.get_wrapper().ensure_connection()
+
+    def test_without_pool(self):
+        del self.settings_dict['POOL']
+
+        wrapper = self.get_wrapper()
+        wrapper.ensure_connection()
+
+        self.assertIsNone(wrapper.pool)
+        self.assertEqual(wrapper.cursor().execute('SELECT 1').fetchone(), (1,))
@@ -0,0 +1,65 @@
+from django.urls import reverse
+from mixer.backend.django import mixer
+from rest_framework import status
+
+from commons.tests import AuthenticatedAPITestCase
+from notes import models
+
+
+class NoteWriteQueriesTests(AuthenticatedAPITestCase):
+    """
+    The notes writes resolve the category at most once, the counters
+    of `notes.counters` add an update by each counter changed.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.category = mixer.blend(models.Category, user=self.user)
+        self.note = models.Note.objects.create(title=self.faker.sentence(nb_words=3), user=self.user, category=self.category)
+
+        # the authenticated user is cached by the first request.
+        self.client.get(reverse('api:notes-stats'))
+
+    def test_create(self):
+        # the category, the insert and the user and category counters.
+        with self.assertNumQueries(2 + 2):
+            response = self.client.post(reverse('api:notes-list'), data={
+                'title': 'Title', 'category': self.category.pk
+            }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_create_without_category(self):
+        # the insert and the user counter.
+        with self.assertNumQueries(1 + 1):
+            response = self.client.post(reverse('api:notes-list'), data={'title': 'Title'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_update_with_same_category(self):
+        # the note, joined with its category, and the update.
+        with self.assertNumQueries(2):
+            response = self.client.put(reverse('api:notes-detail', args=[self.note.pk]), data={
+                'title': 'Title', 'category': self.category.pk
+            }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_update_with_changed_category(self):
+        category = mixer.blend(models.Category, user=self.user)
+
+        # the note, the new category, the update and both categories counters.
+        with self.assertNumQueries(3 + 2):
+            response = self.client.put(reverse('api:notes-detail', args=[self.note.pk]), data={
+                'title': 'Title', 'category': category.pk
+            }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['category'], {'id': category.pk, 'name': category.name})
+
+    def test_archive(self):
+        # the note, the update and the user and category counters.
+        with self.assertNumQueries(2 + 2):
+            response = self.client.put(reverse('api:notes-archive', args=[self.note.pk]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
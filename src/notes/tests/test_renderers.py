@@ -0,0 +1,149 @@
+import decimal
+import importlib.util
+import json
+import sys
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+
+from commons import renderers
+from commons.renderers import JSONRenderer
+from commons.tests import AuthenticatedAPITestCase
+from notes import models
+
+
+def load_renderer_class():
+    """
+    Returns the `JSONRenderer` of a fresh copy of the renderers module, loaded
+    with the current settings and modules, without touching the one in use.
+    """
+    spec = importlib.util.spec_from_file_location('commons.renderers_copy', renderers.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    return module.JSONRenderer
+
+
+class JSONRendererTests(SimpleTestCase):
+    data = {
+        'count': 3,
+        'next': None,
+        'results': [
+            {'id': 1, 'title': 'Café', 'content': 'Line\u2028separator', 'amount': decimal.Decimal('1.5')},
+            {'id': 2, 'title': '"Quoted"', 'content': None, 'amount': 2.25},
+            {'id': 3, 'title': 'Notes', 'content': '', 'tags': ['a', 'b'], 'archived': True},
+        ]
+    }
+
+    def test_orjson_encoder(self):
+        renderer = JSONRenderer()
+
+        self.assertTrue(renderer.use_orjson)
+        self.assertEqual(renderer.get_encoder(None, {}), renderer.encode_orjson)
+
+    def test_stdlib_encoder(self):
+        # the indented, the ascii and the not compact outputs are rendered by the standard library.
+        renderer = JSONRenderer()
+        self.assertIsNone(renderer.get_encoder('application/json; indent=2', {}))
+
+        for attr in ('ensure_ascii', 'compact'):
+            renderer = JSONRenderer()
+            setattr(renderer, attr, not getattr(renderer, attr))
+
+            self.assertEqual(renderer.get_encoder(None, {}), renderer.encode_stdlib)
+
+    def test_fallback_without_orjson(self):
+        with mock.patch.dict(sys.modules, {'orjson': None}):
+            renderer_class = load_renderer_class()
+
+        renderer = renderer_class()
+
+        self.assertFalse(renderer.use_orjson)
+        self.assertEqual(renderer.get_encoder(None, {}), renderer.encode_stdlib)
+        self.assertEqual(renderer.render(self.data), JSONRenderer().render(self.data))
+
+    def test_fallback_when_disabled(self):
+        with self.settings(JSON_RENDERER_ORJSON=False):
+            renderer = load_renderer_class()()
+
+        self.assertFalse(renderer.use_orjson)
+        self.assertEqual(renderer.render(self.data), JSONRenderer().render(self.data))
+
+    def test_line_separators_are_escaped(self):
+        content = JSONRenderer().render(self.data)
+
+        self.assertIn(b'Line\\u2028separator', content)
+        self.assertEqual(json.loads(content)['results'][0]['content'], 'Line\u2028separator')
+
+    def test_iter_render(self):
+        items = [{'id': index, 'title': f'Note {index}', 'tags': ['a', 'b']} for index in range(25)]
+        payloads = [
+            items,
+            {'count': len(items), 'next': None, 'previous': None, 'results': items},
+            # small lists are sent along the other values.
+            {'results': items[:2], 'count': 2},
+            [],
+            {},
+        ]
+
+        for compact in (True, False):
+            renderer = JSONRenderer()
+            renderer.compact = compact
+            renderer.stream_chunk_size = 4
+
+            for data in payloads:
+                with self.subTest(compact=compact, data=type(data).__name__, size=len(data)):
+                    self.assertEqual(b''.join(renderer.iter_render(data)), renderer.render(data))
+
+        # the long lists are split in chunks.
+        self.assertGreater(len(list(renderer.iter_render(items))), 25 // 4)
+
+    def test_iter_render_indented(self):
+        renderer = JSONRenderer()
+        media_type = 'application/json; indent=2'
+
+        self.assertEqual(
+            list(renderer.iter_render(self.data, media_type, {})), [renderer.render(self.data, media_type, {})])
+
+
+class StreamResponseTests(AuthenticatedAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        models.Note.objects.bulk_create([
+            models.Note(title=self.faker.sentence(nb_words=3), user=self.user) for _ in range(10)
+        ])
+
+        self.pks = list(models.Note.objects.filter(user=self.user).order_by('pk').values_list('pk', flat=True))
+
+        patcher = mock.patch.multiple(JSONRenderer, stream_min_items=5, stream_chunk_size=3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_bulk_response(self):
+        response = self.client.patch(reverse('api:notes-bulk'), data=[
+            {'id': pk, 'title': f'Note {pk}'} for pk in self.pks
+        ], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([(item['id'], item['title']) for item in data], [(pk, f'Note {pk}') for pk in self.pks])
+
+    def test_small_response(self):
+        response = self.client.put(reverse('api:notes-bulk-archive'), data=self.pks[:2], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.streaming)
+        self.assertEqual([item['id'] for item in response.json()], self.pks[:2])
+
+    def test_errors_are_not_streamed(self):
+        response = self.client.patch(reverse('api:notes-bulk'), data=[{'id': 0}] * 10, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(response.streaming)
@@ -0,0 +1,277 @@
+import collections
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+
+from commons.cache import MemoryCache
+from commons.db import routers
+from commons.db.routers import (
+    ReplicaRouter, ReplicaSet, build_pins, is_user_pinned, pin_user, start_replica_reads, stop_replica_reads
+)
+from commons.tests import AuthenticatedAPITestCase
+from commons.viewsets import list_cache
+from notes import models
+
+# a second database standing in for a replica, the test runner creates
+# it along with the default one for the tests using it.
+connections.databases.setdefault('replica', {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'})
+
+
+class ReplicaPinsTests(SimpleTestCase):
+    shared_caches = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp/pins'},
+    }
+
+    def test_process_cache_without_replicas(self):
+        pins = build_pins({'BACKEND': 'commons.cache.MemoryCache'}, {})
+        self.assertFalse(pins.shared)
+
+    def test_process_cache_with_replicas(self):
+        with self.assertRaises(ImproperlyConfigured):
+            build_pins({'BACKEND': 'commons.cache.MemoryCache'}, {'replica1': 1})
+
+        with self.settings(CACHES=self.shared_caches), self.assertRaises(ImproperlyConfigured):
+            build_pins({'BACKEND': 'commons.cache.DjangoCache'}, {'replica1': 1})
+
+    def test_shared_cache_with_replicas(self):
+        with self.settings(CACHES=self.shared_caches):
+            pins = build_pins({'BACKEND': 'commons.cache.DjangoCache', 'OPTIONS': {'alias': 'shared'}}, {'replica1': 1})
+            self.assertTrue(pins.shared)
+
+    def test_disabled_pins(self):
+        self.assertIsNone(build_pins({'BACKEND': ''}, {'replica1': 1}))
+
+
+def add_database(alias, name):
+    """
+    Adds a SQLite database alias, standing in for a replica.
+    """
+    connections.databases[alias] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': name}
+
+
+def remove_database(alias):
+    if hasattr(connections._connections, alias):
+        connections[alias].close()
+        delattr(connections._connections, alias)
+
+    del connections.databases[alias]
+
+
+class ReplicaSetTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.TemporaryDirectory()
+
+        add_database('replica_up', os.path.join(cls.directory.name, 'replica.sqlite3'))
+        # the directory of the database does not exist, so it cannot connect.
+        add_database('replica_down', os.path.join(cls.directory.name, 'missing', 'replica.sqlite3'))
+
+    @classmethod
+    def tearDownClass(cls):
+        remove_database('replica_up')
+        remove_database('replica_down')
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def test_smooth_weighted_round_robin(self):
+        replica_set = ReplicaSet({'a': 5, 'b': 1, 'c': 1})
+
+        # the heavier replica is interleaved with the others, not picked in a row.
+        self.assertEqual([replica_set.next() for _ in range(7)], ['a', 'a', 'b', 'a', 'c', 'a', 'a'])
+        self.assertEqual(collections.Counter(replica_set.next() for _ in range(70)), {'a': 50, 'b': 10, 'c': 10})
+
+    def test_exclude(self):
+        replica_set = ReplicaSet({'a': 5, 'b': 1})
+
+        self.assertEqual({replica_set.next(exclude={'a'}) for _ in range(5)}, {'b'})
+        self.assertIsNone(replica_set.next(exclude={'a', 'b'}))
+
+    def test_eject_and_retry(self):
+        replica_set = ReplicaSet({'a': 5, 'b': 1}, retry_after=30)
+        now = time.monotonic()
+
+        with mock.patch('commons.db.routers.time.monotonic', return_value=now):
+            replica_set.eject('a')
+            self.assertEqual({replica_set.next() for _ in range(5)}, {'b'})
+
+        with mock.patch('commons.db.routers.time.monotonic', return_value=now + 29):
+            self.assertEqual(replica_set.get_available(), ['b'])
+
+        # the replica gets another chance after the retry time.
+        with mock.patch('commons.db.routers.time.monotonic', return_value=now + 30):
+            self.assertEqual(replica_set.get_available(), ['a', 'b'])
+            self.assertEqual(replica_set.next(), 'a')
+
+    def test_connect(self):
+        replica_set = ReplicaSet({'replica_down': 10, 'replica_up': 1})
+
+        self.assertEqual(replica_set.connect(), 'replica_up')
+        self.assertEqual(replica_set.get_available(), ['replica_up'])
+
+        # the ejected replica is not tried again until the retry time.
+        with mock.patch.object(connections['replica_up'], 'ensure_connection') as ensure_connection:
+            self.assertEqual(replica_set.connect(), 'replica_up')
+            ensure_connection.assert_called_once_with()
+
+    def test_connect_without_replicas(self):
+        replica_set = ReplicaSet({'replica_down': 1})
+
+        # the reads fall back to the primary.
+        self.assertIsNone(replica_set.connect())
+        self.assertIsNone(replica_set.connect())
+
+
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        replica_set = ReplicaSet({'replica1': 1, 'replica2': 1})
+
+        patchers = [
+            mock.patch('commons.db.routers.replicas', replica_set),
+            mock.patch.object(ReplicaSet, 'connect', side_effect=replica_set.next)
+        ]
+
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_reads_outside_blocks(self):
+        self.assertIsNone(self.router.db_for_read(models.Note))
+
+    def test_reads_within_blocks(self):
+        token = start_replica_reads()
+
+        # a single replica is used along the block.
+        alias = self.router.db_for_read(models.Note)
+        self.assertIn(alias, ('replica1', 'replica2'))
+        self.assertEqual(self.router.db_for_read(models.Category), alias)
+
+        self.assertFalse(stop_replica_reads(token))
+        self.assertIsNone(self.router.db_for_read(models.Note))
+
+    def test_reads_after_writes(self):
+        token = start_replica_reads()
+
+        self.assertIsNotNone(self.router.db_for_read(models.Note))
+        self.assertEqual(self.router.db_for_write(models.Note), DEFAULT_DB_ALIAS)
+
+        # the block reads its own writes from the primary.
+        self.assertIsNone(self.router.db_for_read(models.Note))
+        self.assertTrue(stop_replica_reads(token))
+
+    def test_unavailable_replicas(self):
+        token = start_replica_reads()
+
+        with mock.patch.object(ReplicaSet, 'connect', return_value=None):
+            self.assertEqual(self.router.db_for_read(models.Note), DEFAULT_DB_ALIAS)
+
+        stop_replica_reads(token)
+
+    def test_migrations(self):
+        self.assertTrue(self.router.allow_migrate(DEFAULT_DB_ALIAS, 'notes'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'notes'))
+
+
+class UserPinsTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch('commons.db.routers.pins', MemoryCache(timeout=5, key_prefix='db:pin:'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pin_user(self):
+        self.assertFalse(is_user_pinned(1))
+
+        pin_user(1)
+
+        self.assertTrue(is_user_pinned(1))
+        self.assertFalse(is_user_pinned(2))
+
+    def test_pins_expire(self):
+        now = time.monotonic()
+
+        with mock.patch('commons.cache.time.monotonic', return_value=now):
+            pin_user(1)
+
+        with mock.patch('commons.cache.time.monotonic', return_value=now + 5):
+            self.assertFalse(is_user_pinned(1))
+
+    def test_anonymous_users(self):
+        pin_user(None)
+        self.assertFalse(is_user_pinned(None))
+
+    def test_disabled_pins(self):
+        with mock.patch('commons.db.routers.pins', None):
+            pin_user(1)
+            self.assertFalse(is_user_pinned(1))
+
+
+class ReplicaReadsTests(AuthenticatedAPITestCase):
+    """
+    Reads the notes from a second SQLite database, with the same schema
+    as the primary one but its own rows, so the tests tell which one served
+    each request.
+    """
+    databases = {DEFAULT_DB_ALIAS, 'replica'}
+
+    def setUp(self):
+        super().setUp()
+
+        patchers = [
+            mock.patch('commons.db.routers.replicas', ReplicaSet({'replica': 1})),
+            mock.patch('commons.db.routers.pins', MemoryCache(timeout=5, key_prefix='db:pin:'))
+        ]
+
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.note = models.Note.objects.create(title='On the primary', user=self.user)
+
+        # the rows are copied as they are, without the signals writing to the primary.
+        models.User.objects.using('replica').bulk_create([self.user])
+        models.NoteCounter.objects.using('replica').bulk_create([models.NoteCounter(user=self.user, total=1)])
+        # the replica lags behind, with an older version of the note.
+        models.Note.objects.using('replica').bulk_create([
+            models.Note(pk=self.note.pk, title='On the replica', user=self.user)
+        ])
+
+    def get_titles(self):
+        response = self.client.get(reverse('api:notes-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return [item['title'] for item in response.data['results']]
+
+    def test_safe_requests(self):
+        self.assertEqual(self.get_titles(), ['On the replica'])
+
+        response = self.client.get(reverse('api:notes-detail', args=[self.note.pk]))
+        self.assertEqual(response.data['title'], 'On the replica')
+
+        self.assertFalse(routers.is_user_pinned(self.user.pk))
+
+    def test_read_your_writes(self):
+        response = self.client.patch(
+            reverse('api:notes-detail', args=[self.note.pk]), data={'title': 'Updated'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(routers.is_user_pinned(self.user.pk))
+
+        # the user reads from the primary while pinned.
+        self.assertEqual(self.get_titles(), ['Updated'])
+
+        routers.pins.clear()
+        list_cache.clear()
+
+        self.assertEqual(self.get_titles(), ['On the replica'])
@@ -0,0 +1,107 @@
+import json
+
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+
+from commons.tests import AuthenticatedAPITestCase
+from notes import models
+
+
+class SearchIndexTests(AuthenticatedAPITestCase):
+    """
+    The full-text index is kept in sync by the database, so the searches
+    see the notes written by every path, the bulk ones and the import too.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.note = models.Note.objects.create(title='Groceries list', content='Buy apples', user=self.user)
+
+    def search(self, text):
+        response = self.client.get(reverse('api:notes-list'), data={'search': text})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return sorted(item['id'] for item in response.data['results'])
+
+    def assertIndexInSync(self):
+        """
+        Checks the whole index against the notes table, the postgresql
+        one is a generated column, so it's always in sync.
+        """
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("INSERT INTO notes_note_fts(notes_note_fts, rank) VALUES ('integrity-check', 1)")
+
+    def test_update(self):
+        response = self.client.patch(
+            reverse('api:notes-detail', args=[self.note.pk]), data={'content': 'Buy bananas'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.search('apples'), [])
+        self.assertEqual(self.search('bananas'), [self.note.pk])
+        self.assertIndexInSync()
+
+    def test_queryset_update(self):
+        models.Note.objects.filter(pk=self.note.pk).update(title='Chores')
+
+        self.assertEqual(self.search('groceries'), [])
+        self.assertEqual(self.search('chores apples'), [self.note.pk])
+        self.assertIndexInSync()
+
+    def test_delete(self):
+        self.client.delete(reverse('api:notes-detail', args=[self.note.pk]))
+
+        self.assertEqual(self.search('apples'), [])
+        self.assertIndexInSync()
+
+    def test_bulk_create(self):
+        response = self.client.post(reverse('api:notes-bulk'), data=[
+            {'title': 'Pears', 'content': 'Ripe ones'},
+            {'title': 'More apples'}
+        ], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.search('apples'), sorted([self.note.pk, response.data[1]['id']]))
+        self.assertEqual(self.search('ripe'), [response.data[0]['id']])
+        self.assertIndexInSync()
+
+    def test_bulk_update(self):
+        response = self.client.patch(reverse('api:notes-bulk'), data=[
+            {'id': self.note.pk, 'title': 'Chores', 'content': 'Sweep'}
+        ], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.search('groceries'), [])
+        self.assertEqual(self.search('sweep'), [self.note.pk])
+        self.assertIndexInSync()
+
+    def test_bulk_archive(self):
+        response = self.client.put(reverse('api:notes-bulk-archive'), data=[self.note.pk], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.search('apples'), [self.note.pk])
+        self.assertIndexInSync()
+
+    def test_bulk_delete(self):
+        models.Note.objects.filter(user=self.user).delete()
+
+        self.assertEqual(self.search('apples'), [])
+        self.assertIndexInSync()
+
+    def test_import(self):
+        content = '\n'.join([
+            json.dumps({'title': 'Imported apples'}),
+            json.dumps({'title': 'Imported pears', 'content': 'From the orchard'})
+        ])
+
+        response = self.client.post(
+            reverse('api:notes-import-notes'), data=content, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        imported = dict(models.Note.objects.filter(title__startswith='Imported').values_list('title', 'id'))
+
+        self.assertEqual(self.search('apples'), sorted([self.note.pk, imported['Imported apples']]))
+        self.assertEqual(self.search('orchard'), [imported['Imported pears']])
+        self.assertIndexInSync()
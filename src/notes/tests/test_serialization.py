@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from commons.tests import AuthenticatedAPITestCase
+from commons.viewsets import list_cache
+from notes import models
+from notes.tests.schemas import CATEGORY_SCHEMA, NOTE_SCHEMA
+from notes.viewsets.category import CategoryViewSet
+from notes.viewsets.note import NoteViewSet
+
+
+class FastSerializationTests(AuthenticatedAPITestCase):
+    """
+    The lists serialized from rows, with `FAST_SERIALIZATION`,
+    are the same as the ones serialized by the model serializers.
+    """
+
+    def setUp(self):
+        super().setUp()
+        categories = mixer.cycle(3).blend(models.Category, user=self.user)
+
+        for index in range(15):
+            models.Note.objects.create(
+                title=self.faker.sentence(nb_words=3), content=self.faker.text() if index % 2 else None,
+                user=self.user, category=categories[index % 4] if index % 4 < 3 else None,
+                archived=index % 5 == 0)
+
+    def get_both(self, viewset, url, params):
+        """
+        Returns the responses of the fast and of the model serialization.
+        """
+        responses = []
+
+        for fast in (True, False):
+            # the lists would be served from the cache otherwise.
+            list_cache.clear()
+
+            with mock.patch.object(viewset, 'use_row_serializer', fast):
+                responses.append(self.client.get(url, data=params))
+
+        return responses
+
+    def assertSameLists(self, viewset, url, schema, **params):
+        fast, slow = self.get_both(viewset, url, params)
+
+        self.assertEqual(fast.status_code, slow.status_code)
+        self.assertEqual(fast.content, slow.content)
+
+        if 'cursor' in url or params.get('pagination') == 'cursor':
+            self.assertCursorPaginatedSchema(schema, fast.json())
+
+        else:
+            self.assertPaginatedSchema(schema, fast.json())
+
+        return fast.json()
+
+    def test_notes_pages(self):
+        url = reverse('api:notes-list')
+
+        for page in (1, 2):
+            self.assertSameLists(NoteViewSet, url, NOTE_SCHEMA, page=page)
+
+        self.assertSameLists(NoteViewSet, url, NOTE_SCHEMA, archived='false')
+
+    def test_notes_cursor_pages(self):
+        url = reverse('api:notes-list')
+        data = self.assertSameLists(NoteViewSet, url, NOTE_SCHEMA, pagination='cursor')
+
+        self.assertIsNotNone(data['next'])
+        self.assertSameLists(NoteViewSet, data['next'], NOTE_SCHEMA)
+
+    def test_categories_pages(self):
+        url = reverse('api:categories-list')
+
+        self.assertSameLists(CategoryViewSet, url, CATEGORY_SCHEMA)
+        self.assertSameLists(CategoryViewSet, url, CATEGORY_SCHEMA, pagination='cursor')
@@ -0,0 +1,139 @@
+import datetime
+from unittest import mock
+
+from django.urls import reverse
+from django.utils import timezone
+from mixer.backend.django import mixer
+from rest_framework import status
+
+from commons.tests import AuthenticatedAPITestCase
+from notes import models
+from notes.sync import NoteChanges, decode_token, encode_feed, encode_token
+from notes.viewsets.note import NoteViewSet
+
+
+class NoteChangesTests(AuthenticatedAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.category = mixer.blend(models.Category, user=self.user)
+        self.notes = [
+            models.Note.objects.create(title=self.faker.sentence(nb_words=3), user=self.user, category=self.category)
+            for _ in range(3)
+        ]
+
+        mixer.blend(models.Note)
+
+    def get_changes(self, token=None):
+        response = self.client.get(reverse('api:notes-changes'), data={'since': token} if token else None)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return response.data
+
+    def get_ids(self, items):
+        return [item['id'] for item in items]
+
+    def test_full_sync(self):
+        changes = self.get_changes()
+
+        self.assertEqual(self.get_ids(changes['notes']), [obj.pk for obj in self.notes])
+        self.assertEqual(self.get_ids(changes['categories']), [self.category.pk])
+        self.assertEqual(changes['deleted_categories'], [])
+        self.assertFalse(changes['has_more'])
+        self.assertFalse(changes['reset'])
+
+    def test_token_round_trip(self):
+        token = self.get_changes()['token']
+
+        # the rows the client has are not sent again.
+        changes = self.get_changes(token)
+        self.assertEqual(changes['notes'], [])
+        self.assertEqual(changes['categories'], [])
+
+        self.client.patch(reverse('api:notes-detail', args=[self.notes[1].pk]), data={'title': 'Updated'}, format='json')
+        self.client.patch(reverse('api:categories-detail', args=[self.category.pk]), data={'name': 'Updated'}, format='json')
+
+        changes = self.get_changes(changes['token'])
+
+        self.assertEqual(self.get_ids(changes['notes']), [self.notes[1].pk])
+        self.assertEqual(changes['notes'][0]['title'], 'Updated')
+        self.assertEqual(changes['categories'], [{'id': self.category.pk, 'name': 'Updated'}])
+
+        self.assertEqual(self.get_changes(changes['token'])['notes'], [])
+
+    def test_token_state_round_trip(self):
+        now = timezone.now()
+        state = {
+            'n': ((now, 10), now - datetime.timedelta(seconds=1), frozenset({(10, now), (11, now)})),
+            'd': ((now, 0), None, frozenset()),
+            'c': (None, None, frozenset()),
+            'x': ((now, 0), None, frozenset()),
+            't': int(now.timestamp())
+        }
+
+        token = encode_token({**{key: encode_feed(state[key]) for key in NoteChanges.feeds}, 't': state['t']})
+        self.assertEqual(decode_token(token), state)
+
+    def test_pages(self):
+        with mock.patch.object(NoteViewSet, 'changes_page_size', 2):
+            changes = self.get_changes()
+            notes = self.get_ids(changes['notes'])
+
+            self.assertTrue(changes['has_more'])
+
+            while changes['has_more']:
+                changes = self.get_changes(changes['token'])
+                notes += self.get_ids(changes['notes'])
+
+        self.assertEqual(notes, [obj.pk for obj in self.notes])
+
+    def test_late_commit(self):
+        token = self.get_changes()['token']
+
+        # a note written by a transaction which started before the last
+        # sync, but committed after it, with an older timestamp.
+        note = models.Note.objects.create(title=self.faker.sentence(nb_words=3), user=self.user)
+        models.Note.objects.filter(pk=note.pk).update(last_update=self.notes[0].last_update - datetime.timedelta(seconds=1))
+
+        self.assertEqual(self.get_ids(self.get_changes(token)['notes']), [note.pk])
+
+    def test_deletions(self):
+        token = self.get_changes()['token']
+
+        self.client.delete(reverse('api:notes-detail', args=[self.notes[0].pk]))
+
+        changes = self.get_changes(token)
+        self.assertEqual(changes['deleted'], [self.notes[0].pk])
+        self.assertEqual(changes['deleted_categories'], [])
+
+        # the category notes are deleted along with it.
+        category_id = self.category.pk
+        self.category.delete()
+
+        changes = self.get_changes(changes['token'])
+
+        self.assertEqual(sorted(changes['deleted']), [self.notes[1].pk, self.notes[2].pk])
+        self.assertEqual(changes['deleted_categories'], [category_id])
+
+        changes = self.get_changes(changes['token'])
+        self.assertEqual((changes['deleted'], changes['deleted_categories']), ([], []))
+
+    def test_reset(self):
+        token = self.get_changes()['token']
+        self.client.delete(reverse('api:notes-detail', args=[self.notes[0].pk]))
+
+        expired = timezone.now() + NoteChanges.retention + datetime.timedelta(days=1)
+
+        with mock.patch('notes.sync.timezone.now', return_value=expired):
+            changes = self.get_changes(token)
+
+        self.assertTrue(changes['reset'])
+        self.assertEqual(self.get_ids(changes['notes']), [obj.pk for obj in self.notes[1:]])
+        self.assertEqual(self.get_ids(changes['categories']), [self.category.pk])
+
+    def test_invalid_token(self):
+        for token in ('invalid', encode_token({'n': None, 'd': 0, 'c': None, 't': 0})):
+            response = self.client.get(reverse('api:notes-changes'), data={'since': token})
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('since', response.data)
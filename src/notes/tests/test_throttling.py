@@ -0,0 +1,145 @@
+import threading
+import time
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+
+from commons.hashers import HashingPool, HashingPoolFull
+from commons.tests import APITestCase
+from commons.throttling import AuthEmailThrottle, AuthIPThrottle
+from notes import models
+
+
+class IPThrottleTests(APITestCase):
+
+    def get_key(self, forwarded_for):
+        request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=forwarded_for)
+        return AuthIPThrottle().get_cache_key(Request(request), None)
+
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        self.assertEqual(self.get_key('1.1.1.1'), '10.0.0.1')
+        self.assertEqual(self.get_key('2.2.2.2'), '10.0.0.1')
+
+    def test_forwarded_for_behind_proxies(self):
+        with self.settings(REST_FRAMEWORK={'NUM_PROXIES': 1}):
+            # only the address added by the proxy is trusted.
+            self.assertEqual(self.get_key('1.1.1.1, 3.3.3.3'), '3.3.3.3')
+            self.assertEqual(self.get_key('2.2.2.2, 3.3.3.3'), '3.3.3.3')
+
+    def test_spoofed_addresses_share_the_bucket(self):
+        rate = AuthIPThrottle().capacity
+
+        for index in range(rate + 1):
+            response = self.client.post(reverse('api:auth-sign-in'), data={
+                'email': f'user{index}@example.com',
+                'password': 'password'
+            }, format='json', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=f'1.1.1.{index}')
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class EmailThrottleTests(APITestCase):
+    password = 'Zq8!vkT_mw2x'
+
+    def setUp(self):
+        super().setUp()
+        self.user = models.User.objects.create(
+            name=self.faker.name(), email='user@example.com', password=self.password)
+
+    def sign_in(self, email='user@example.com', password='wrong password'):
+        return self.client.post(
+            reverse('api:auth-sign-in'), data={'email': email, 'password': password}, format='json')
+
+    def get_key(self, data):
+        request = Request(RequestFactory().post('/', data=data, content_type='application/json'), parsers=[JSONParser()])
+        return AuthEmailThrottle().get_cache_key(request, None)
+
+    def test_burst_and_refill(self):
+        capacity, period = AuthEmailThrottle().capacity, AuthEmailThrottle().period
+
+        for _ in range(capacity):
+            self.assertEqual(self.sign_in().status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.sign_in()
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], str(period // capacity))
+
+        # a token is refilled after the wait, but only one.
+        later = time.time() + int(response['Retry-After'])
+
+        with mock.patch('commons.throttling.time.time', return_value=later):
+            self.assertEqual(self.sign_in(password=self.password).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.sign_in().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_normalized_email(self):
+        self.assertEqual(self.get_key({'email': ' User@Example.COM '}), 'user@example.com')
+
+        emails = ('user@example.com', 'USER@example.com', ' user@EXAMPLE.com')
+
+        for index in range(AuthEmailThrottle().capacity):
+            self.sign_in(email=emails[index % len(emails)])
+
+        self.assertEqual(self.sign_in(email='User@Example.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # the other accounts have their own buckets.
+        self.assertEqual(self.sign_in(email='other@example.com').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_without_email(self):
+        self.assertIsNone(self.get_key({}))
+        self.assertIsNone(self.get_key({'email': ['user@example.com']}))
+        self.assertIsNone(self.get_key([]))
+
+
+class HashingPoolTests(SimpleTestCase):
+
+    def test_refuse_when_full(self):
+        pool = HashingPool(max_workers=1, max_pending=1, timeout=10)
+        pool.duration = 2.0
+
+        event = threading.Event()
+        futures = [pool.submit(event.wait, 5) for _ in range(2)]
+
+        with self.assertRaises(HashingPoolFull) as context:
+            pool.submit(event.wait, 5)
+
+        # the two pending calls, of two seconds each, on a single worker.
+        self.assertEqual(context.exception.wait, 4)
+        self.assertEqual(pool.stats()['refused'], 1)
+
+        event.set()
+
+        for future in futures:
+            future.result()
+
+        self.assertEqual(pool.stats()['pending'], 0)
+
+    def test_refuse_on_long_waits(self):
+        pool = HashingPool(max_workers=1, max_pending=100, timeout=1)
+        pool.duration = 2.0
+
+        with self.assertRaises(HashingPoolFull):
+            pool.submit(time.sleep, 0)
+
+
+class HashingPoolFullTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = models.User.objects.create(
+            name=self.faker.name(), email='user@example.com', password='Zq8!vkT_mw2x')
+
+    def test_sign_in(self):
+        with mock.patch('commons.hashers.hashing_pool.run', side_effect=HashingPoolFull(wait=3)):
+            response = self.client.post(reverse('api:auth-sign-in'), data={
+                'email': 'user@example.com',
+                'password': 'Zq8!vkT_mw2x'
+            }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '3')
+        self.assertEqual(response.data['detail'].code, 'hashing_pool_full')
@@ -4,12 +4,16 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from commons.auth import authentication_client
+from commons.throttling import AuthEmailThrottle, AuthIPThrottle
 from notes.serializers.auth import SignUpSerializer, TokenSerializer, SignInSerializer
 
 
 class AuthViewSet(viewsets.GenericViewSet):
     authentication_classes = []
     permission_classes = []
+    # the password hashing pool refuses the requests over its
+    # queue with `503 Service Unavailable` on top of these.
+    throttle_classes = [AuthIPThrottle, AuthEmailThrottle]
 
     @action(methods=['POST'], url_path='sign-up', detail=False)
     def sign_up(self, request):
@@ -1,12 +1,22 @@
 from rest_framework import viewsets
 
+from commons.asgi import AsyncViewMixin
+from commons.pagination import PageNumberOrKeysetPagination
+from commons.viewsets import (
+    CachedListMixin, ConditionalMixin, ReplicaReadMixin, RowListMixin, StreamingResponseMixin
+)
 from notes import models
-from notes.serializers.category import CategorySerializer
+from notes.serializers.category import CategoryRowSerializer, CategorySerializer
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(AsyncViewMixin, StreamingResponseMixin, ReplicaReadMixin, CachedListMixin, ConditionalMixin,
+                      RowListMixin, viewsets.ModelViewSet):
     queryset = models.Category.objects.all()
     serializer_class = CategorySerializer
+    row_serializer_class = CategoryRowSerializer
+    pagination_class = PageNumberOrKeysetPagination
+    cursor_ordering = ('name', 'id')
+    async_actions = ('list',)
 
     def get_queryset(self):
         return super().get_queryset() \
@@ -1,18 +1,62 @@
+import codecs
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django.utils.translation import ugettext as _
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
+from commons.asgi import AsyncViewMixin
+from commons.pagination import PageNumberOrKeysetPagination
 from commons.request import cast_param
+from commons.streaming import iter_csv, iter_ndjson, read_csv, read_ndjson
+from commons.viewsets import (
+    CachedListMixin, ConditionalMixin, ReplicaReadMixin, RowListMixin, StreamingResponseMixin, list_cache
+)
 from notes import models
-from notes.serializers.note import NoteCommandSerializer, NoteResultSerializer
+from notes.counters import update_note_counters
+from notes.importers import NoteImporter
+from notes.search import search_notes
+from notes.serializers.category import CategoryRowSerializer
+from notes.serializers.note import NoteCommandSerializer, NoteResultSerializer, NoteRowSerializer
+from notes.sync import InvalidToken, NoteChanges
 
 
-class NoteViewSet(viewsets.ModelViewSet):
+class NoteViewSet(AsyncViewMixin, StreamingResponseMixin, ReplicaReadMixin, CachedListMixin, ConditionalMixin,
+                  RowListMixin, viewsets.ModelViewSet):
     queryset = models.Note.objects.all()
     serializer_class = NoteResultSerializer
+    row_serializer_class = NoteRowSerializer
+    pagination_class = PageNumberOrKeysetPagination
     opts = getattr(models.Note, '_meta')
 
+    # same as `Note.Meta.ordering` with an unique tiebreaker.
+    cursor_ordering = ('category_id', '-created_at', '-id')
+
+    # filters of the cached lists, the searches are not cached.
+    list_cache_params = {'archived': bool, 'category': int, 'page': int}
+
+    # max number of items accepted by the bulk actions.
+    bulk_max_size = getattr(settings, 'NOTES_BULK_MAX_SIZE', 500)
+
+    # rows fetched from the database cursor at once by the export.
+    export_chunk_size = getattr(settings, 'NOTES_EXPORT_CHUNK_SIZE', 2000)
+    # notes inserted at once by the import.
+    import_batch_size = getattr(settings, 'NOTES_IMPORT_BATCH_SIZE', 1000)
+    # max number of notes and tombstones returned by a sync.
+    changes_page_size = getattr(settings, 'NOTES_CHANGES_PAGE_SIZE', 500)
+
+    export_csv_header = [
+        'id', 'title', 'content', 'category_id', 'category_name', 'archived',
+        'created_at', 'last_update'
+    ]
+
     def filter_by_category(self, queryset):
         """ Applies category filter to queryset """
         if 'category' not in self.request.GET:
@@ -41,6 +85,81 @@ class NoteViewSet(viewsets.ModelViewSet):
 
         return queryset.filter(archived=archived)
 
+    def filter_by_search(self, queryset):
+        """ Applies full-text search filter to queryset """
+        if 'search' not in self.request.GET:
+            # ignore filter when it was not provided.
+            return queryset
+
+        use_keyset = getattr(self.paginator, 'use_keyset', None)
+
+        if use_keyset is not None and use_keyset(self.request):
+            # the cursors would sort the matches by `cursor_ordering`, not by their relevance.
+            raise ValidationError({'search': [_('Searches cannot be paginated by cursor.')]})
+
+        queryset = search_notes(queryset, self.request.GET['search'])
+
+        # the most relevant notes come first.
+        return queryset.order_by('-search_rank', *self.opts.ordering, '-id')
+
+    def get_list_count(self):
+        """
+        Returns the number of notes matched by the list filters using the
+        materialized counters, or `None` when they cannot answer it.
+        """
+        if not hasattr(self, '_list_count'):
+            self._list_count = self.count_from_counters()
+
+        return self._list_count
+
+    def count_from_counters(self):
+        """ Returns the list count from the counters, see `get_list_count` """
+        if set(self.request.GET) - {'archived', 'category', 'page', 'pagination', 'cursor'}:
+            return None
+
+        archived = cast_param(self.request, 'archived', cast=bool, default=-1) \
+            if 'archived' in self.request.GET else None
+
+        category = cast_param(self.request, 'category', cast=int, default=-1) \
+            if 'category' in self.request.GET else None
+
+        if archived == -1 or (category is not None and category < 0):
+            # invalid filters always result in empty lists.
+            return 0
+
+        if category is None:
+            counter = models.NoteCounter.get_for_user(self.request.user.pk)
+            total, archived_total = counter.total, counter.archived
+
+        else:
+            total, archived_total = models.Category.objects \
+                .filter(pk=category, user_id=self.request.user.pk) \
+                .values_list('notes_count', 'archived_notes_count') \
+                .first() or (0, 0)
+
+        if archived is None:
+            return total
+
+        return archived_total if archived else total - archived_total
+
+    def get_list_state(self, queryset):
+        """
+        Returns the list validators state, the categories are
+        considered since their names are part of the list.
+        """
+        count = self.get_list_count()
+
+        state = queryset.order_by().aggregate(
+            last_modified=Max('last_update'),
+            **({'count': Count('pk')} if count is None else {}))
+
+        categories = models.Category.objects \
+            .filter(user_id=self.request.user.pk) \
+            .order_by() \
+            .aggregate(last_modified=Max('last_update'))
+
+        return [state['last_modified'], categories['last_modified'], state.get('count', count)]
+
     def get_queryset(self):
         queryset = super().get_queryset() \
             .filter(user_id=self.request.user.pk)
@@ -51,6 +170,7 @@ class NoteViewSet(viewsets.ModelViewSet):
         # apply queryset filters.
         queryset = self.filter_by_archived(queryset)
         queryset = self.filter_by_category(queryset)
+        queryset = self.filter_by_search(queryset)
 
         return queryset
 
@@ -77,7 +197,7 @@ class NoteViewSet(viewsets.ModelViewSet):
             instance._prefetched_objects_cache = {}
 
         serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        return self.set_validators(Response(serializer.data), *self.get_object_validators(instance))
 
     @action(['PUT'], detail=True)
     def archive(self, request, **kwargs):
@@ -92,7 +212,302 @@ class NoteViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         obj.archived = True
-        obj.save()
+        obj.save(update_fields=['archived', 'last_update'])
 
         serializer = NoteResultSerializer(instance=obj, context=self.get_serializer_context())
+        response = Response(serializer.data, status=status.HTTP_200_OK)
+
+        return self.set_validators(response, *self.get_object_validators(obj))
+
+    def get_bulk_items(self, request):
+        """ Returns the list of items sent to a bulk action """
+        items = request.data
+
+        if not isinstance(items, list):
+            message = _('Expected a list of items but got type "{input_type}".').format(
+                input_type=type(items).__name__)
+
+        elif not items:
+            message = _('This list may not be empty.')
+
+        elif len(items) > self.bulk_max_size:
+            message = _('Ensure this list has no more than {max_size} items.').format(
+                max_size=self.bulk_max_size)
+
+        else:
+            return items
+
+        raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]})
+
+    @staticmethod
+    def is_bulk_pk(pk):
+        """ Returns whether an item id can be looked up, the booleans are ints too """
+        return isinstance(pk, int) and not isinstance(pk, bool)
+
+    def get_bulk_instances(self, pks):
+        """ Returns the notes owned by the user mapped by their primary keys """
+        return self.filter_queryset(self.get_queryset()).in_bulk([pk for pk in pks if self.is_bulk_pk(pk)])
+
+    def get_bulk_errors(self, pks, instances):
+        """ Returns the item errors for invalid, missing and duplicated notes """
+        errors, seen = [], set()
+
+        for pk in pks:
+            if pk is None:
+                errors.append({'id': [_('This field is required.')]})
+                continue
+
+            if not self.is_bulk_pk(pk):
+                errors.append({'id': [_('A valid integer is required.')]})
+                continue
+
+            if pk not in instances:
+                errors.append({'id': [_('Not found.')]})
+
+            elif pk in seen:
+                errors.append({'id': [_('This note is duplicated in the list.')]})
+
+            else:
+                errors.append({})
+
+            seen.add(pk)
+
+        return errors
+
+    @action(['POST', 'PUT', 'PATCH'], detail=False, url_path='bulk')
+    def bulk(self, request, **kwargs):
+        """
+        Creates (POST) or updates (PUT/PATCH) a list of notes
+        inside a single transaction. Nothing is written when
+        any item is invalid and each item reports its own errors.
+        """
+        if request.method == 'POST':
+            return self.bulk_create(request)
+
+        return self.bulk_update(request, partial=request.method == 'PATCH')
+
+    def bulk_create(self, request):
+        items = self.get_bulk_items(request)
+
+        serializer = NoteCommandSerializer(data=items, many=True, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+
+        instances = [
+            models.Note(**attrs, user_id=request.user.pk)
+            for attrs in serializer.validated_data
+        ]
+
+        with transaction.atomic():
+            if connection.features.can_return_rows_from_bulk_insert:
+                models.Note.objects.bulk_create(instances)
+                update_note_counters(instances)
+                # the bulk inserts send no save signals.
+                list_cache.invalidate(request.user.pk)
+
+            else:
+                # the primary keys of the new rows are required by the response,
+                # but this backend cannot return them from a bulk insert.
+                # the counters are updated by the save signals here.
+                for instance in instances:
+                    instance.save(force_insert=True)
+
+        serializer = NoteResultSerializer(instances, many=True, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, request, partial=False):
+        items = self.get_bulk_items(request)
+        pks = [item.get('id') if isinstance(item, dict) else None for item in items]
+
+        serializer = NoteCommandSerializer(
+            data=items, many=True, partial=partial,
+            context=self.get_serializer_context())
+
+        is_valid = serializer.is_valid()
+        instances = self.get_bulk_instances(pks)
+        errors = self.get_bulk_errors(pks, instances)
+
+        if not is_valid:
+            errors = [{**error, **item_errors} for error, item_errors in zip(errors, serializer.errors)]
+
+        if any(errors):
+            raise ValidationError(errors)
+
+        now, fields, objs = timezone.now(), {'last_update'}, []
+
+        for pk, attrs in zip(pks, serializer.validated_data):
+            instance = instances[pk]
+
+            for attr, value in attrs.items():
+                setattr(instance, attr, value)
+
+            # `auto_now` fields are not handled by bulk updates.
+            instance.last_update = now
+            fields.update(attrs)
+            objs.append(instance)
+
+        with transaction.atomic():
+            models.Note.objects.bulk_update(objs, fields=sorted(fields))
+            update_note_counters(objs, before=[obj.counted_state for obj in objs])
+            list_cache.invalidate(request.user.pk)
+
+        serializer = NoteResultSerializer(objs, many=True, context=self.get_serializer_context())
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(['PUT'], detail=False, url_path='bulk/archive')
+    def bulk_archive(self, request, **kwargs):
+        """
+        Archives a list of notes, provided by their ids, with a single query.
+        """
+        pks = self.get_bulk_items(request)
+        instances = self.get_bulk_instances(pks)
+        errors = self.get_bulk_errors(pks, instances)
+
+        for index, pk in enumerate(pks):
+            if not errors[index] and instances[pk].archived:
+                errors[index] = {'id': [_('The {name} "{obj}" is already archived.').format(
+                    name=self.opts.verbose_name,
+                    obj=str(instances[pk])
+                )]}
+
+        if any(errors):
+            raise ValidationError(errors)
+
+        now = timezone.now()
+        objs = [instances[pk] for pk in pks]
+        before = [obj.counted_state for obj in objs]
+
+        for obj in objs:
+            obj.archived, obj.last_update = True, now
+
+        with transaction.atomic():
+            models.Note.objects.filter(pk__in=pks).update(archived=True, last_update=now)
+            update_note_counters(objs, before=before)
+            list_cache.invalidate(request.user.pk)
+
+        serializer = NoteResultSerializer(objs, many=True, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(['GET'], detail=False)
+    def stats(self, request, **kwargs):
+        """
+        Returns the user notes counters, in total and by category.
+        """
+        counter = models.NoteCounter.get_for_user(request.user.pk)
+
+        categories = models.Category.objects \
+            .filter(user_id=request.user.pk) \
+            .values_list('id', 'name', 'notes_count', 'archived_notes_count')
+
+        return Response({
+            'total': counter.total,
+            'archived': counter.archived,
+            'categories': [
+                {'id': pk, 'name': name, 'total': total, 'archived': archived}
+                for pk, name, total, archived in categories
+            ]
+        })
+
+    @action(['GET'], detail=False)
+    def changes(self, request, **kwargs):
+        """
+        Returns the notes and categories created or updated and the ids of the
+        ones deleted after the `?since=` token, with a new token to continue
+        from. Without a token every note is returned. When `has_more` is true
+        the sync should continue right away and when `reset` is true the token
+        was too old, so the client must drop its notes and keep the returned
+        ones. The changes of the last seconds may be sent again, so they must
+        be applied by id.
+        """
+        sync = NoteChanges(request.user.pk, limit=self.changes_page_size)
+
+        try:
+            changes = sync.run(request.GET.get('since') or None, values=NoteRowSerializer.get_values)
+
+        except InvalidToken:
+            raise ValidationError({'since': [_('Invalid sync token.')]})
+
+        context = self.get_serializer_context()
+
+        return Response({
+            **changes,
+            'notes': NoteRowSerializer(changes['notes'], many=True, context=context).data,
+            'categories': CategoryRowSerializer(changes['categories'], many=True, context=context).data
+        })
+
+    def iter_csv_items(self, items):
+        """ Yields the notes representation flattened to csv columns """
+        for item in items:
+            category = item['category'] or {}
+
+            yield {
+                **item,
+                'category_id': category.get('id'),
+                'category_name': category.get('name')
+            }
+
+    @action(['GET'], detail=False)
+    def export(self, request, **kwargs):
+        """
+        Streams all the user notes as newline delimited JSON or,
+        with `?type=csv`, as CSV. It accepts the list filters.
+        """
+        output = cast_param(request, 'type', default=None) or 'ndjson'
+
+        if output not in {'ndjson', 'csv'}:
+            raise ValidationError({'type': [_('Invalid export type "{type}".').format(type=output)]})
+
+        queryset = NoteRowSerializer.get_values(self.filter_queryset(self.get_queryset()))
+        items = NoteRowSerializer(queryset.iterator(chunk_size=self.export_chunk_size), many=True).iterate()
+
+        if output == 'csv':
+            content, content_type = iter_csv(self.iter_csv_items(items), self.export_csv_header), 'text/csv'
+
+        else:
+            content, content_type = iter_ndjson(items), 'application/x-ndjson'
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="notes.{output}"'
+
+        return response
+
+    def get_import_lines(self, request):
+        """ Returns the import file type and an iterator over its decoded lines """
+        upload = None
+
+        if request.content_type.startswith('multipart/form-data'):
+            upload = request.FILES.get('file')
+
+            if upload is None:
+                raise ValidationError({'file': [_('No file was submitted.')]})
+
+        default = 'csv' if (
+            upload.name.lower().endswith('.csv') if upload else
+            request.content_type.startswith('text/csv')
+        ) else 'ndjson'
+
+        output = cast_param(request, 'type', default=None) or default
+
+        if output not in {'ndjson', 'csv'}:
+            raise ValidationError({'type': [_('Invalid import type "{type}".').format(type=output)]})
+
+        # the raw body is read line by line from the request stream
+        # and large uploads are kept by django on temporary files.
+        lines = upload if upload is not None else request._request
+
+        return output, codecs.iterdecode(lines, 'utf-8-sig', errors='replace')
+
+    @action(['POST'], detail=False, url_path='import')
+    def import_notes(self, request, **kwargs):
+        """
+        Imports notes from a NDJSON or CSV body, or from the `file` of a
+        multipart upload, creating missing categories by name. The file
+        is read incrementally and the notes are inserted in batches of
+        `?batch_size=` notes. Returns a summary of the imported rows.
+        """
+        output, lines = self.get_import_lines(request)
+        batch_size = cast_param(request, 'batch_size', cast=int, default=None) or self.import_batch_size
+
+        importer = NoteImporter(request.user, batch_size=max(1, min(batch_size, self.import_batch_size * 10)))
+        summary = importer.run(read_csv(lines) if output == 'csv' else read_ndjson(lines))
+
+        return Response(summary, status=status.HTTP_200_OK)
@@ -48,6 +48,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'commons.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -75,6 +76,19 @@ TEMPLATES = [
 WSGI_APPLICATION = 'src.wsgi.application'
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.1/ref/settings/#caches
+# The `commons.cache.DjangoCache` caches share their entries between processes
+# through it, the default local memory backend is private to each process.
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+
 # Database
 # https://docs.djangoproject.com/en/3.1/ref/settings/#databases
 
@@ -85,6 +99,113 @@ DATABASES = {
         cast=dj_database_url.parse)
 }
 
+# Read replicas, parsed like `DATABASE_URL`. The safe requests of the notes api
+# read from them, weighted by `DATABASE_REPLICA_WEIGHTS`, see `commons.db.routers`.
+
+DATABASE_REPLICA_URLS = config('DATABASE_REPLICA_URLS', default='', cast=decouple.Csv())
+DATABASE_REPLICA_WEIGHTS = config('DATABASE_REPLICA_WEIGHTS', default='', cast=decouple.Csv(cast=int))
+DATABASE_REPLICAS = {}
+
+for index, url in enumerate(DATABASE_REPLICA_URLS):
+    alias = f'replica{index + 1}'
+
+    DATABASES[alias] = {**dj_database_url.parse(url), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS[alias] = DATABASE_REPLICA_WEIGHTS[index] if index < len(DATABASE_REPLICA_WEIGHTS) else 1
+
+DATABASE_ROUTERS = ['commons.db.routers.ReplicaRouter']
+
+# Users read from the primary database for these seconds after writing.
+DATABASE_REPLICA_STICKY_SECONDS = config('DATABASE_REPLICA_STICKY_SECONDS', default=5, cast=int)
+# Failed replicas are left out for these seconds.
+DATABASE_REPLICA_RETRY_SECONDS = config('DATABASE_REPLICA_RETRY_SECONDS', default=30, cast=int)
+
+# Users pinned to the primary database, the cache must be shared between the processes
+# when there are replicas, `commons.cache.DjangoCache` on a shared `CACHES` alias.
+
+DATABASE_REPLICA_PINS_CACHE = {
+    'BACKEND': config(
+        'DATABASE_REPLICA_PINS_BACKEND',
+        default='commons.cache.DjangoCache' if DATABASE_REPLICAS else 'commons.cache.MemoryCache'),
+    'OPTIONS': {
+        'max_size': config('DATABASE_REPLICA_PINS_MAX_SIZE', default=10000, cast=int),
+        'timeout': DATABASE_REPLICA_STICKY_SECONDS,
+    }
+}
+
+# Persistent connections, kept by each thread for `CONN_MAX_AGE` seconds,
+# checked before being reused across requests with the health checks.
+
+DATABASE_CONN_MAX_AGE = config('DATABASE_CONN_MAX_AGE', default=0, cast=int)
+DATABASE_CONN_HEALTH_CHECKS = config('DATABASE_CONN_HEALTH_CHECKS', default=False, cast=bool)
+
+# In-process connection pool shared by the threads, see `commons.db.pool`.
+
+DATABASE_POOL = {
+    'MAX_SIZE': config('DATABASE_POOL_MAX_SIZE', default=10, cast=int),
+    'MAX_OVERFLOW': config('DATABASE_POOL_MAX_OVERFLOW', default=5, cast=int),
+    'TIMEOUT': config('DATABASE_POOL_TIMEOUT', default=30, cast=float),
+    'RECYCLE': config('DATABASE_POOL_RECYCLE', default=3600, cast=int),
+    'PRE_PING': config('DATABASE_POOL_PRE_PING', default=True, cast=bool),
+} if config('DATABASE_POOL', default=False, cast=bool) else None
+
+# The test runs copy a snapshot of the migrated test database, a sqlite file on the
+# snapshots directory or a postgres template database, saved on the first run of the
+# current migrations, instead of running every migration again. See `commons.runner`.
+
+TEST_RUNNER = 'commons.runner.TestRunner'
+
+TEST_DATABASE_SNAPSHOTS = config('TEST_DATABASE_SNAPSHOTS', default=True, cast=bool)
+TEST_DATABASE_SNAPSHOT_DIR = config('TEST_DATABASE_SNAPSHOT_DIR', default=BASE_DIR.parent.joinpath('.test-snapshots'))
+
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = DATABASE_CONN_MAX_AGE
+    database['CONN_HEALTH_CHECKS'] = DATABASE_CONN_HEALTH_CHECKS
+
+    if DATABASE_POOL:
+        database['POOL'] = DATABASE_POOL
+
+    # the pool and the health checks are provided by the project backends.
+    if DATABASE_POOL or DATABASE_CONN_HEALTH_CHECKS:
+        database['ENGINE'] = {
+            'django.db.backends.postgresql': 'commons.db.backends.postgresql',
+            'django.db.backends.postgresql_psycopg2': 'commons.db.backends.postgresql',
+            'django.db.backends.sqlite3': 'commons.db.backends.sqlite3',
+        }.get(database['ENGINE'], database['ENGINE'])
+
+
+# Password hashing policy, `pbkdf2`, `scrypt` or `argon2` (requires argon2-cffi).
+# Hashes of the other hashers are still verified, and rehashed after a sign-in.
+
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'commons.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'commons.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+}
+
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='pbkdf2')
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_CHOICES[PASSWORD_HASHER],
+    *[hasher for name, hasher in PASSWORD_HASHER_CHOICES.items() if name != PASSWORD_HASHER],
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=216000, cast=int)
+PASSWORD_SCRYPT_N = config('PASSWORD_SCRYPT_N', default=2 ** 14, cast=int)
+PASSWORD_SCRYPT_R = config('PASSWORD_SCRYPT_R', default=8, cast=int)
+PASSWORD_SCRYPT_P = config('PASSWORD_SCRYPT_P', default=1, cast=int)
+
+# Hashers of the test runs, the hashing policy is pointless there and slow on purpose.
+
+TEST_PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Passwords are hashed by a bounded pool of threads, the sign-ins and sign-ups over
+# the queue size, or expected to wait over the timeout, are refused with `503
+# Service Unavailable` and a `Retry-After` estimated from the recent hashing times.
+
+PASSWORD_HASHING_THREADS = config('PASSWORD_HASHING_THREADS', default=2, cast=int)
+PASSWORD_HASHING_QUEUE = config('PASSWORD_HASHING_QUEUE', default=32, cast=int)
+PASSWORD_HASHING_TIMEOUT = config('PASSWORD_HASHING_TIMEOUT', default=10, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -151,11 +272,135 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.JSONParser'
     ),
     'DEFAULT_RENDERER_CLASSES': (
-         'rest_framework.renderers.JSONRenderer',
-    )
+         'commons.renderers.JSONRenderer',
+    ),
+    # token buckets of the `commons.throttling` classes, refilled along the period.
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': config('AUTH_THROTTLE_IP_RATE', default='30/min'),
+        'auth_email': config('AUTH_THROTTLE_EMAIL_RATE', default='10/min'),
+    },
+    # proxies in front of the application, the client address is taken from the
+    # `X-Forwarded-For` entry they added, or from the connection without proxies,
+    # since the header sent by the clients themselves can be anything.
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
+}
+
+# Throttling buckets storage, use `commons.cache.DjangoCache` to share them between
+# processes. Set the backend to an empty value to disable the throttling.
+
+THROTTLE_CACHE = {
+    'BACKEND': config('THROTTLE_CACHE_BACKEND', default='commons.cache.MemoryCache'),
+    'OPTIONS': {
+        'max_size': config('THROTTLE_CACHE_MAX_SIZE', default=100000, cast=int),
+    }
 }
 
 # JWT Settings
 
 JWT_SECRET_KEY = config('JWT_SECRET_KEY', default=SECRET_KEY)
 JWT_EXPIRES_IN = config('JWT_EXPIRES_IN', default=3600)
+
+# Authenticated users cache, set the backend to an empty value to disable it.
+# Available backends: `commons.cache.MemoryCache` and `commons.cache.DjangoCache`.
+# The users saved or deleted through the models are removed from the cache, but
+# only from the one of the current process with the memory backend, and the queryset
+# updates, like `.update(is_active=False)`, send no signals at all. So the changes
+# of the users, deactivations included, may take up to the timeout to be seen.
+# A shared `commons.cache.DjangoCache` sees every model change right away, but its
+# lookups block, so the async views cannot authenticate on the event loop anymore.
+
+JWT_USER_CACHE = {
+    'BACKEND': config('JWT_USER_CACHE_BACKEND', default='commons.cache.MemoryCache'),
+    'OPTIONS': {
+        'max_size': config('JWT_USER_CACHE_MAX_SIZE', default=1024, cast=int),
+        'timeout': config('JWT_USER_CACHE_TIMEOUT', default=30, cast=int),
+    }
+}
+
+# Verified tokens claims cache, set the backend to an empty value to disable it.
+
+JWT_CLAIMS_CACHE = {
+    'BACKEND': config('JWT_CLAIMS_CACHE_BACKEND', default='commons.cache.MemoryCache'),
+    'OPTIONS': {
+        'max_size': config('JWT_CLAIMS_CACHE_MAX_SIZE', default=4096, cast=int),
+        'timeout': config('JWT_CLAIMS_CACHE_TIMEOUT', default=300, cast=int),
+    }
+}
+
+# Per-user cache of the categories and notes lists, outdated whenever any note or
+# category of the user changes. It's disabled by default, since every process must
+# see the changes, enable it with `commons.cache.DjangoCache`, stored on the
+# `default` alias of `CACHES`, which must be shared, like memcached or redis.
+
+LIST_CACHE = {
+    'BACKEND': config('LIST_CACHE_BACKEND', default=''),
+    'OPTIONS': {
+        'max_size': config('LIST_CACHE_MAX_SIZE', default=10000, cast=int),
+        'timeout': config('LIST_CACHE_TIMEOUT', default=300, cast=int),
+    }
+}
+
+# Notes Settings
+
+NOTES_BULK_MAX_SIZE = config('NOTES_BULK_MAX_SIZE', default=500, cast=int)
+NOTES_EXPORT_CHUNK_SIZE = config('NOTES_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+NOTES_IMPORT_BATCH_SIZE = config('NOTES_IMPORT_BATCH_SIZE', default=1000, cast=int)
+NOTES_CHANGES_PAGE_SIZE = config('NOTES_CHANGES_PAGE_SIZE', default=500, cast=int)
+NOTES_DELETIONS_RETENTION_DAYS = config('NOTES_DELETIONS_RETENTION_DAYS', default=30, cast=int)
+
+# The changes sync re-reads the last seconds once a client is up to date, so
+# the rows of transactions committed late are not skipped, and skips up to
+# `NOTES_CHANGES_DEDUPE_SIZE` rows of that window the client already has.
+NOTES_CHANGES_OVERLAP_SECONDS = config('NOTES_CHANGES_OVERLAP_SECONDS', default=30, cast=int)
+NOTES_CHANGES_DEDUPE_SIZE = config('NOTES_CHANGES_DEDUPE_SIZE', default=50, cast=int)
+
+# Serve the hot read endpoints as async views, enabled by default on ASGI.
+
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+ASYNC_VIEWS_THREADS = config('ASYNC_VIEWS_THREADS', default=8, cast=int)
+
+# Per-request timings, sent as `Server-Timing` headers and logged as JSON for
+# a sample of the requests and for the slow ones. A sample of the requests is
+# profiled and the slow ones dumped to the profiles directory, the slow
+# request threshold, in seconds, must be set to profile them.
+
+INSTRUMENTATION_SERVER_TIMING = config('INSTRUMENTATION_SERVER_TIMING', default=DEBUG, cast=bool)
+INSTRUMENTATION_LOG_SAMPLE_RATE = config('INSTRUMENTATION_LOG_SAMPLE_RATE', default=0.0, cast=float)
+INSTRUMENTATION_SLOW_REQUEST_SECONDS = config('INSTRUMENTATION_SLOW_REQUEST_SECONDS', default=0.0, cast=float)
+INSTRUMENTATION_PROFILE_SAMPLE_RATE = config('INSTRUMENTATION_PROFILE_SAMPLE_RATE', default=0.0, cast=float)
+INSTRUMENTATION_PROFILE_DIR = config('INSTRUMENTATION_PROFILE_DIR', default=BASE_DIR.joinpath('profiles'))
+
+# Prometheus metrics exposed on `/metrics`. Multi-process servers, like gunicorn,
+# must set a metrics directory, emptied before they start, where each process
+# keeps its values to be aggregated.
+
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_DIR = config('METRICS_DIR', default='')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'commons.instrumentation': {
+            'handlers': ['console'],
+            'level': config('INSTRUMENTATION_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# Encode the responses with orjson, when it's installed, instead of the standard library.
+# The large responses are streamed in chunks, by the lists of at least the minimum items.
+
+JSON_RENDERER_ORJSON = config('JSON_RENDERER_ORJSON', default=True, cast=bool)
+JSON_STREAM_MIN_ITEMS = config('JSON_STREAM_MIN_ITEMS', default=200, cast=int)
+JSON_STREAM_CHUNK_SIZE = config('JSON_STREAM_CHUNK_SIZE', default=100, cast=int)
+
+# Serialize the list endpoints straight from `.values()` rows.
+
+FAST_SERIALIZATION = config('FAST_SERIALIZATION', default=True, cast=bool)
@@ -17,11 +17,17 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.urls import path, include
 
+from commons.metrics import metrics_view
+
 
 urlpatterns = [
     path('api/', include('notes.urls')),
 ]
 
+# Expose the prometheus metrics, recorded by the instrumentation middleware.
+if settings.METRICS_ENABLED:
+    urlpatterns += [path('metrics', metrics_view, name='metrics')]
+
 
 # Apply the media and static files urls.
 # It only works in debug mode.